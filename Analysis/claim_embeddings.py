@@ -0,0 +1,261 @@
+import re
+import zlib
+import logging
+from typing import Dict, List, Optional, Any
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Amount fields embedded alongside the text, each on a log scale
+AMOUNT_FIELDS = ("claimed_amount", "property_value")
+
+def claim_text(claim: Dict[str, Any]) -> str:
+    """
+    Build the text that represents a claim for embedding.
+
+    Args:
+        claim: Claim data with 'description', 'cause_of_damage' and optionally a
+            'damage_assessment' with detections.
+
+    Returns:
+        Description, cause of damage and detected damage types as one string.
+    """
+    assessment = claim.get("damage_assessment") or {}
+    damage_types = [str(d.get("type")) for d in assessment.get("detections", []) if d.get("type")]
+    parts = [
+        str(claim.get("description") or ""),
+        f"cause: {claim.get('cause_of_damage')}" if claim.get("cause_of_damage") else "",
+        f"damage: {', '.join(damage_types)}" if damage_types else ""
+    ]
+    return "\n".join(part for part in parts if part)
+
+def _amount(value: Any) -> float:
+    """Parse an amount, 0 if missing or malformed."""
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def claim_vector(claim: Dict[str, Any], dim: int = 256, amount_weight: float = 0.5) -> np.ndarray:
+    """
+    Embed a claim locally, without a model or API call.
+
+    Words and word pairs of the claim text are feature-hashed with random signs
+    into dim - len(AMOUNT_FIELDS) dimensions; the remaining dimensions hold the
+    log-scaled amounts. The result is unit length, so the dot product of two
+    vectors is their cosine similarity.
+
+    Args:
+        claim: Claim data dictionary.
+        dim: Vector length.
+        amount_weight: Share of the vector norm given to the amounts.
+
+    Returns:
+        Array (dim,) of float32.
+    """
+    text_dim = dim - len(AMOUNT_FIELDS)
+    vector = np.zeros(dim, dtype=np.float32)
+    words = re.findall(r"\w+", claim_text(claim).lower())
+    for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        h = zlib.crc32(token.encode("utf-8"))
+        vector[h % text_dim] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector[:text_dim])
+    if norm:
+        vector[:text_dim] *= (1 - amount_weight) / norm
+
+    # Amounts up to about $10M map onto [0, 1]
+    amounts = np.array([np.log10(1 + _amount(claim.get(field))) / 7 for field in AMOUNT_FIELDS], dtype=np.float32)
+    vector[text_dim:] = amount_weight * amounts
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class ClaimEmbeddingIndex:
+    """
+    Exact nearest-neighbor index of claim embeddings for anomaly scoring.
+
+    Vectors are kept unit length in one float32 matrix, so the k nearest claims
+    are a single matrix-vector product and a partial sort: about 10 ms per 100k
+    claims at 256 dimensions, and exact, unlike an approximate graph index.
+    Batches of queries share one matrix product.
+
+    A claim's anomaly is the mean cosine distance to its k nearest indexed claims,
+    reported as a percentile of the same distance over a sample of indexed claims.
+    The reference sample is recomputed whenever the index has doubled since it was
+    last computed. LLM ratings can be stored with a claim so that a nearly
+    identical claim reuses them.
+    """
+
+    def __init__(self, k: int = 10, min_claims: int = 100, reference_size: int = 1000, seed: int = 0):
+        """
+        Initialize the embedding index.
+
+        Args:
+            k: Number of neighbors compared against.
+            min_claims: Fewest indexed claims before anomaly scores are reported.
+            reference_size: Number of indexed claims sampled for the distance percentiles.
+            seed: Seed for the reference sample.
+        """
+        self.k = k
+        self.min_claims = min_claims
+        self.reference_size = reference_size
+        self._rng = np.random.default_rng(seed)
+        self._reference: Optional[np.ndarray] = None
+        self._reference_count = 0
+
+        # Per-claim columns, indexed by row
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._count = 0
+        self.claim_ids: List[Any] = []
+        self.ratings: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    @staticmethod
+    def _normalize(vectors: Any) -> np.ndarray:
+        """Convert vectors to a unit-length float32 matrix."""
+        matrix = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1)
+
+    def vector_for(self, claim_id: Any) -> Optional[np.ndarray]:
+        """Get the stored embedding of a claim, if it is indexed."""
+        row = self._rows.get(claim_id) if claim_id is not None else None
+        return self.vectors[row] if row is not None else None
+
+    def add(self, vector: Any, claim_id: Any, rating: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Add a claim embedding. A claim already indexed only has its rating updated.
+
+        Args:
+            vector: Claim embedding, from claim_vector or LLMProvider.embed.
+            claim_id: Claim the embedding belongs to.
+            rating: LLM rating to reuse for nearly identical claims.
+
+        Returns:
+            Row of the claim in the index.
+        """
+        if claim_id is not None and claim_id in self._rows:
+            row = self._rows[claim_id]
+            if rating is not None:
+                self.ratings[row] = rating
+            return row
+        vector = self._normalize(vector)[0]
+        if self._count and len(vector) != self.vectors.shape[1]:
+            raise ValueError(f"Embedding has {len(vector)} dimensions, index has {self.vectors.shape[1]}")
+
+        row = self._count
+        if row == len(self.vectors):
+            # Grow the matrix geometrically to keep appends amortized O(1)
+            grown = np.zeros((max(256, 2 * row), len(vector)), dtype=np.float32)
+            if row:
+                grown[:row] = self.vectors[:row]
+            self.vectors = grown
+        self.vectors[row] = vector
+        self._count += 1
+        self.claim_ids.append(claim_id)
+        self.ratings.append(rating)
+        if claim_id is not None:
+            self._rows[claim_id] = row
+        return row
+
+    def add_many(self, vectors: Any, claim_ids: List[Any]) -> int:
+        """
+        Add embeddings in bulk, e.g. when loading the existing claim book.
+
+        Args:
+            vectors: Matrix (n, dim) of claim embeddings.
+            claim_ids: Claim ID for each row.
+
+        Returns:
+            Number of claims in the index afterwards.
+        """
+        for vector, claim_id in zip(self._normalize(vectors), claim_ids):
+            self.add(vector, claim_id)
+        logger.info(f"Claim embedding index holds {len(self)} claims")
+        return len(self)
+
+    def _knn(self, queries: np.ndarray, exclude: np.ndarray, chunk_elements: int = 1 << 24):
+        """
+        Find the k nearest indexed claims for unit-length query vectors.
+
+        Args:
+            queries: Matrix (m, dim) of unit-length vectors.
+            exclude: Row to leave out for each query (its own), -1 for none.
+            chunk_elements: Largest similarity block computed at once.
+
+        Returns:
+            Tuple of (rows, similarities), each (m, k') with the most similar first.
+        """
+        k = min(self.k, self._count - 1 if (exclude >= 0).any() else self._count)
+        vectors = self.vectors[:self._count]
+        step = max(1, chunk_elements // max(self._count, 1))
+        rows = np.zeros((len(queries), k), dtype=np.int64)
+        similarities = np.zeros((len(queries), k), dtype=np.float32)
+        for start in range(0, len(queries), step):
+            block = queries[start:start + step] @ vectors.T
+            own = exclude[start:start + step]
+            has_own = own >= 0
+            block[np.flatnonzero(has_own), own[has_own]] = -np.inf
+            top = np.argpartition(block, -k, axis=1)[:, -k:]
+            scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-scores, axis=1)
+            rows[start:start + step] = np.take_along_axis(top, order, axis=1)
+            similarities[start:start + step] = np.take_along_axis(scores, order, axis=1)
+        return rows, similarities
+
+    def _calibrate(self):
+        """Recompute the reference distribution of k-nearest-neighbor distances."""
+        sample = self._rng.choice(self._count, size=min(self.reference_size, self._count), replace=False)
+        _, similarities = self._knn(self.vectors[sample], sample)
+        self._reference = np.sort(1 - similarities.mean(axis=1))
+        self._reference_count = self._count
+
+    def neighbors(self, vectors: Any, claim_ids: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Score how unusual claims are against their nearest indexed claims.
+
+        Args:
+            vectors: One claim embedding or a matrix (m, dim) of them.
+            claim_ids: Claim ID for each vector, so an indexed claim is not its own neighbor.
+
+        Returns:
+            One result per vector with the mean distance to the k nearest claims, its
+            percentile among indexed claims (None until min_claims are indexed), and
+            the nearest claim's ID, similarity and stored rating.
+        """
+        queries = self._normalize(vectors)
+        if self._count < 2:
+            return [
+                {"distance": None, "percentile": None, "nearest_claim_id": None,
+                 "nearest_similarity": 0.0, "nearest_rating": None}
+                for _ in queries
+            ]
+        ids = claim_ids or [None] * len(queries)
+        exclude = np.array([self._rows.get(claim_id, -1) if claim_id is not None else -1 for claim_id in ids],
+                           dtype=np.int64)
+        rows, similarities = self._knn(queries, exclude)
+        distances = 1 - similarities.mean(axis=1)
+
+        percentiles = None
+        if self._count >= self.min_claims:
+            if self._reference is None or self._count >= 2 * self._reference_count:
+                self._calibrate()
+            percentiles = np.searchsorted(self._reference, distances, side="right") / len(self._reference)
+
+        return [
+            {
+                "distance": float(distances[i]),
+                "percentile": float(percentiles[i]) if percentiles is not None else None,
+                "nearest_claim_id": self.claim_ids[rows[i, 0]],
+                "nearest_similarity": float(similarities[i, 0]),
+                "nearest_rating": self.ratings[rows[i, 0]]
+            }
+            for i in range(len(queries))
+        ]
@@ -0,0 +1,310 @@
+import re
+import bisect
+import logging
+import datetime
+from array import array
+from typing import Dict, List, Optional, Any
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Claim fields each history key is read from, in order of preference
+HISTORY_KEYS = {
+    "claimant": ("claimant_id", "homeowner_id"),
+    "property": ("property_id",),
+    "policy": ("policy_number",),
+    "phone": ("phone", "claimant_phone", "phone_number"),
+    "address": ("address", "property_address")
+}
+
+DENIED_STATUSES = {"rejected", "denied"}
+
+ADDRESS_ABBREVIATIONS = {
+    "street": "st", "avenue": "ave", "road": "rd", "drive": "dr", "lane": "ln",
+    "boulevard": "blvd", "court": "ct", "place": "pl", "apartment": "apt", "suite": "ste",
+    "north": "n", "south": "s", "east": "e", "west": "w"
+}
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+def normalize_key(kind: str, value: Any) -> Optional[str]:
+    """
+    Normalize a history key so that formatting differences do not split an entity.
+
+    Args:
+        kind: Key type (one of HISTORY_KEYS).
+        value: Raw value from the claim.
+
+    Returns:
+        Normalized key, or None if the value is empty or unusable.
+    """
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    if kind == "phone":
+        digits = re.sub(r"\D", "", text)
+        # Drop the country code so +1 (555) 010-0000 and 555-010-0000 match
+        return digits[-10:] if len(digits) >= 7 else None
+    if kind == "address":
+        words = re.sub(r"[^\w\s]", " ", text).split()
+        return " ".join(ADDRESS_ABBREVIATIONS.get(word, word) for word in words) or None
+    return text or None
+
+def to_datetime(value: Any) -> datetime.datetime:
+    """
+    Convert a datetime, date or ISO 8601 string to a naive datetime in local wall time.
+
+    Claim dates are compared as written, so a UTC offset is dropped rather than
+    converted; the fraud detector parses claim dates the same way.
+
+    Args:
+        value: datetime, date or ISO 8601 string.
+
+    Returns:
+        Naive datetime.
+    """
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    elif isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    elif not isinstance(value, datetime.datetime):
+        raise TypeError(f"Cannot convert {type(value).__name__} to a datetime")
+    return value.replace(tzinfo=None)
+
+def to_timestamp(value: Any) -> int:
+    """
+    Convert a datetime, date or ISO 8601 string to seconds since the epoch of its wall time.
+
+    Args:
+        value: datetime, date or ISO 8601 string.
+
+    Returns:
+        Seconds since the epoch.
+    """
+    return int((to_datetime(value) - EPOCH).total_seconds())
+
+class ClaimHistoryIndex:
+    """
+    In-memory index of past claims by claimant, property, policy, phone and address.
+
+    Every distinct key value gets a compact integer ID. Each ID owns two parallel
+    arrays, claim times and claim rows, kept in time order, so counting an entity's
+    claims in any time range is two binary searches. Per-claim attributes (time,
+    denial, carrier, cause, claimant) are stored column-wise by row. New claims are
+    appended as they arrive; a late claim is inserted in place.
+    """
+
+    def __init__(self):
+        """Initialize an empty claim history index."""
+        self._ids: Dict[str, Dict[str, int]] = {kind: {} for kind in HISTORY_KEYS}
+        self._times: Dict[str, List[array]] = {kind: [] for kind in HISTORY_KEYS}
+        self._rows: Dict[str, List[array]] = {kind: [] for kind in HISTORY_KEYS}
+        self._claim_rows: Dict[Any, int] = {}
+        self._carrier_ids: Dict[str, int] = {}
+        self._cause_ids: Dict[str, int] = {}
+
+        # Per-claim columns, indexed by row
+        self.claim_ids: List[Any] = []
+        self.claim_time = array("q")
+        self.denied = bytearray()
+        self.carrier = array("l")
+        self.cause = array("l")
+        self.claimant = array("l")
+
+    def __len__(self) -> int:
+        return len(self.claim_ids)
+
+    def _keys(self, claim: Dict[str, Any]) -> Dict[str, str]:
+        """Get the normalized history keys present on a claim."""
+        keys = {}
+        for kind, fields in HISTORY_KEYS.items():
+            for field in fields:
+                key = normalize_key(kind, claim.get(field))
+                if key is not None:
+                    keys[kind] = key
+                    break
+        return keys
+
+    @staticmethod
+    def _claim_time(claim: Dict[str, Any]) -> int:
+        """Get a claim's filing time in epoch seconds."""
+        value = claim.get("claim_date") or claim.get("submitted_at") or claim.get("incident_date")
+        return to_timestamp(value) if value else to_timestamp(datetime.datetime.now())
+
+    @staticmethod
+    def _code(codes: Dict[str, int], value: Any) -> int:
+        """Map a categorical value to a compact integer code, -1 if missing."""
+        if not value:
+            return -1
+        return codes.setdefault(str(value).strip().lower(), len(codes))
+
+    def add(self, claim: Dict[str, Any]) -> int:
+        """
+        Add a claim, or refresh the status of one that is already indexed.
+
+        Args:
+            claim: Claim data with 'claim_id', 'claim_date', the history key fields and
+                optional 'status', 'insurance_company' and 'cause_of_damage'.
+
+        Returns:
+            Row of the claim in the index.
+        """
+        claim_id = claim.get("claim_id", claim.get("id"))
+        denied = str(claim.get("status", "")).lower() in DENIED_STATUSES
+        if claim_id is not None and claim_id in self._claim_rows:
+            row = self._claim_rows[claim_id]
+            self.denied[row] = denied
+            return row
+
+        row = len(self.claim_ids)
+        timestamp = self._claim_time(claim)
+        keys = self._keys(claim)
+        if claim_id is not None:
+            self._claim_rows[claim_id] = row
+        self.claim_ids.append(claim_id)
+        self.claim_time.append(timestamp)
+        self.denied.append(denied)
+        self.carrier.append(self._code(self._carrier_ids, claim.get("insurance_company") or claim.get("carrier")))
+        self.cause.append(self._code(self._cause_ids, claim.get("cause_of_damage")))
+        self.claimant.append(self._ids["claimant"].setdefault(keys["claimant"], len(self._ids["claimant"]))
+                             if "claimant" in keys else -1)
+
+        for kind, key in keys.items():
+            entity = self._ids[kind].setdefault(key, len(self._ids[kind]))
+            if entity == len(self._times[kind]):
+                self._times[kind].append(array("q"))
+                self._rows[kind].append(array("q"))
+            times, rows = self._times[kind][entity], self._rows[kind][entity]
+            if not times or timestamp >= times[-1]:
+                times.append(timestamp)
+                rows.append(row)
+            else:
+                position = bisect.bisect_right(times, timestamp)
+                times.insert(position, timestamp)
+                rows.insert(position, row)
+        return row
+
+    def add_many(self, claims: List[Dict[str, Any]]) -> int:
+        """
+        Add claims in bulk, e.g. when loading the existing claim book.
+
+        Args:
+            claims: List of claim data dictionaries.
+
+        Returns:
+            Number of claims in the index afterwards.
+        """
+        # Appending in time order keeps every insert on the fast path
+        for claim in sorted(claims, key=self._claim_time):
+            self.add(claim)
+        logger.info(f"Claim history index holds {len(self)} claims")
+        return len(self)
+
+    def _bounds(self, kind: str, key: Optional[str], start: Optional[int], end: Optional[int]):
+        """Find an entity's claims with start <= time < end as a slice of its arrays."""
+        entity = self._ids[kind].get(key) if key is not None else None
+        if entity is None:
+            return None, 0, 0
+        times = self._times[kind][entity]
+        low = bisect.bisect_left(times, start) if start is not None else 0
+        high = bisect.bisect_left(times, end) if end is not None else len(times)
+        return entity, low, max(low, high)
+
+    def _range(self, kind: str, key: Optional[str], start: Optional[int], end: Optional[int]) -> array:
+        """Get the rows of an entity's claims with start <= time < end."""
+        entity, low, high = self._bounds(kind, key, start, end)
+        return self._rows[kind][entity][low:high] if entity is not None else array("q")
+
+    def count(self, kind: str, value: Any, start: Any = None, end: Any = None) -> int:
+        """
+        Count an entity's claims in a time range in O(log n).
+
+        Args:
+            kind: Key type (one of HISTORY_KEYS).
+            value: Raw key value, normalized the same way as on add.
+            start: Start of the range (inclusive), datetime or ISO string. None for no bound.
+            end: End of the range (exclusive). None for no bound.
+
+        Returns:
+            Number of claims.
+        """
+        _, low, high = self._bounds(
+            kind,
+            normalize_key(kind, value),
+            to_timestamp(start) if start is not None else None,
+            to_timestamp(end) if end is not None else None
+        )
+        return high - low
+
+    def claims_per_year(self, kind: str, value: Any, as_of: Any = None) -> int:
+        """
+        Count an entity's claims in the 365 days up to and including as_of.
+
+        Args:
+            kind: Key type (one of HISTORY_KEYS).
+            value: Raw key value.
+            as_of: End of the year, datetime or ISO string. Defaults to now.
+
+        Returns:
+            Number of claims.
+        """
+        end = to_timestamp(as_of or datetime.datetime.now()) + 1
+        _, low, high = self._bounds(kind, normalize_key(kind, value), end - 1 - 365 * 86400, end)
+        return high - low
+
+    def history(self, claim: Dict[str, Any], window_days: int = 365) -> Dict[str, Any]:
+        """
+        Summarize the history relevant to one claim, excluding the claim itself.
+
+        Each key costs two binary searches, but the matching rows are then read one
+        by one, so a lookup is O(log n + k) for k claims sharing the claim's keys,
+        all-time claims of the claimant included.
+
+        Args:
+            claim: Claim data dictionary.
+            window_days: Look-back window for recent-claim counts.
+
+        Returns:
+            Dictionary with recent claim counts by key type, all-time prior claims and
+            denials for the claimant, distinct carriers, prior claims with the same cause,
+            and the number of other claimants sharing the phone or address.
+        """
+        keys = self._keys(claim)
+        timestamp = self._claim_time(claim)
+        own_row = self._claim_rows.get(claim.get("claim_id", claim.get("id")))
+        start, end = timestamp - window_days * 86400, timestamp + 1
+
+        recent = {
+            kind: [row for row in self._range(kind, key, start, end) if row != own_row]
+            for kind, key in keys.items()
+        }
+        prior = [row for row in self._range("claimant", keys.get("claimant"), None, end) if row != own_row]
+
+        cause = self._cause_ids.get(str(claim.get("cause_of_damage", "")).strip().lower())
+        related = set(recent.get("claimant", [])) | set(recent.get("property", []))
+        carriers = {self.carrier[row] for row in prior if self.carrier[row] >= 0}
+        carrier = claim.get("insurance_company") or claim.get("carrier")
+        if carrier:
+            # A carrier the index has not seen yet still counts as a distinct one
+            carriers.add(self._carrier_ids.get(str(carrier).strip().lower(), -2))
+
+        claimant = self._ids["claimant"].get(keys.get("claimant"), -1)
+        shared = {}
+        for kind in ("phone", "address"):
+            others = {self.claimant[row] for row in self._range(kind, keys.get(kind), None, end) if row != own_row}
+            others.discard(claimant)
+            others.discard(-1)
+            shared[kind] = len(others)
+
+        return {
+            "recent_claims": {kind: len(rows) for kind, rows in recent.items()},
+            "prior_claims": len(prior),
+            "prior_denials": sum(self.denied[row] for row in prior),
+            "carriers": len(carriers),
+            "similar_claims": sum(1 for row in related if cause is not None and self.cause[row] == cause),
+            "shared_claimants": shared
+        }
@@ -1,9 +1,14 @@
 import os
 import json
 import logging
+import itertools
 from typing import Dict, List, Optional, Union, Any
 import requests
+import numpy as np
 from ..common.llm_provider import LLMProviderFactory
+from orpaynter_pricing import (
+    EstimateCache, freeze_rates, memoize_estimate, price_agent_project, pricing_engine
+)
 
 # Configure logging
 logging.basicConfig(
@@ -18,12 +23,16 @@ class CostEstimator:
     Uses regional material/labor rates with adjustment logic.
     """
     
+    # Read-only tables; replacing one invalidates cached estimates
+    RATE_TABLES = ("regional_rates", "material_types", "labor_rates", "additional_factors")
+    
     def __init__(
         self,
         llm_provider_type: str = "openai",
         llm_model: str = "gpt-4-turbo",
         rates_api_key: Optional[str] = None,
-        default_region: str = "US-National"
+        default_region: str = "US-National",
+        cache_size: int = 1024
     ):
         """
         Initialize the cost estimator.
@@ -33,6 +42,7 @@ class CostEstimator:
             llm_model: Model name to use for the LLM.
             rates_api_key: API key for rates services. If None, will try to get from environment.
             default_region: Default region to use for cost estimation.
+            cache_size: Maximum number of memoized estimates to keep.
         """
         self.llm_provider = LLMProviderFactory.create_provider(
             llm_provider_type,
@@ -143,6 +153,42 @@ class CostEstimator:
                 "difficult_material": 1.5
             }
         }
+        
+        # Memoized estimates, keyed by normalized inputs and rate-table version
+        self.estimate_cache = EstimateCache(max_entries=cache_size)
+    
+    def __setattr__(self, name: str, value: Any):
+        """
+        Set an attribute, invalidating memoized estimates when a rate table is replaced.
+        
+        Rate tables are stored read-only, so changing a rate means assigning a
+        new table rather than editing the current one in place.
+        
+        Args:
+            name: Attribute name.
+            value: Attribute value.
+        """
+        if name in self.RATE_TABLES:
+            value = freeze_rates(value)
+        super().__setattr__(name, value)
+        if name in self.RATE_TABLES and "estimate_cache" in self.__dict__:
+            self.estimate_cache.invalidate()
+    
+    def reload_rate_tables(self):
+        """
+        Reload the regional rates data, invalidating memoized estimates.
+        """
+        self.regional_rates = self._load_regional_rates()
+        logger.info(f"Reloaded regional rates (version {self.estimate_cache.version})")
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit-rate statistics for the memoized estimates.
+        
+        Returns:
+            Dictionary with cache statistics.
+        """
+        return self.estimate_cache.stats()
     
     def _load_regional_rates(self) -> Dict[str, Dict[str, float]]:
         """
@@ -424,10 +470,344 @@ class CostEstimator:
             "total": total_additional
         }
     
+    async def what_if_analysis(
+        self,
+        project_details: Dict[str, Any],
+        materials: Optional[List[str]] = None,
+        qualities: Optional[List[str]] = None,
+        factor_grid: Optional[Dict[str, List[str]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Compare alternative materials, qualities and cost factors for one project.
+        
+        Every combination of the given options is priced in a single vectorized
+        pass: material rates are broadcast over the material x quality axes,
+        labor rates over the material x factor-combination axes, and the
+        project-level additional costs are computed once and shared.
+        
+        Args:
+            project_details: Dictionary of project details (area_squares, region,
+                additional_factors and the additional cost flags).
+            materials: Material types to compare. Defaults to all known materials.
+            qualities: Quality levels to compare. Defaults to all quality levels.
+            factor_grid: Alternative values per additional factor, e.g.
+                {"roof_pitch": ["low", "steep"]}. Factors not in the grid keep
+                the value from project_details.
+        
+        Returns:
+            Dictionary with the comparison matrix (materials x qualities x factor
+            combinations), a flat ranking of the scenarios and the partial
+            derivatives of the average total with respect to the labor and
+            material multipliers.
+        """
+        try:
+            area_squares = float(project_details.get("area_squares", 0))
+            region = project_details.get("region", self.default_region)
+            base_factors = dict(project_details.get("additional_factors", {}))
+            
+            # Validate the requested options, dropping unknown entries; an explicitly
+            # empty list compares nothing rather than everything
+            if materials is None:
+                materials = list(self.material_types)
+            elif materials:
+                materials = [m for m in materials if m in self.material_types] or ["asphalt_shingle"]
+            if qualities is None:
+                qualities = ["economy", "standard", "premium"]
+            elif qualities:
+                qualities = [q for q in qualities if q in ("economy", "standard", "premium")] or ["standard"]
+            
+            # Expand the factor grid into explicit factor combinations
+            factor_grid = {
+                factor: [v for v in values if v in self.additional_factors.get(factor, {})]
+                for factor, values in (factor_grid or {}).items()
+            }
+            factor_grid = {factor: values for factor, values in factor_grid.items() if values}
+            grid_factors = list(factor_grid)
+            factor_combinations = []
+            for values in itertools.product(*(factor_grid[f] for f in grid_factors)):
+                combination = dict(base_factors)
+                combination.update(zip(grid_factors, values))
+                factor_combinations.append(combination)
+            
+            # Rate lookups happen once per option, not once per scenario
+            material_min = np.array([[self.material_types[m]["cost_per_square"][q]["min"] for q in qualities]
+                                     for m in materials], dtype=float).reshape(len(materials), len(qualities))
+            material_max = np.array([[self.material_types[m]["cost_per_square"][q]["max"] for q in qualities]
+                                     for m in materials], dtype=float).reshape(len(materials), len(qualities))
+            difficulties = [self.material_types[m]["installation_difficulty"] for m in materials]
+            labor_min = np.array([self.labor_rates[d]["min"] for d in difficulties], dtype=float)
+            labor_max = np.array([self.labor_rates[d]["max"] for d in difficulties], dtype=float)
+            factors_multiplier = np.ones(len(factor_combinations))
+            for i, combination in enumerate(factor_combinations):
+                for factor, value in combination.items():
+                    if factor in self.additional_factors and value in self.additional_factors[factor]:
+                        factors_multiplier[i] *= self.additional_factors[factor][value]
+            
+            regional_rates = await self._get_regional_rates(region)
+            labor_multiplier = regional_rates["labor_multiplier"]
+            material_multiplier = regional_rates["material_multiplier"]
+            
+            # Additional costs only depend on the base cost through permits
+            fixed_additional = await self._calculate_additional_costs(
+                0.0,
+                {**project_details, "area_squares": area_squares, "permits_required": False}
+            )
+            permit_rate = 0.03 if project_details.get("permits_required", False) else 0.0
+            
+            # Shape the options along separate axes so one batch call prices (M, Q, F)
+            rates = {
+                "material_min": material_min[:, :, None],
+                "material_max": material_max[:, :, None],
+                "labor_min": labor_min[:, None, None],
+                "labor_max": labor_max[:, None, None],
+                "area": area_squares,
+                "labor_adjustment": factors_multiplier[None, None, :],
+                "percent_extras": permit_rate
+            }
+            quote = pricing_engine.price_batch(
+                **rates,
+                material_multiplier=material_multiplier,
+                labor_multiplier=labor_multiplier,
+                fixed_extras=fixed_additional["total"]
+            )
+            shape = quote["total_avg"].shape
+            total_cost = {level: quote[f"total_{level}"] for level in ("min", "max", "avg")}
+            
+            # The average total is linear in both multipliers, so each partial
+            # derivative is the total priced with that multiplier at 1 and
+            # every term independent of it at 0
+            sensitivity = {
+                "labor_multiplier": pricing_engine.price_batch(
+                    **rates, material_multiplier=0.0, labor_multiplier=1.0
+                )["total_avg"],
+                "material_multiplier": pricing_engine.price_batch(
+                    **rates, material_multiplier=1.0, labor_multiplier=0.0
+                )["total_avg"]
+            }
+
+            ranking = []
+            for i, j, k in np.ndindex(*shape):
+                ranking.append({
+                    "material_type": materials[i],
+                    "quality": qualities[j],
+                    "additional_factors": factor_combinations[k],
+                    "total_cost": {level: float(total_cost[level][i, j, k]) for level in ("min", "max", "avg")},
+                    "d_total_d_labor_multiplier": float(sensitivity["labor_multiplier"][i, j, k]),
+                    "d_total_d_material_multiplier": float(sensitivity["material_multiplier"][i, j, k])
+                })
+            ranking.sort(key=lambda x: x["total_cost"]["avg"])
+            
+            return {
+                "region": region,
+                "area_squares": area_squares,
+                "labor_multiplier": labor_multiplier,
+                "material_multiplier": material_multiplier,
+                "materials": materials,
+                "qualities": qualities,
+                "factor_combinations": factor_combinations,
+                "matrix": {
+                    "total_cost": {level: values.tolist() for level, values in total_cost.items()},
+                    "material_cost": quote["material_avg"].tolist(),
+                    "labor_cost": quote["labor_avg"].tolist(),
+                    "additional_cost": quote["additional"].tolist()
+                },
+                "sensitivity": {name: values.tolist() for name, values in sensitivity.items()},
+                "ranking": ranking
+            }
+        except Exception as e:
+            logger.error(f"Error running what-if analysis: {e}")
+            return {
+                "region": project_details.get("region", self.default_region),
+                "ranking": [],
+                "error": str(e)
+            }
+    
+    async def estimate_costs_batch(
+        self,
+        projects: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Estimate material, labor and additional costs for many projects at once.
+        
+        Per-project rate lookups are gathered into columns and priced in a single
+        call to the shared pricing engine.
+        
+        Args:
+            projects: List of project details dictionaries (material_type, quality,
+                area_squares, region, additional_factors and the additional cost flags).
+        
+        Returns:
+            List of cost breakdowns, in the same order as the input projects.
+        """
+        columns = np.zeros((8, len(projects)))
+        regions = {}
+        resolved = []
+        itemized = []
+        
+        for i, project in enumerate(projects):
+            material_type = project.get("material_type", "asphalt_shingle")
+            if material_type not in self.material_types:
+                logger.warning(f"Unknown material type: {material_type}, using asphalt_shingle")
+                material_type = "asphalt_shingle"
+            quality = project.get("quality", "standard")
+            if quality not in ["economy", "standard", "premium"]:
+                logger.warning(f"Unknown quality: {quality}, using standard")
+                quality = "standard"
+            
+            region = project.get("region", self.default_region)
+            if region not in regions:
+                regions[region] = await self._get_regional_rates(region)
+            
+            factors_multiplier = 1.0
+            for factor, value in project.get("additional_factors", {}).items():
+                if factor in self.additional_factors and value in self.additional_factors[factor]:
+                    factors_multiplier *= self.additional_factors[factor][value]
+            
+            area_squares = float(project.get("area_squares", 0))
+            fixed_additional = await self._calculate_additional_costs(
+                0.0,
+                {**project, "area_squares": area_squares, "permits_required": False}
+            )
+            resolved.append((material_type, quality, region))
+            itemized.append(fixed_additional["itemized"])
+            
+            cost_range = self.material_types[material_type]["cost_per_square"][quality]
+            labor_range = self.labor_rates[self.material_types[material_type]["installation_difficulty"]]
+            columns[:, i] = (
+                cost_range["min"], cost_range["max"],
+                labor_range["min"], labor_range["max"],
+                area_squares,
+                regions[region]["material_multiplier"],
+                regions[region]["labor_multiplier"] * factors_multiplier,
+                fixed_additional["total"]
+            )
+        
+        permit_rates = np.array([0.03 if p.get("permits_required", False) else 0.0 for p in projects])
+        quote = pricing_engine.price_batch(
+            material_min=columns[0],
+            material_max=columns[1],
+            labor_min=columns[2],
+            labor_max=columns[3],
+            area=columns[4],
+            material_multiplier=columns[5],
+            labor_multiplier=columns[6],
+            fixed_extras=columns[7],
+            percent_extras=permit_rates
+        )
+        
+        estimates = []
+        for i in range(len(projects)):
+            additional = dict(itemized[i])
+            if permit_rates[i]:
+                additional["permits"] = float(permit_rates[i] * (quote["material_avg"][i] + quote["labor_avg"][i]))
+            material_type, quality, region = resolved[i]
+            estimates.append({
+                "material_type": material_type,
+                "quality": quality,
+                "region": region,
+                "area_squares": float(columns[4, i]),
+                "material_cost": {level: float(quote[f"material_{level}"][i]) for level in ("min", "max", "avg")},
+                "labor_cost": {level: float(quote[f"labor_{level}"][i]) for level in ("min", "max", "avg")},
+                "additional_costs": {
+                    "itemized": additional,
+                    "total": float(quote["additional"][i])
+                },
+                "total_cost": {level: float(quote[f"total_{level}"][i]) for level in ("min", "max", "avg")}
+            })
+        
+        return estimates
+
+    @memoize_estimate()
     async def estimate_cost(
         self,
         project_details: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
-        Estimate 
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+        Estimate material, labor and additional costs for a roofing project.
+        
+        Totals are priced by the shared pricing engine with the same terms as
+        estimate_costs_batch and what_if_analysis, so a project gets the same
+        estimate from all three.
+        
+        Args:
+            project_details: Dictionary of project details (material_type, quality,
+                area_squares, region, additional_factors and the additional cost flags).
+        
+        Returns:
+            Dictionary with the material, labor, additional and total costs.
+        """
+        try:
+            area_squares = float(project_details.get("area_squares", 0))
+            region = project_details.get("region", self.default_region)
+            
+            material = await self._calculate_material_cost(
+                project_details.get("material_type", "asphalt_shingle"),
+                project_details.get("quality", "standard"),
+                area_squares,
+                region
+            )
+            labor = await self._calculate_labor_cost(
+                material["material_type"],
+                area_squares,
+                region,
+                project_details.get("additional_factors", {})
+            )
+            
+            # Additional costs only depend on the base cost through permits
+            fixed_additional = await self._calculate_additional_costs(
+                0.0,
+                {**project_details, "area_squares": area_squares, "permits_required": False}
+            )
+            permit_rate = 0.03 if project_details.get("permits_required", False) else 0.0
+            
+            regional_rates = await self._get_regional_rates(region)
+            quote = await price_agent_project(
+                self.material_types[material["material_type"]]["cost_per_square"][material["quality"]],
+                self.labor_rates[labor["difficulty"]],
+                area_squares,
+                material_multiplier=regional_rates["material_multiplier"],
+                labor_multiplier=regional_rates["labor_multiplier"],
+                factors_multiplier=labor["factors_multiplier"],
+                fixed_extras=fixed_additional["total"],
+                permit_rate=permit_rate
+            )
+            
+            itemized = dict(fixed_additional["itemized"])
+            if permit_rate:
+                itemized["permits"] = permit_rate * (quote.material_avg + quote.labor_avg)
+            
+            return {
+                "material_type": material["material_type"],
+                "quality": material["quality"],
+                "region": region,
+                "area_squares": area_squares,
+                "material_cost": {
+                    "min": quote.material_min,
+                    "max": quote.material_max,
+                    "avg": quote.material_avg,
+                    "per_square": material["cost_per_square"]
+                },
+                "labor_cost": {
+                    "min": quote.labor_min,
+                    "max": quote.labor_max,
+                    "avg": quote.labor_avg,
+                    "per_square": labor["cost_per_square"],
+                    "difficulty": labor["difficulty"],
+                    "factors_multiplier": labor["factors_multiplier"]
+                },
+                "additional_costs": {
+                    "itemized": itemized,
+                    "total": quote.additional
+                },
+                "total_cost": {
+                    "min": quote.total_min,
+                    "max": quote.total_max,
+                    "avg": quote.total_avg
+                }
+            }
+        except Exception as e:
+            logger.error(f"Error estimating cost: {e}")
+            return {
+                "region": project_details.get("region", self.default_region),
+                "error": str(e)
+            }
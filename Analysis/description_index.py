@@ -0,0 +1,186 @@
+import re
+import zlib
+import logging
+from array import array
+from typing import Dict, List, Optional, Any
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """
+    Split text into overlapping word n-grams.
+
+    Case, punctuation and spacing are ignored, so lightly edited copies share most
+    of their shingles. Text shorter than size words becomes a single shingle.
+
+    Args:
+        text: Text to split.
+        size: Words per shingle.
+
+    Returns:
+        List of distinct shingles.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return list(dict.fromkeys(" ".join(words[i:i + size]) for i in range(len(words) - size + 1)))
+
+class DescriptionIndex:
+    """
+    MinHash signatures with locality-sensitive hashing for near-duplicate claim narratives.
+
+    Each description is reduced to a fixed-size MinHash signature whose matching
+    positions estimate the Jaccard similarity of the shingle sets. The signature is
+    cut into bands, and each band is an exact-match bucket key, so a lookup only
+    compares signatures that share a bucket with the query. With 16 bands of 8 rows,
+    pairs above about 0.7 similarity are almost always found.
+
+    The LLM vagueness rating of a description can be stored with it, so a near-copy
+    of an already rated description reuses the rating.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, threshold: float = 0.7, seed: int = 1):
+        """
+        Initialize the description index.
+
+        Args:
+            num_perm: Number of hash functions (signature length).
+            bands: Number of LSH bands; num_perm must be divisible by it.
+            threshold: Smallest estimated Jaccard similarity reported as a match.
+            seed: Seed for the hash function coefficients.
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, array]] = [{} for _ in range(bands)]
+
+        # Per-description columns, indexed by row
+        self.signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._count = 0
+        self.claim_ids: List[Any] = []
+        self.claimants: List[Any] = []
+        self.ratings: List[Optional[Dict[str, Any]]] = []
+        self._rows: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return self._count
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Text to sign.
+
+        Returns:
+            Array (num_perm,) of uint32, or None if the text has no words.
+        """
+        tokens = shingles(text)
+        if not tokens:
+            return None
+        hashes = np.array([zlib.crc32(token.encode("utf-8")) for token in tokens], dtype=np.uint64)
+        # a * h + b stays below 2**63 because a, b < 2**31 and h < 2**32
+        permuted = (self._a[:, None] * hashes[None, :] + self._b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """Split a signature into its band bucket keys."""
+        return [band.tobytes() for band in signature.reshape(self.bands, self.rows_per_band)]
+
+    def add(
+        self,
+        text: str,
+        claim_id: Any,
+        claimant: Any = None,
+        rating: Optional[Dict[str, Any]] = None,
+        signature: Optional[np.ndarray] = None
+    ) -> Optional[int]:
+        """
+        Add a description. A claim already indexed only has its rating updated.
+
+        Args:
+            text: Claim description.
+            claim_id: Claim the description belongs to.
+            claimant: Claimant who filed the claim.
+            rating: LLM vagueness rating ({'rating', 'explanation'}) to reuse for near-copies.
+            signature: Precomputed signature of the text, if available.
+
+        Returns:
+            Row of the description, or None if the text has no words.
+        """
+        if claim_id in self._rows:
+            row = self._rows[claim_id]
+            if rating is not None:
+                self.ratings[row] = rating
+            return row
+        signature = self.signature(text) if signature is None else signature
+        if signature is None:
+            return None
+
+        row = self._count
+        if row == len(self.signatures):
+            # Grow the signature matrix geometrically to keep appends amortized O(1)
+            grown = np.zeros((max(64, 2 * row), self.num_perm), dtype=np.uint32)
+            grown[:row] = self.signatures[:row]
+            self.signatures = grown
+        self.signatures[row] = signature
+        self._count += 1
+        self.claim_ids.append(claim_id)
+        self.claimants.append(claimant)
+        self.ratings.append(rating)
+        if claim_id is not None:
+            self._rows[claim_id] = row
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(key, array("q")).append(row)
+        return row
+
+    def query(self, text: str, signature: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Find indexed descriptions similar to a text.
+
+        Args:
+            text: Text to look up.
+            signature: Precomputed signature of the text, if available.
+
+        Returns:
+            Matches with estimated similarity of at least the threshold, most similar
+            first, each with claim ID, claimant, similarity and stored rating.
+        """
+        signature = self.signature(text) if signature is None else signature
+        if signature is None or not self._count:
+            return []
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            rows = bucket.get(key)
+            if rows:
+                candidates.update(rows)
+        if not candidates:
+            return []
+
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self.signatures[rows] == signature).mean(axis=1)
+        keep = similarity >= self.threshold
+        order = np.argsort(-similarity[keep], kind="stable")
+        return [
+            {
+                "claim_id": self.claim_ids[row],
+                "claimant": self.claimants[row],
+                "similarity": float(score),
+                "rating": self.ratings[row]
+            }
+            for row, score in zip(rows[keep][order], similarity[keep][order])
+        ]
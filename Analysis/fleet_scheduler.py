@@ -0,0 +1,405 @@
+import time
+import logging
+from typing import Dict, List, Optional, Any, Tuple
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FleetScheduler:
+    """
+    Assigns start days and crews to many projects sharing a crew and equipment fleet.
+
+    Each project needs one crew of at least its crew size for a run of consecutive
+    days, plus one unit of each piece of equipment it lists on every one of those
+    days. A project takes its crew's whole day unless it gives its daily hours, so
+    short jobs can share a crew-day up to the crew's hours per day. The objective is the total priority-weighted window suitability of the
+    scheduled projects. A greedy construction is improved by local search
+    (relocation and ejection moves); on request, small instances are solved exactly
+    by branch and bound.
+    """
+
+    def __init__(
+        self,
+        crews: List[Dict[str, Any]],
+        equipment: Dict[str, int],
+        horizon_days: int,
+        hours_per_day: float = 8.0,
+        time_limit: float = 0.5,
+        exact_max_projects: int = 6,
+        exact_node_limit: int = 20000
+    ):
+        """
+        Initialize the fleet scheduler.
+
+        Args:
+            crews: List of crews, each with 'crew_id', 'size' (number of crew members) and
+                optional 'hours_per_day'.
+            equipment: Number of units available per equipment type.
+            horizon_days: Number of days in the planning horizon.
+            hours_per_day: Working hours of crews that do not give their own.
+            time_limit: Local search time budget in seconds.
+            exact_max_projects: Largest number of movable projects solved exactly when exact
+                solving is requested. The search grows exponentially; past about six
+                projects it usually runs out of nodes before proving optimality.
+            exact_node_limit: Branch-and-bound node budget before falling back to the best plan found.
+        """
+        self.crew_ids = [crew["crew_id"] for crew in crews]
+        self.crew_sizes = np.array([crew["size"] for crew in crews], dtype=int)
+        self.crew_hours = np.array([crew.get("hours_per_day", hours_per_day) for crew in crews], dtype=float)
+        self.equipment_types = list(equipment)
+        self.equipment_capacity = np.array([equipment[name] for name in self.equipment_types], dtype=int)
+        self.horizon_days = horizon_days
+        self.time_limit = time_limit
+        self.exact_max_projects = exact_max_projects
+        self.exact_node_limit = exact_node_limit
+
+        # Crews from smallest to largest, so the best-fitting free crew is found first
+        self._crew_order = np.argsort(self.crew_sizes, kind="stable")
+
+    def _reset(self, projects: List[Dict[str, Any]], start_values: np.ndarray):
+        """
+        Set up the solver state for a set of projects.
+
+        Args:
+            projects: List of projects with 'duration_days', 'crew_size', 'equipment' and optional
+                'daily_hours' and 'priority'.
+            start_values: Array (projects, horizon_days) of window scores by start day, NaN where invalid.
+        """
+        horizon = self.horizon_days
+        self.durations = np.array([project["duration_days"] for project in projects], dtype=int)
+        self.crew_needed = np.array([project["crew_size"] for project in projects], dtype=int)
+        # NaN takes the crew's whole day
+        self.daily_hours = np.array(
+            [np.nan if project.get("daily_hours") is None else project["daily_hours"] for project in projects],
+            dtype=float
+        )
+        self.equipment_needed = np.zeros((len(projects), len(self.equipment_types)), dtype=int)
+        unequipped = np.zeros(len(projects), dtype=bool)
+        for p, project in enumerate(projects):
+            for name in project.get("equipment", []):
+                if name in self.equipment_types:
+                    self.equipment_needed[p, self.equipment_types.index(name)] += 1
+                else:
+                    unequipped[p] = True
+
+        priorities = np.array([project.get("priority", 1.0) for project in projects], dtype=float)
+        values = np.asarray(start_values, dtype=float)[:, :horizon] * priorities[:, None]
+        # A window has to end inside the horizon
+        too_late = np.arange(horizon)[None, :] > (horizon - self.durations)[:, None]
+        # Equipment the fleet does not have makes a project unschedulable
+        invalid = np.isnan(values) | too_late | unequipped[:, None]
+        self.values = np.where(invalid, -np.inf, values)
+        self.best_values = np.max(self.values, axis=1, initial=-np.inf)
+
+        # Hours booked per crew-day
+        self.crew_busy = np.zeros((len(self.crew_ids), horizon), dtype=float)
+        self.equipment_usage = np.zeros((len(self.equipment_types), horizon), dtype=int)
+        self.starts = np.full(len(projects), -1)
+        self.crews = np.full(len(projects), -1)
+        self.movable = np.ones(len(projects), dtype=bool)
+
+    def _crew_load(self, p: int) -> np.ndarray:
+        """Hours a day project p takes from each crew."""
+        return np.where(np.isnan(self.daily_hours[p]), self.crew_hours, self.daily_hours[p])
+
+    def _place(self, p: int, start: int, crew: int):
+        """Assign project p to a crew and start day, reserving its resources."""
+        end = start + self.durations[p]
+        self.crew_busy[crew, start:end] += self._crew_load(p)[crew]
+        self.equipment_usage[:, start:end] += self.equipment_needed[p][:, None]
+        self.starts[p] = start
+        self.crews[p] = crew
+
+    def _remove(self, p: int) -> Tuple[int, int]:
+        """Unassign project p, releasing its resources. Returns its previous (start, crew)."""
+        start, crew = int(self.starts[p]), int(self.crews[p])
+        end = start + self.durations[p]
+        self.crew_busy[crew, start:end] -= self._crew_load(p)[crew]
+        self.equipment_usage[:, start:end] -= self.equipment_needed[p][:, None]
+        self.starts[p] = -1
+        self.crews[p] = -1
+        return start, crew
+
+    def _free_crews(self, p: int) -> np.ndarray:
+        """
+        Get the crews able to take project p at every start day.
+
+        Args:
+            p: Project index.
+
+        Returns:
+            Boolean array (crews, horizon_days) in best-fit crew order; False where
+            the crew is too small, lacks the hours, or equipment is short.
+        """
+        horizon = self.horizon_days
+        duration = self.durations[p]
+        free = np.zeros((len(self.crew_ids), horizon), dtype=bool)
+        if duration > horizon:
+            return free
+
+        # Prefix sums over overbooked days give every window's conflicts in O(horizon)
+        adequate = self.crew_sizes[self._crew_order] >= self.crew_needed[p]
+        crews = self._crew_order[adequate]
+        overbooked = self.crew_busy[crews] + self._crew_load(p)[crews, None] > self.crew_hours[crews, None] + 1e-9
+        busy = np.concatenate([np.zeros((len(crews), 1), dtype=int), np.cumsum(overbooked, axis=1)], axis=1)
+        crew_ok = (busy[:, duration:] - busy[:, :-duration]) == 0
+
+        needed = self.equipment_needed[p]
+        short = (self.equipment_usage + needed[:, None]) > self.equipment_capacity[:, None]
+        short = np.concatenate([np.zeros((len(needed), 1), dtype=int), np.cumsum(short, axis=1)], axis=1)
+        equipment_ok = np.all((short[:, duration:] - short[:, :-duration]) == 0, axis=0)
+
+        free[adequate, :horizon - duration + 1] = crew_ok & equipment_ok
+        return free
+
+    def _best_insertion(self, p: int) -> Optional[Tuple[int, int, float]]:
+        """
+        Find the best feasible start day and crew for project p.
+
+        Args:
+            p: Project index.
+
+        Returns:
+            (start, crew, value), or None if the project cannot be placed.
+        """
+        free = self._free_crews(p)
+        feasible = free.any(axis=0) & np.isfinite(self.values[p])
+        if not feasible.any():
+            return None
+
+        # Highest value, earliest start on ties
+        start = int(np.argmax(np.where(feasible, self.values[p], -np.inf)))
+        crew = int(self._crew_order[np.argmax(free[:, start])])
+        return start, crew, float(self.values[p, start])
+
+    def _value(self, p: int) -> float:
+        """Current value of project p (0 when unscheduled)."""
+        return float(self.values[p, self.starts[p]]) if self.starts[p] >= 0 else 0.0
+
+    def _keep_current(self, projects: List[Dict[str, Any]], current: Dict[Any, Dict[str, Any]]):
+        """
+        Seed the plan with existing assignments.
+
+        Pinned projects keep their assignment unconditionally. Movable projects keep
+        theirs as a starting point when it is still valid, so local search only moves
+        them for a real improvement.
+
+        Args:
+            projects: List of projects being solved.
+            current: Existing assignments by project ID, each with 'start_day' and 'crew_id'.
+        """
+        crew_index = {crew_id: c for c, crew_id in enumerate(self.crew_ids)}
+        # Pinned projects first, so movable ones are checked against them
+        for p in np.argsort(self.movable, kind="stable"):
+            assignment = current.get(projects[p]["project_id"])
+            if assignment is None or assignment.get("crew_id") not in crew_index:
+                continue
+            start, crew = int(assignment["start_day"]), crew_index[assignment["crew_id"]]
+            if not (0 <= start < self.horizon_days) or not np.isfinite(self.values[p, start]):
+                # The assignment no longer fits the horizon or its window; let it be re-placed
+                self.movable[p] = True
+                continue
+            if self.movable[p] and not self._free_crews(p)[np.flatnonzero(self._crew_order == crew)[0], start]:
+                continue
+            self._place(p, start, crew)
+
+    def _greedy(self):
+        """Insert unscheduled movable projects one at a time, most valuable first."""
+        for p in np.argsort(-self.best_values, kind="stable"):
+            if not np.isfinite(self.best_values[p]) or not self.movable[p] or self.starts[p] >= 0:
+                continue
+            insertion = self._best_insertion(p)
+            if insertion is not None:
+                self._place(p, insertion[0], insertion[1])
+
+    def _local_search(self, deadline: float, min_improvement: float = 0.0, eps: float = 1e-9):
+        """
+        Improve the current plan until no move helps or the deadline passes.
+
+        Relocation moves take each scheduled project out and put it back at its best
+        feasible position. Ejection moves make room for an unscheduled project by
+        displacing one lower-valued project, which is then reinserted if possible.
+        Only movable projects are touched.
+
+        Args:
+            deadline: perf_counter time at which to stop.
+            min_improvement: Smallest gain for which a scheduled project is relocated.
+            eps: Tolerance for comparing values.
+        """
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+
+            for p in np.flatnonzero((self.starts >= 0) & self.movable):
+                if time.perf_counter() >= deadline:
+                    return
+                old_value = self._value(p)
+                old_start, old_crew = self._remove(p)
+                insertion = self._best_insertion(p)
+                if insertion is not None and insertion[2] > old_value + max(min_improvement, eps):
+                    self._place(p, insertion[0], insertion[1])
+                    improved = True
+                else:
+                    self._place(p, old_start, old_crew)
+
+            for u in np.flatnonzero((self.starts < 0) & self.movable & np.isfinite(self.best_values)):
+                if time.perf_counter() >= deadline:
+                    return
+                insertion = self._best_insertion(u)
+                if insertion is not None:
+                    self._place(u, insertion[0], insertion[1])
+                    improved = True
+                    continue
+
+                # Only projects worth less than u's best window can be worth ejecting
+                scheduled = np.flatnonzero((self.starts >= 0) & self.movable)
+                candidates = [q for q in scheduled if self._value(q) < self.best_values[u] - eps]
+                candidates.sort(key=self._value)
+                for q in candidates:
+                    if time.perf_counter() >= deadline:
+                        return
+                    old_value = self._value(q)
+                    old_start, old_crew = self._remove(q)
+                    insertion = self._best_insertion(u)
+                    if insertion is None or insertion[2] <= old_value + eps:
+                        self._place(q, old_start, old_crew)
+                        continue
+                    self._place(u, insertion[0], insertion[1])
+                    reinsertion = self._best_insertion(q)
+                    if reinsertion is not None:
+                        self._place(q, reinsertion[0], reinsertion[1])
+                    improved = True
+                    break
+
+    def _branch_and_bound(self) -> bool:
+        """
+        Solve the current instance exactly, starting from the current plan as incumbent.
+
+        Pinned projects stay where they are; only movable projects are searched.
+
+        Returns:
+            True if the search finished within the node budget, so the plan is optimal.
+        """
+        order = [
+            int(p) for p in np.argsort(-self.best_values, kind="stable")
+            if np.isfinite(self.best_values[p]) and self.movable[p]
+        ]
+        # Optimistic bound for the projects from position i on, ignoring capacity
+        remaining_bound = np.concatenate([np.cumsum(self.best_values[order][::-1])[::-1], [0.0]])
+
+        best = {
+            "value": sum(self._value(p) for p in range(len(self.starts))),
+            "starts": self.starts.copy(),
+            "crews": self.crews.copy()
+        }
+        nodes = 0
+
+        def search(i: int, value: float) -> bool:
+            nonlocal nodes
+            nodes += 1
+            if nodes > self.exact_node_limit:
+                return False
+            if value > best["value"] + 1e-9:
+                best.update(value=value, starts=self.starts.copy(), crews=self.crews.copy())
+            if i == len(order) or value + remaining_bound[i] <= best["value"] + 1e-9:
+                return True
+
+            p = order[i]
+            free = self._free_crews(p)
+            feasible = free.any(axis=0) & np.isfinite(self.values[p])
+            for start in np.flatnonzero(feasible)[np.argsort(-self.values[p][feasible], kind="stable")]:
+                for rank in np.flatnonzero(free[:, start]):
+                    crew = int(self._crew_order[rank])
+                    self._place(p, int(start), crew)
+                    finished = search(i + 1, value + float(self.values[p, start]))
+                    self._remove(p)
+                    if not finished:
+                        return False
+            return search(i + 1, value)
+
+        # Search from an empty plan; the incumbent already holds the heuristic result
+        for p in np.flatnonzero((self.starts >= 0) & self.movable):
+            self._remove(p)
+        pinned_value = sum(self._value(p) for p in range(len(self.starts)))
+        complete = search(0, pinned_value)
+
+        for p in np.flatnonzero(self.movable):
+            if best["starts"][p] >= 0:
+                self._place(p, int(best["starts"][p]), int(best["crews"][p]))
+        return complete
+
+    def solve(
+        self,
+        projects: List[Dict[str, Any]],
+        start_values: np.ndarray,
+        exact: bool = False,
+        current: Optional[Dict[Any, Dict[str, Any]]] = None,
+        movable: Optional[List[Any]] = None,
+        min_improvement: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Build a fleet plan.
+
+        Args:
+            projects: List of projects, each with 'project_id', 'duration_days', 'crew_size',
+                'equipment' (list of equipment types) and optional 'daily_hours' (crew hours
+                a day, the whole day if missing) and 'priority' weight.
+            start_values: Array (projects, horizon_days) of window suitability by start day,
+                NaN where the project cannot start.
+            exact: Solve exactly by branch and bound once local search is done. Only
+                instances with at most exact_max_projects movable projects are searched;
+                larger ones keep the local search plan.
+            current: Existing assignments by project ID, each with 'start_day' and 'crew_id',
+                used as the starting plan.
+            movable: IDs of the projects that may be re-planned. None allows all; the
+                others keep their current assignment (or stay unscheduled).
+            min_improvement: Smallest score gain for which an already assigned project is
+                moved, to avoid churning the plan over negligible differences.
+
+        Returns:
+            Dictionary with the assignments, unscheduled project IDs, objective value and
+            solver details.
+        """
+        started = time.perf_counter()
+        self._reset(projects, start_values)
+        if movable is not None:
+            movable = set(movable)
+            self.movable = np.array([project["project_id"] in movable for project in projects], dtype=bool)
+        if current:
+            self._keep_current(projects, current)
+
+        self._greedy()
+        self._local_search(started + self.time_limit, min_improvement=min_improvement)
+
+        if exact and int(self.movable.sum()) > self.exact_max_projects:
+            logger.info(
+                f"{int(self.movable.sum())} movable projects exceed the exact solving limit "
+                f"of {self.exact_max_projects}; keeping the local search plan"
+            )
+            exact = False
+        optimal = self._branch_and_bound() if exact else False
+
+        assignments = []
+        for p in np.flatnonzero(self.starts >= 0):
+            assignments.append({
+                "project_id": projects[p]["project_id"],
+                "crew_id": self.crew_ids[self.crews[p]],
+                "start_day": int(self.starts[p]),
+                "end_day": int(self.starts[p] + self.durations[p]),
+                "score": self._value(p)
+            })
+        assignments.sort(key=lambda x: (x["start_day"], str(x["crew_id"])))
+
+        return {
+            "assignments": assignments,
+            "unscheduled": [projects[p]["project_id"] for p in np.flatnonzero(self.starts < 0)],
+            "objective": float(sum(a["score"] for a in assignments)),
+            "solver": "branch_and_bound" if exact else "greedy_local_search",
+            "optimal": optimal,
+            "elapsed_ms": (time.perf_counter() - started) * 1000
+        }
@@ -0,0 +1,553 @@
+import os
+import re
+import json
+import time
+import asyncio
+import sqlite3
+import logging
+import datetime
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, List, Optional, Any, Callable, Awaitable
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def encode_geohash(latitude: float, longitude: float, precision: int = 5) -> str:
+    """
+    Encode a coordinate as a geohash.
+
+    Args:
+        latitude: Latitude in degrees.
+        longitude: Longitude in degrees.
+        precision: Number of geohash characters (5 is roughly a 5 km cell).
+
+    Returns:
+        Geohash string.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(geohash) < precision:
+        value, value_range = (longitude, lon_range) if even else (latitude, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(geohash)
+
+def location_bucket(location: Any, geohash_precision: int = 5) -> str:
+    """
+    Get the forecast bucket for a location.
+
+    Args:
+        location: (lat, lon) pair, 'lat,lon' string, ZIP code, or place name.
+        geohash_precision: Geohash length used to bucket coordinates.
+
+    Returns:
+        Bucket key string: a geohash cell, a 5-digit ZIP code, or the normalized place name.
+    """
+    if isinstance(location, (tuple, list)) and len(location) == 2:
+        return "gh:" + encode_geohash(float(location[0]), float(location[1]), geohash_precision)
+
+    text = str(location).strip()
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)", text)
+    if match:
+        return "gh:" + encode_geohash(float(match.group(1)), float(match.group(2)), geohash_precision)
+
+    match = re.fullmatch(r"(\d{5})(?:-\d{4})?", text)
+    if match:
+        return "zip:" + match.group(1)
+
+    return "q:" + re.sub(r"\s+", " ", text.lower())
+
+class ForecastStore:
+    """Base class for shared forecast cache backing stores."""
+
+    async def get(self, bucket: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached forecast entry for a bucket.
+
+        Args:
+            bucket: Forecast bucket key.
+
+        Returns:
+            Cached entry, or None if missing or expired.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    async def set(self, bucket: str, entry: Dict[str, Any], ttl_seconds: int):
+        """
+        Store the forecast entry for a bucket.
+
+        Args:
+            bucket: Forecast bucket key.
+            entry: Forecast entry to store.
+            ttl_seconds: Time to live in seconds.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+class RedisForecastStore(ForecastStore):
+    """Redis backing store, shared by every scheduler process."""
+
+    def __init__(self, url: str, key_prefix: str = "forecast:"):
+        """
+        Initialize the Redis store.
+
+        Args:
+            url: Redis URL.
+            key_prefix: Prefix for forecast keys.
+        """
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise ImportError("redis package is required for RedisForecastStore. Install with 'pip install redis'.")
+
+        self.client = aioredis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+
+    async def get(self, bucket: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = await self.client.get(self.key_prefix + bucket)
+            return json.loads(value) if value else None
+        except Exception as e:
+            logger.warning(f"Redis forecast cache get error: {e}")
+            return None
+
+    async def set(self, bucket: str, entry: Dict[str, Any], ttl_seconds: int):
+        try:
+            await self.client.setex(self.key_prefix + bucket, ttl_seconds, json.dumps(entry))
+        except Exception as e:
+            logger.warning(f"Redis forecast cache set error: {e}")
+
+class SQLiteForecastStore(ForecastStore):
+    """
+    SQLite backing store, shared by processes on one host.
+
+    Reads and writes run in worker threads, so each one opens its own connection
+    and closes it when done; the connection's own context manager only commits.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the SQLite store.
+
+        Args:
+            path: Path to the SQLite database file.
+        """
+        self.path = path
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS forecast_cache "
+                "(bucket TEXT PRIMARY KEY, entry TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _get(self, bucket: str) -> Optional[Dict[str, Any]]:
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            row = conn.execute(
+                "SELECT entry FROM forecast_cache WHERE bucket = ? AND expires_at > ?",
+                (bucket, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, bucket: str, entry: Dict[str, Any], ttl_seconds: int):
+        with closing(sqlite3.connect(self.path)) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO forecast_cache (bucket, entry, expires_at) VALUES (?, ?, ?)",
+                (bucket, json.dumps(entry), time.time() + ttl_seconds)
+            )
+
+    async def get(self, bucket: str) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.to_thread(self._get, bucket)
+        except Exception as e:
+            logger.warning(f"SQLite forecast cache get error: {e}")
+            return None
+
+    async def set(self, bucket: str, entry: Dict[str, Any], ttl_seconds: int):
+        try:
+            await asyncio.to_thread(self._set, bucket, entry, ttl_seconds)
+        except Exception as e:
+            logger.warning(f"SQLite forecast cache set error: {e}")
+
+class ForecastCache:
+    """
+    Two-tier weather forecast cache keyed by location bucket and forecast day.
+
+    Nearby locations share a bucket (geohash cell for coordinates, ZIP code, or
+    normalized place name), so repeated scheduling for the same area reuses one
+    provider call. An in-process LRU sits in front of an optional shared store,
+    and concurrent misses for the same bucket collapse into a single fetch.
+    """
+
+    def __init__(
+        self,
+        store: Optional[ForecastStore] = None,
+        ttl_seconds: int = 3 * 3600,
+        max_buckets: int = 4096,
+        geohash_precision: int = 5
+    ):
+        """
+        Initialize the forecast cache.
+
+        Args:
+            store: Optional shared backing store (Redis or SQLite).
+            ttl_seconds: Entry lifetime. Defaults to the provider's 3-hour forecast update cadence.
+            max_buckets: Maximum number of buckets kept in process.
+            geohash_precision: Geohash length used to bucket coordinates.
+        """
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.max_buckets = max_buckets
+        self.geohash_precision = geohash_precision
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {"memory_hits": 0, "store_hits": 0, "fetches": 0, "coalesced": 0}
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "ForecastCache":
+        """
+        Create a forecast cache using the backing store named by FORECAST_CACHE_URL.
+
+        Supports 'redis://...' and 'sqlite:///path/to/file.db'; anything else
+        gives an in-process cache only.
+
+        Returns:
+            ForecastCache instance.
+        """
+        url = os.environ.get("FORECAST_CACHE_URL", "")
+        store = None
+        if url.startswith(("redis://", "rediss://")):
+            store = RedisForecastStore(url)
+        elif url.startswith("sqlite:///"):
+            store = SQLiteForecastStore(url[len("sqlite:///"):])
+        return cls(store=store, **kwargs)
+
+    def bucket_for(self, location: Any) -> str:
+        """
+        Get the cache bucket for a location.
+
+        Args:
+            location: (lat, lon) pair, 'lat,lon' string, ZIP code, or place name.
+
+        Returns:
+            Bucket key string.
+        """
+        return location_bucket(location, self.geohash_precision)
+
+    def _select(self, entry: Optional[Dict[str, Any]], days: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Get the requested forecast days from an entry, if it is fresh and covers them.
+
+        Args:
+            entry: Cached entry with fetched_at, exhausted and per-day forecasts.
+            days: Number of days requested, starting today.
+
+        Returns:
+            List of daily forecasts, or None on a miss.
+        """
+        if not entry or time.time() - entry["fetched_at"] >= self.ttl_seconds:
+            return None
+
+        today = datetime.date.today()
+        dates = [(today + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+        forecast = [entry["days"][date] for date in dates if date in entry["days"]]
+
+        # A provider that returned fewer days than asked for cannot do better on a refetch
+        if len(forecast) < days and not entry.get("exhausted"):
+            return None
+        return forecast
+
+    def _remember(self, bucket: str, entry: Dict[str, Any]):
+        """Put an entry in the in-process tier, evicting the least recently used bucket."""
+        self._entries[bucket] = entry
+        self._entries.move_to_end(bucket)
+        while len(self._entries) > self.max_buckets:
+            self._entries.popitem(last=False)
+
+    async def get_forecast(
+        self,
+        location: Any,
+        days: int,
+        fetch: Callable[[Any, int], Awaitable[List[Dict[str, Any]]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Get a daily forecast through the cache.
+
+        Args:
+            location: Location to forecast.
+            days: Number of days, starting today.
+            fetch: Coroutine function fetching (location, days) from the provider.
+
+        Returns:
+            List of daily weather forecasts.
+        """
+        return await self._get_through(location, days, fetch)
+
+    def _build_entry(self, fetched: List[Dict[str, Any]], days: int) -> Dict[str, Any]:
+        """Build a cache entry from a provider response."""
+        by_date = {day["date"]: day for day in fetched}
+        today = datetime.date.today()
+        dates = [(today + datetime.timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+        return {
+            "fetched_at": time.time(),
+            # Days the provider did not return will not appear on a refetch either
+            "exhausted": any(date not in by_date for date in dates),
+            "days": by_date
+        }
+
+    async def _get_through(self, location: Any, span: int, fetch: Callable[[Any, int], Awaitable[Any]]) -> Any:
+        """
+        Look a forecast up in each tier in turn, fetching it on a miss.
+
+        Args:
+            location: Location to forecast.
+            span: Forecast length requested, in the cache's own unit.
+            fetch: Coroutine function fetching (location, span) from the provider.
+
+        Returns:
+            The requested part of the cached forecast.
+        """
+        bucket = self.bucket_for(location)
+
+        forecast = self._select(self._entries.get(bucket), span)
+        if forecast is not None:
+            self._entries.move_to_end(bucket)
+            self._stats["memory_hits"] += 1
+            return forecast
+
+        # Join a fetch already running for this bucket instead of starting another
+        inflight = self._inflight.get(bucket)
+        if inflight is not None:
+            self._stats["coalesced"] += 1
+            try:
+                entry = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # Only the leading fetch was cancelled, not this lookup; look it up afresh
+                return await self._get_through(location, span, fetch)
+            forecast = self._select(entry, span)
+            if forecast is not None:
+                return forecast
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[bucket] = future
+        try:
+            entry = await self.store.get(bucket) if self.store else None
+            forecast = self._select(entry, span)
+            if forecast is not None:
+                self._stats["store_hits"] += 1
+            else:
+                self._stats["fetches"] += 1
+                entry = self._build_entry(await fetch(location, span), span)
+                if self.store:
+                    await self.store.set(bucket, entry, self.ttl_seconds)
+                forecast = self._select(entry, span)
+
+            self._remember(bucket, entry)
+            future.set_result(entry)
+            return forecast
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the exception; mark it retrieved so an unjoined fetch does not warn
+            future.exception()
+            raise
+        finally:
+            # A cancelled or interrupted leader must still release its waiters
+            if not future.done():
+                future.cancel()
+            if self._inflight.get(bucket) is future:
+                del self._inflight[bucket]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit, fetch and coalescing counts.
+        """
+        lookups = sum(self._stats.values())
+        hits = self._stats["memory_hits"] + self._stats["store_hits"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "buckets": len(self._entries),
+            "hit_rate": hits / lookups if lookups else 0.0
+        }
+
+# Weather condition vocabulary for the hourly cache; unknown conditions map to "Other"
+HOURLY_CONDITIONS = (
+    "Other", "Clear", "Clouds", "Drizzle", "Rain", "Thunderstorm", "Snow",
+    "Mist", "Fog", "Haze", "Smoke", "Dust", "Squall", "Tornado"
+)
+_CONDITION_CODES = {name: code for code, name in enumerate(HOURLY_CONDITIONS)}
+_CONDITION_NAMES = np.array(HOURLY_CONDITIONS, dtype=object)
+
+def pack_hourly(records: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Pack hourly forecast records into compact columns.
+
+    Args:
+        records: Hourly forecasts with 'time' (UTC epoch seconds), 'temp', 'wind_speed',
+            'precipitation', 'humidity' and 'weather_condition'.
+
+    Returns:
+        Dictionary of columns sorted by time: int64 time, float32 measurements,
+        uint8 humidity and uint8 weather condition codes.
+    """
+    records = sorted(records, key=lambda record: record["time"])
+    return {
+        "time": np.array([r["time"] for r in records], dtype=np.int64),
+        "temp": np.array([r["temp"] for r in records], dtype=np.float32),
+        "wind_speed": np.array([r["wind_speed"] for r in records], dtype=np.float32),
+        "precipitation": np.array([r["precipitation"] for r in records], dtype=np.float32),
+        "humidity": np.array([r["humidity"] for r in records], dtype=np.uint8),
+        "condition_code": np.array([_CONDITION_CODES.get(r["weather_condition"], 0) for r in records], dtype=np.uint8)
+    }
+
+def unpack_hourly(columns: Dict[str, np.ndarray], utc_offset: int, start: int = 0, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Expand a range of packed hourly columns for scoring.
+
+    Args:
+        columns: Columns from pack_hourly.
+        utc_offset: Offset of the location's local time from UTC in seconds.
+        start: First row to include.
+        end: Row after the last one to include.
+
+    Returns:
+        Dictionary with time and local_time (epoch seconds), float64 temp, wind_speed,
+        precipitation and humidity, and weather_condition names.
+    """
+    rows = slice(start, end)
+    return {
+        "time": columns["time"][rows],
+        "local_time": columns["time"][rows] + utc_offset,
+        "temp": columns["temp"][rows].astype(float),
+        "wind_speed": columns["wind_speed"][rows].astype(float),
+        "precipitation": columns["precipitation"][rows].astype(float),
+        "humidity": columns["humidity"][rows].astype(float),
+        "weather_condition": _CONDITION_NAMES[columns["condition_code"][rows]]
+    }
+
+class HourlyForecastCache(ForecastCache):
+    """
+    In-process hourly forecast cache with compact columnar storage.
+
+    Each bucket holds its hours as typed numpy columns (about 20 bytes per hour)
+    rather than one dict per hour, and the cache evicts least recently used
+    buckets to stay within a byte budget. Bucketing and single-flight fetching
+    work as in ForecastCache.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        max_bytes: int = 32 * 1024 * 1024,
+        geohash_precision: int = 5
+    ):
+        """
+        Initialize the hourly forecast cache.
+
+        Args:
+            ttl_seconds: Entry lifetime. Defaults to the provider's hourly update cadence.
+            max_bytes: Memory budget for cached columns.
+            geohash_precision: Geohash length used to bucket coordinates.
+        """
+        super().__init__(store=None, ttl_seconds=ttl_seconds, geohash_precision=geohash_precision)
+        self.max_bytes = max_bytes
+        self._bytes = 0
+
+    async def get_hourly(
+        self,
+        location: Any,
+        hours: int,
+        fetch: Callable[[Any, int], Awaitable[List[Dict[str, Any]]]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Get an hourly forecast through the cache.
+
+        Args:
+            location: Location to forecast.
+            hours: Number of hours, starting with the current hour.
+            fetch: Coroutine function fetching (location, hours) from the provider. Records
+                carry 'time' (UTC epoch seconds) and 'utc_offset' along with the measurements.
+
+        Returns:
+            Dictionary of hourly columns as returned by unpack_hourly.
+        """
+        return await self._get_through(location, hours, fetch)
+
+    def _build_entry(self, fetched: List[Dict[str, Any]], hours: int) -> Dict[str, Any]:
+        """Build a columnar cache entry from a provider response."""
+        return {
+            "fetched_at": time.time(),
+            "exhausted": len(fetched) < hours,
+            "utc_offset": int(fetched[0].get("utc_offset", 0)) if fetched else 0,
+            "columns": pack_hourly(fetched)
+        }
+
+    def _select(self, entry: Optional[Dict[str, Any]], hours: int) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Get the requested hours from an entry, if it is fresh and covers them.
+
+        Args:
+            entry: Cached entry with fetched_at, exhausted, utc_offset and columns.
+            hours: Number of hours requested, starting with the current hour.
+
+        Returns:
+            Dictionary of hourly columns, or None on a miss.
+        """
+        if not entry or time.time() - entry["fetched_at"] >= self.ttl_seconds:
+            return None
+
+        current_hour = int(time.time()) // 3600 * 3600
+        times = entry["columns"]["time"]
+        start = int(np.searchsorted(times, current_hour))
+        end = int(np.searchsorted(times, current_hour + hours * 3600))
+        if end - start < hours and not entry["exhausted"]:
+            return None
+        return unpack_hourly(entry["columns"], entry["utc_offset"], start, end)
+
+    def _remember(self, bucket: str, entry: Dict[str, Any]):
+        """Put an entry in the cache, evicting least recently used buckets beyond the byte budget."""
+        previous = self._entries.pop(bucket, None)
+        if previous is not None:
+            self._bytes -= previous["nbytes"]
+
+        entry["nbytes"] = sum(column.nbytes for column in entry["columns"].values())
+        self._entries[bucket] = entry
+        self._bytes += entry["nbytes"]
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["nbytes"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with hit, fetch and coalescing counts and memory use.
+        """
+        return {**super().get_stats(), "bytes": self._bytes, "max_bytes": self.max_bytes}
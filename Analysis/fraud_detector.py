@@ -1,10 +1,21 @@
 import os
+import re
 import json
 import logging
+import time
+import asyncio
 import datetime
-from typing import Dict, List, Optional, Union, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union, Any
 import requests
+import numpy as np
 from ..common.llm_provider import LLMProviderFactory
+from .claim_history import ClaimHistoryIndex, to_datetime
+from .photo_index import PhotoHashIndex, dhash, photo_paths
+from .description_index import DescriptionIndex
+from .claim_graph import ClaimGraph
+from .claim_embeddings import ClaimEmbeddingIndex, claim_text, claim_vector
 
 # Configure logging
 logging.basicConfig(
@@ -13,6 +24,150 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Trailing UTC offset of an ISO 8601 time, e.g. 'Z', '+05:30' or '-0500'
+UTC_OFFSET = re.compile(r"(Z|[+-]\d\d(:?\d\d)?)$")
+
+def _wall_time(value: str) -> str:
+    """Drop the UTC offset from an ISO 8601 string, keeping its local wall time."""
+    # Only the time part can carry an offset; '2024-01-05' ends in a day, not one
+    return value[:10] + UTC_OFFSET.sub("", value[10:])
+
+def _parse_datetime(value: str) -> datetime.datetime:
+    """
+    Parse an ISO 8601 string into a naive datetime in the claim's local wall time.
+    
+    Dates are compared as written, so an offset is dropped rather than converted;
+    the batch rules and the claim history index parse the same way.
+    """
+    return to_datetime(value)
+
+def _parse_datetimes(values: List[Any]) -> np.ndarray:
+    """
+    Parse ISO 8601 strings into a datetime64[s] array in one pass.
+    
+    Like _parse_datetime, offsets are dropped and the local wall time is kept.
+    Falls back to _parse_datetime per value when NumPy cannot parse the batch;
+    values that cannot be parsed either way become NaT.
+    
+    Args:
+        values: ISO 8601 date or datetime strings.
+    
+    Returns:
+        Array (n,) of datetime64[s].
+    """
+    try:
+        return np.array([_wall_time(value) for value in values], dtype="datetime64[s]")
+    except (ValueError, TypeError):
+        parsed = []
+        for value in values:
+            try:
+                parsed.append(np.datetime64(_parse_datetime(value), "s"))
+            except (ValueError, TypeError):
+                parsed.append(np.datetime64("NaT", "s"))
+        return np.array(parsed, dtype="datetime64[s]")
+
+def _as_float(value: Any) -> float:
+    """Convert a value to float, NaN if it is not numeric."""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+def claim_columns(claims: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Load claims into columnar arrays for batch scoring.
+    
+    Dates are int64 seconds since the epoch and amounts are float64. Missing dates
+    get the same defaults as the single-claim analyzers.
+    
+    Args:
+        claims: List of claim data dictionaries.
+    
+    Returns:
+        Dictionary of arrays (n,), one per claim attribute, plus 'dates_valid'.
+    """
+    now = datetime.datetime.now().isoformat()
+    claim_dates = [claim.get("claim_date", now) for claim in claims]
+    dates = {
+        "claim_date": claim_dates,
+        "policy_start_date": [claim.get("policy_start_date", "2000-01-01") for claim in claims],
+        "policy_end_date": [claim.get("policy_end_date", "2099-12-31") for claim in claims],
+        "incident_date": [claim.get("incident_date", claim_date) for claim, claim_date in zip(claims, claim_dates)]
+    }
+    
+    columns = {"dates_valid": np.ones(len(claims), dtype=bool)}
+    for name, values in dates.items():
+        parsed = _parse_datetimes(values).reshape(len(claims))
+        columns["dates_valid"] &= ~np.isnat(parsed)
+        columns[name] = parsed.astype(np.int64)
+    
+    assessments = [claim.get("damage_assessment") or {} for claim in claims]
+    columns.update({
+        "claimed_amount": np.array([_as_float(claim.get("claimed_amount", 0)) for claim in claims], dtype=np.float64),
+        "property_value": np.array([_as_float(claim.get("property_value", 0)) for claim in claims], dtype=np.float64),
+        "document_count": np.array([len(claim.get("documents", [])) for claim in claims], dtype=np.int64),
+        "description_length": np.array([len(claim.get("description", "")) for claim in claims], dtype=np.int64),
+        "photo_count": np.array([len(photo_paths(claim.get("documents", []))) for claim in claims], dtype=np.int64),
+        "has_assessment": np.array([bool(assessment) for assessment in assessments], dtype=bool),
+        "assessment_confidence": np.array(
+            [_as_float(assessment.get("confidence", 0)) for assessment in assessments], dtype=np.float64
+        ),
+        "has_detections": np.array([bool(assessment.get("detections")) for assessment in assessments], dtype=bool),
+        "has_cause": np.array([bool(claim.get("cause_of_damage", "")) for claim in claims], dtype=bool)
+    })
+    return columns
+
+def rule_confidences(columns: Dict[str, np.ndarray]) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Apply the timing, documentation-count and exaggeration rules to a whole batch.
+    
+    Thresholds and confidences match _analyze_claim_timing, _analyze_documentation
+    and _analyze_damage_assessment.
+    
+    Args:
+        columns: Arrays from claim_columns.
+    
+    Returns:
+        Dictionary by category, then pattern, of confidence arrays (n,); 0 where the
+        pattern is not flagged.
+    """
+    seconds_per_day = 86400
+    # Floor division matches timedelta.days for negative differences too
+    days_since_policy_start = (columns["claim_date"] - columns["policy_start_date"]) // seconds_per_day
+    days_until_policy_end = (columns["policy_end_date"] - columns["claim_date"]) // seconds_per_day
+    days_since_incident = (columns["claim_date"] - columns["incident_date"]) // seconds_per_day
+    # 1970-01-01 was a Thursday; weekday 0 is Monday as in datetime.weekday()
+    weekday = (columns["claim_date"] // seconds_per_day + 3) % 7
+    valid = columns["dates_valid"]
+    
+    recent_policy = np.clip(1 - days_since_policy_start / 30, 0, 1)
+    policy_expiration = np.clip(1 - days_until_policy_end / 30, 0, 1)
+    delayed_reporting = np.minimum(1, (days_since_incident - 30) / 60)
+    
+    claimed = columns["claimed_amount"]
+    property_value = columns["property_value"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(property_value > 0, claimed / property_value, 0.0)
+    exaggerated = (property_value > 0) & (claimed > property_value * 0.7)
+    unrelated = columns["has_assessment"] & (columns["assessment_confidence"] < 0.6)
+    
+    return {
+        "claim_timing": {
+            "recent_policy": np.where(valid & (recent_policy > 0.5), recent_policy, 0.0),
+            "policy_expiration": np.where(valid & (policy_expiration > 0.5), policy_expiration, 0.0),
+            "weekend_holiday": np.where(valid & (weekday >= 5), 0.6, 0.0),
+            "delayed_reporting": np.where(valid & (delayed_reporting > 0.5), delayed_reporting, 0.0)
+        },
+        "documentation": {
+            "incomplete": np.where(columns["document_count"] < 3, 0.7, 0.0),
+            "generic": np.where(columns["description_length"] < 100, 0.6, 0.0)
+        },
+        "damage_assessment": {
+            "exaggerated": np.where(exaggerated, np.minimum(1, (ratio - 0.7) / 0.3), 0.0),
+            "unrelated": np.where(unrelated, 0.7, 0.0)
+        }
+    }
+
 class FraudDetector:
     """
     DSPy-based agent for detecting potential fraud in insurance claims.
@@ -23,7 +178,15 @@ class FraudDetector:
         self,
         llm_provider_type: str = "openai",
         llm_model: str = "gpt-4-turbo",
-        confidence_threshold: float = 0.7
+        confidence_threshold: float = 0.7,
+        analyzer_budgets: Optional[Dict[str, float]] = None,
+        claim_history: Optional[ClaimHistoryIndex] = None,
+        photo_index: Optional[PhotoHashIndex] = None,
+        description_index: Optional[DescriptionIndex] = None,
+        claim_graph: Optional[ClaimGraph] = None,
+        embedding_index: Optional[ClaimEmbeddingIndex] = None,
+        embed_with_llm: bool = False,
+        photo_workers: int = 4
     ):
         """
         Initialize the fraud detector.
@@ -32,12 +195,56 @@ class FraudDetector:
             llm_provider_type: Type of LLM provider to use ('openai', 'anthropic', 'mistral', 'ollama').
             llm_model: Model name to use for the LLM.
             confidence_threshold: Minimum confidence score for fraud detection.
+            analyzer_budgets: Time budget in seconds per analyzer category for
+                analyze_claim_concurrently. Categories left out use the defaults.
+            claim_history: Index of past claims for the history checks. If None, an empty
+                index is created and filled as claims are analyzed.
+            photo_index: Index of claim photo hashes for near-duplicate detection. If None,
+                an empty index is created and filled as claims are analyzed.
+            description_index: MinHash index of claim descriptions for copy detection and
+                LLM rating reuse. If None, an empty index is created and filled as claims
+                are analyzed.
+            claim_graph: Graph of claims and shared entities for the ring-risk check. If
+                None, an empty graph is created; ring checks run once it holds claims.
+            embedding_index: Nearest-neighbor index of claim embeddings for anomaly
+                scoring and LLM rating reuse. If None, an empty index is created; the
+                checks run once it holds claims.
+            embed_with_llm: Embed claims with the LLM provider's embedding endpoint
+                instead of the local hashed embedding. The embedding index must have
+                been built the same way.
+            photo_workers: Threads decoding claim photos. Decoding cannot be interrupted,
+                so photos still being decoded when an analysis is cancelled keep these
+                threads busy, but never more of them.
         """
         self.llm_provider = LLMProviderFactory.create_provider(
             llm_provider_type,
             model=llm_model
         )
         self.confidence_threshold = confidence_threshold
+        self.analyzer_budgets = {
+            "claim_timing": 1.0,
+            "documentation": 15.0,
+            "damage_assessment": 15.0,
+            "history": 1.0,
+            **(analyzer_budgets or {})
+        }
+        self.analyzer_stats = {
+            category: {"calls": 0, "total_ms": 0.0, "max_ms": 0.0}
+            for category in self.analyzer_budgets
+        }
+        self.claim_history = claim_history if claim_history is not None else ClaimHistoryIndex()
+        self.photo_index = photo_index if photo_index is not None else PhotoHashIndex()
+        self.description_index = description_index if description_index is not None else DescriptionIndex()
+        self.claim_graph = claim_graph if claim_graph is not None else ClaimGraph()
+        self.embedding_index = embedding_index if embedding_index is not None else ClaimEmbeddingIndex()
+        self.embed_with_llm = embed_with_llm
+        self.photo_executor = ThreadPoolExecutor(max_workers=photo_workers, thread_name_prefix="photo-hash")
+        # Descriptions at least this similar to a rated one reuse its LLM rating
+        self.rating_reuse_similarity = 0.9
+        # Claims at least this close in embedding space to a rated one reuse its rating
+        self.embedding_reuse_similarity = 0.98
+        # Claims further from their neighbors than this share of indexed claims are atypical
+        self.atypical_percentile = 0.95
         
         # Define fraud indicators and their weights
         self.fraud_indicators = {
@@ -57,7 +264,9 @@ class FraudDetector:
                     "incomplete": "Missing or incomplete documentation",
                     "inconsistent": "Inconsistencies between different documents",
                     "altered": "Signs of document alteration or manipulation",
-                    "generic": "Generic or vague descriptions lacking specific details"
+                    "generic": "Generic or vague descriptions lacking specific details",
+                    "reused_photo": "Photos matching those on other claimants' claims",
+                    "copied": "Description copied from other claimants' claims"
                 }
             },
             "damage_assessment": {
@@ -87,7 +296,10 @@ class FraudDetector:
                     "frequent": "History of frequent claims",
                     "similar": "Multiple similar claims in the past",
                     "multiple_carriers": "Claims with multiple insurance carriers",
-                    "prior_denials": "History of denied claims"
+                    "prior_denials": "History of denied claims",
+                    "shared_contact": "Phone or address shared with other claimants",
+                    "fraud_ring": "Part of a group of claimants linked by shared contacts, accounts or photos",
+                    "atypical": "Claim unlike its nearest historical claims"
                 }
             },
             "financial": {
@@ -114,10 +326,10 @@ class FraudDetector:
         """
         try:
             # Extract relevant dates
-            claim_date = datetime.datetime.fromisoformat(claim_data.get("claim_date", datetime.datetime.now().isoformat()))
-            policy_start_date = datetime.datetime.fromisoformat(claim_data.get("policy_start_date", "2000-01-01"))
-            policy_end_date = datetime.datetime.fromisoformat(claim_data.get("policy_end_date", "2099-12-31"))
-            incident_date = datetime.datetime.fromisoformat(claim_data.get("incident_date", claim_date.isoformat()))
+            claim_date = _parse_datetime(claim_data.get("claim_date", datetime.datetime.now().isoformat()))
+            policy_start_date = _parse_datetime(claim_data.get("policy_start_date", "2000-01-01"))
+            policy_end_date = _parse_datetime(claim_data.get("policy_end_date", "2099-12-31"))
+            incident_date = _parse_datetime(claim_data.get("incident_date", claim_date.isoformat()))
             
             # Calculate time differences
             days_since_policy_start = (claim_date - policy_start_date).days
@@ -190,7 +402,8 @@ class FraudDetector:
     
     async def _analyze_documentation(self, claim_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Analyze claim documentation for suspicious patterns.
+        Analyze claim documentation for suspicious patterns and index the claim's
+        description, photos and embedding.
         
         Args:
             claim_data: Dictionary with claim data.
@@ -198,6 +411,22 @@ class FraudDetector:
         Returns:
             Dictionary with analysis results.
         """
+        result, updates = await self._check_documentation(claim_data)
+        self._apply_index_updates(updates)
+        return result
+    
+    async def _check_documentation(self, claim_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Callable[[], Any]]]:
+        """
+        Analyze claim documentation for suspicious patterns without touching the indexes.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+            
+        Returns:
+            Tuple of the analysis results and the index writes for the claim, to be
+            applied with _apply_index_updates.
+        """
+        updates = []
         try:
             # Extract relevant data
             documents = claim_data.get("documents", [])
@@ -227,8 +456,59 @@ class FraudDetector:
                 })
                 confidence_scores.append(confidence)
             
-            # Use LLM to analyze description for vagueness
-            if description:
+            # Photos reused from other claimants' claims
+            try:
+                photo_hashes = await self._hash_claim_photos(claim_data)
+                photo_patterns = self._photo_reuse_patterns(claim_data, photo_hashes, updates)
+                suspicious_patterns.extend(photo_patterns)
+                confidence_scores.extend(pattern["confidence"] for pattern in photo_patterns)
+            except Exception as e:
+                logger.error(f"Error checking photos for reuse: {e}")
+            
+            # Near-copies of other claims' descriptions
+            claim_id = claim_data.get("claim_id", claim_data.get("id"))
+            claimant = claim_data.get("claimant_id", claim_data.get("homeowner_id"))
+            signature = self.description_index.signature(description) if description else None
+            matches = [
+                match for match in self.description_index.query(description, signature)
+                if match["claim_id"] != claim_id
+            ] if signature is not None else []
+            copies = [match for match in matches if claimant is None or match["claimant"] != claimant]
+            if copies:
+                confidence = min(1, 0.5 + 0.5 * copies[0]["similarity"])
+                suspicious_patterns.append({
+                    "pattern": "copied",
+                    "description": (
+                        f"Description is {copies[0]['similarity']:.0%} similar to claim {copies[0]['claim_id']} "
+                        f"({len(copies)} similar claims from other claimants)"
+                    ),
+                    "confidence": confidence
+                })
+                confidence_scores.append(confidence)
+            
+            # A near-copy of an already rated description reuses its rating
+            vagueness = next(
+                (
+                    match["rating"] for match in matches
+                    if match["rating"] is not None and match["similarity"] >= self.rating_reuse_similarity
+                ),
+                None
+            )
+            
+            # Failing that, a claim nearly identical in embedding space reuses its rating
+            vector = None
+            if description and vagueness is None and not copies and len(self.embedding_index):
+                try:
+                    vector = await self._claim_embedding(claim_data)
+                    nearest = self.embedding_index.neighbors(vector, [claim_id])[0]
+                    if (nearest["nearest_rating"] is not None
+                            and nearest["nearest_similarity"] >= self.embedding_reuse_similarity):
+                        vagueness = nearest["nearest_rating"]
+                except Exception as e:
+                    logger.error(f"Error looking up claim embedding: {e}")
+            
+            # Use LLM to analyze description for vagueness, only for novel text
+            if description and vagueness is None and not copies:
                 prompt = f"""
                 Analyze the following insurance claim description for signs of vagueness, inconsistency, or lack of specific details that might indicate potential fraud.
                 
@@ -254,19 +534,39 @@ class FraudDetector:
                     json_str = response[json_start:json_end]
                     result = json.loads(json_str)
                     
-                    rating = float(result.get("rating", 0))
-                    explanation = result.get("explanation", "")
-                    
-                    if rating > 0.6:
-                        suspicious_patterns.append({
-                            "pattern": "generic",
-                            "description": f"Vague or inconsistent description: {explanation}",
-                            "confidence": rating
-                        })
-                        confidence_scores.append(rating)
+                    vagueness = {
+                        "rating": float(result.get("rating", 0)),
+                        "explanation": result.get("explanation", "")
+                    }
                 except Exception as e:
                     logger.error(f"Error analyzing description with LLM: {e}")
             
+            if vagueness is not None:
+                rating = vagueness["rating"]
+                explanation = vagueness["explanation"]
+                
+                if rating > 0.6:
+                    suspicious_patterns.append({
+                        "pattern": "generic",
+                        "description": f"Vague or inconsistent description: {explanation}",
+                        "confidence": rating
+                    })
+                    confidence_scores.append(rating)
+            
+            if signature is not None and claim_id is not None:
+                updates.append(lambda: self.description_index.add(
+                    description, claim_id, claimant, rating=vagueness, signature=signature
+                ))
+            if claim_id is not None and len(self.embedding_index) and (vector is not None or vagueness is not None):
+                # Ratings reused from a description copy are stored too, so that later
+                # claims nearest to this one in embedding space can reuse them
+                try:
+                    if vector is None:
+                        vector = await self._claim_embedding(claim_data)
+                    updates.append(lambda: self.embedding_index.add(vector, claim_id, rating=vagueness))
+                except Exception as e:
+                    logger.error(f"Error embedding claim: {e}")
+            
             # Calculate overall confidence
             overall_confidence = max(confidence_scores) if confidence_scores else 0
             
@@ -274,7 +574,7 @@ class FraudDetector:
                 "category": "documentation",
                 "suspicious_patterns": suspicious_patterns,
                 "confidence": overall_confidence
-            }
+            }, updates
         except Exception as e:
             logger.error(f"Error analyzing documentation: {e}")
             return {
@@ -282,8 +582,648 @@ class FraudDetector:
                 "suspicious_patterns": [],
                 "confidence": 0,
                 "error": str(e)
+            }, updates
+    
+    def _apply_index_updates(self, updates: List[Callable[[], Any]]):
+        """
+        Apply the index writes collected for a claim.
+        
+        The writes are plain synchronous calls with no await between them, so once
+        started they all land; a cancelled analysis never leaves a claim in some
+        indexes but not others.
+        
+        Args:
+            updates: Index writes returned by _check_documentation or _check_claim_history.
+        """
+        for update in updates:
+            try:
+                update()
+            except Exception as e:
+                logger.error(f"Error updating claim indexes: {e}")
+    
+    def _hash_photos(self, paths: List[str], stop: threading.Event) -> Dict[str, Optional[int]]:
+        """
+        Decode and hash photos in a worker thread, until stopped.
+        
+        Args:
+            paths: Photo file paths.
+            stop: Set when the analysis is cancelled; no further photo is started.
+        
+        Returns:
+            Hashes by path, None for photos that could not be decoded.
+        """
+        hashes = {}
+        for path in paths:
+            if stop.is_set():
+                break
+            try:
+                hashes[path] = dhash(path)
+            except Exception as e:
+                logger.warning(f"Could not hash photo {path}: {e}")
+                hashes[path] = None
+        return hashes
+    
+    async def _hash_claim_photos(self, claim_data: Dict[str, Any]) -> Dict[str, Optional[int]]:
+        """
+        Hash a claim's photos that are not indexed yet on the photo worker threads.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+        
+        Returns:
+            Hashes by path.
+        """
+        claim_id = claim_data.get("claim_id", claim_data.get("id"))
+        paths = [
+            path for path in photo_paths(claim_data.get("documents", []))
+            if self.photo_index.hash_for(claim_id, path) is None
+        ]
+        if not paths:
+            return {}
+        stop = threading.Event()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.photo_executor, self._hash_photos, paths, stop)
+        except asyncio.CancelledError:
+            # The photo being decoded still finishes, but no further one is started
+            stop.set()
+            raise
+    
+    def _photo_reuse_patterns(
+        self,
+        claim_data: Dict[str, Any],
+        photo_hashes: Dict[str, Optional[int]],
+        updates: Optional[List[Callable[[], Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Check a claim's photos against the photo index and add them to it.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+            photo_hashes: Hashes of the photos not indexed yet, by path.
+            updates: If given, the photo index writes are appended here instead of
+                being applied.
+        
+        Returns:
+            List of 'reused_photo' patterns, most confident first.
+        """
+        claim_id = claim_data.get("claim_id", claim_data.get("id"))
+        claimant = claim_data.get("claimant_id", claim_data.get("homeowner_id"))
+        suspicious_patterns = []
+        
+        for path in photo_paths(claim_data.get("documents", [])):
+            # Photos indexed by the backfill are not decoded again
+            photo_hash = self.photo_index.hash_for(claim_id, path)
+            if photo_hash is None:
+                photo_hash = photo_hashes.get(path)
+            if photo_hash is None:
+                continue
+            reused = self.photo_index.find_reused(photo_hash, claim_id, claimant)
+            if claim_id is not None:
+                add = lambda photo_hash=photo_hash, path=path: self.photo_index.add(photo_hash, claim_id, claimant, path)
+                if updates is None:
+                    add()
+                else:
+                    updates.append(add)
+            
+            if reused:
+                other_claims = {match["claim_id"] for match in reused}
+                suspicious_patterns.append({
+                    "pattern": "reused_photo",
+                    "description": (
+                        f"Photo {os.path.basename(path)} matches photos on {len(other_claims)} other claimants' "
+                        f"claims (closest: claim {reused[0]['claim_id']}, {reused[0]['distance']} bits apart)"
+                    ),
+                    "confidence": 0.95 - 0.03 * reused[0]["distance"]
+                })
+        
+        return sorted(suspicious_patterns, key=lambda pattern: -pattern["confidence"])
+
+    def _record_history(self, claims: List[Dict[str, Any]]):
+        """
+        Add claims to the claim history index, refreshing the status of known ones.
+        
+        Claims without an ID are left out, as in the other indexes: a re-analyzed
+        claim could not be told apart from its earlier copy and would count
+        towards its own history.
+        
+        Args:
+            claims: List of claim data dictionaries.
+        """
+        claims = [claim for claim in claims if claim.get("claim_id", claim.get("id")) is not None]
+        if len(claims) == 1:
+            self.claim_history.add(claims[0])
+        elif claims:
+            self.claim_history.add_many(claims)
+    
+    def _history_analysis(self, claim_data: Dict[str, Any], neighbors: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Check a claim against the claim history index.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+            neighbors: The claim's nearest-neighbor result from the embedding index, if looked up.
+        
+        Returns:
+            Dictionary with analysis results.
+        """
+        try:
+            history = self.claim_history.history(claim_data)
+            suspicious_patterns = []
+            
+            # Frequent claims by the same claimant or on the same property
+            recent = max(history["recent_claims"].get("claimant", 0), history["recent_claims"].get("property", 0))
+            if recent >= 2:
+                suspicious_patterns.append({
+                    "pattern": "frequent",
+                    "description": f"{recent} other claims by this claimant or on this property in the past year",
+                    "confidence": min(1, 0.5 + 0.15 * (recent - 1))
+                })
+            
+            # Similar claims
+            if history["similar_claims"] >= 1:
+                suspicious_patterns.append({
+                    "pattern": "similar",
+                    "description": f"{history['similar_claims']} claims with the same cause in the past year",
+                    "confidence": min(1, 0.6 + 0.1 * (history["similar_claims"] - 1))
+                })
+            
+            # Multiple carriers
+            if history["carriers"] >= 2:
+                suspicious_patterns.append({
+                    "pattern": "multiple_carriers",
+                    "description": f"Claims filed with {history['carriers']} different insurance carriers",
+                    "confidence": 0.6 if history["carriers"] == 2 else 0.8
+                })
+            
+            # Prior denials
+            if history["prior_denials"] >= 1:
+                suspicious_patterns.append({
+                    "pattern": "prior_denials",
+                    "description": f"{history['prior_denials']} previously denied claims",
+                    "confidence": min(1, 0.5 + 0.2 * history["prior_denials"])
+                })
+            
+            # Contact details shared with other claimants
+            for kind, others in history["shared_claimants"].items():
+                if others >= 1:
+                    suspicious_patterns.append({
+                        "pattern": "shared_contact",
+                        "description": f"{kind.capitalize()} shared with {others} other claimants",
+                        "confidence": min(1, 0.6 + 0.1 * others)
+                    })
+            
+            # Rings of claimants linked through shared entities
+            if len(self.claim_graph) and claim_data.get("claim_id", claim_data.get("id")) is not None:
+                ring = self.claim_graph.ring_risk(claim_data)
+                if ring["risk"] > 0.5:
+                    suspicious_patterns.append({
+                        "pattern": "fraud_ring",
+                        "description": (
+                            f"Linked to {ring['linked_claimants'] - 1} other claimants through "
+                            f"{ring['shared_identifiers']} shared phones, addresses, accounts or photos"
+                        ),
+                        "confidence": ring["risk"]
+                    })
+            
+            # Claims far from every similar historical claim
+            percentile = neighbors["percentile"] if neighbors else None
+            if percentile is not None and percentile >= self.atypical_percentile:
+                suspicious_patterns.append({
+                    "pattern": "atypical",
+                    "description": (
+                        f"Further from its {self.embedding_index.k} most similar past claims "
+                        f"than {percentile:.0%} of claims on record"
+                    ),
+                    "confidence": min(1, 0.5 + 5 * (percentile - self.atypical_percentile))
+                })
+            
+            return {
+                "category": "history",
+                "suspicious_patterns": suspicious_patterns,
+                "confidence": max((pattern["confidence"] for pattern in suspicious_patterns), default=0)
             }
+        except Exception as e:
+            logger.error(f"Error analyzing claim history: {e}")
+            return {
+                "category": "history",
+                "suspicious_patterns": [],
+                "confidence": 0,
+                "error": str(e)
+            }
+    
+    async def _analyze_claim_history(self, claim_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyze the claimant's and property's claim history for suspicious patterns
+        and index the claim's embedding.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+        
+        Returns:
+            Dictionary with analysis results.
+        """
+        result, updates = await self._check_claim_history(claim_data)
+        self._apply_index_updates(updates)
+        return result
+    
+    async def _check_claim_history(self, claim_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Callable[[], Any]]]:
+        """
+        Analyze the claim history without touching the indexes.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+        
+        Returns:
+            Tuple of the analysis results and the index writes for the claim.
+        """
+        neighbors = None
+        updates = []
+        claim_id = claim_data.get("claim_id", claim_data.get("id"))
+        if len(self.embedding_index):
+            try:
+                vector = await self._claim_embedding(claim_data)
+                neighbors = self.embedding_index.neighbors(vector, [claim_id])[0]
+                if claim_id is not None:
+                    updates.append(lambda: self.embedding_index.add(vector, claim_id))
+            except Exception as e:
+                logger.error(f"Error looking up claim embedding: {e}")
+        return self._history_analysis(claim_data, neighbors), updates
+    
+    async def _claim_embedding(self, claim_data: Dict[str, Any]) -> np.ndarray:
+        """
+        Embed a claim the way the embedding index was built.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+        
+        Returns:
+            Embedding vector; the stored one if the claim is already indexed.
+        """
+        vector = self.embedding_index.vector_for(claim_data.get("claim_id", claim_data.get("id")))
+        if vector is not None:
+            return vector
+        if self.embed_with_llm:
+            return np.asarray(await self.llm_provider.embed(claim_text(claim_data)), dtype=np.float32)
+        return claim_vector(claim_data)
+
+    def _weighted_score(self, confidences: Dict[str, Any]) -> Any:
+        """
+        Combine category confidences into one fraud score using the fraud_indicators weights.
+        
+        Only the categories given are weighted, so the score stays between 0 and 1.
+        Works on per-claim arrays of confidences as well as on single values.
+        
+        Args:
+            confidences: Confidence (or array of confidences) by category.
+        
+        Returns:
+            Weighted fraud score, with the same shape as the confidences.
+        """
+        total_weight = sum(self.fraud_indicators[category]["weight"] for category in confidences)
+        if not total_weight:
+            return 0.0
+        weighted = sum(
+            self.fraud_indicators[category]["weight"] * confidence
+            for category, confidence in confidences.items()
+        )
+        return weighted / total_weight
+    
+    def _rule_description(self, pattern: str, columns: Dict[str, np.ndarray], i: int) -> str:
+        """
+        Describe a pattern flagged by the batch rules in the words the single-claim analyzers use.
+        
+        Args:
+            pattern: Pattern name.
+            columns: Arrays from claim_columns.
+            i: Claim index in the batch.
+        
+        Returns:
+            Human-readable description.
+        """
+        claim_date = columns["claim_date"][i]
+        if pattern == "recent_policy":
+            return f"Claim filed only {(claim_date - columns['policy_start_date'][i]) // 86400} days after policy start"
+        if pattern == "policy_expiration":
+            return f"Claim filed only {(columns['policy_end_date'][i] - claim_date) // 86400} days before policy expiration"
+        if pattern == "weekend_holiday":
+            day_name = np.datetime64(int(claim_date), "s").astype(datetime.datetime).strftime('%A')
+            return f"Claim filed on a weekend ({day_name})"
+        if pattern == "delayed_reporting":
+            return f"Claim filed {(claim_date - columns['incident_date'][i]) // 86400} days after the incident"
+        if pattern == "incomplete":
+            return f"Only {columns['document_count'][i]} documents provided"
+        if pattern == "generic":
+            return "Unusually brief claim description"
+        if pattern == "exaggerated":
+            claimed_value, property_value = columns["claimed_amount"][i], columns["property_value"][i]
+            return f"Claimed amount ({claimed_value}) is {claimed_value/property_value:.1%} of property value"
+        return f"AI damage assessment has low confidence ({columns['assessment_confidence'][i]:.1%})"
     
+    async def score_claims_batch(
+        self,
+        claims: List[Dict[str, Any]],
+        max_llm_concurrency: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Score a batch of claims, e.g. the nightly re-scoring of the whole claim book.
+        
+        The timing, documentation-count and exaggeration rules run vectorized over
+        columnar arrays. The LLM checks can only raise the documentation and damage
+        confidences, so a claim is settled by the rules alone when its score is
+        already above the threshold, or stays below it even if both LLM checks came
+        back at full confidence. Only the remaining claims go to the LLM.
+        
+        Args:
+            claims: List of claim data dictionaries, as for the single-claim analyzers.
+            max_llm_concurrency: Maximum number of claims checked by the LLM at once,
+                and of photos decoded at once.
+        
+        Returns:
+            List of results in input order, each with the claim ID, fraud score,
+            suspicion flag, confidence by category, suspicious patterns and whether
+            the LLM was consulted.
+        """
+        if not claims:
+            return []
+        started = time.perf_counter()
+        
+        columns = claim_columns(claims)
+        rules = rule_confidences(columns)
+        confidences = {
+            category: np.max(np.stack(list(patterns.values())), axis=0)
+            for category, patterns in rules.items()
+        }
+        
+        patterns = [{category: [] for category in rules} for _ in claims]
+        if len(self.claim_graph):
+            # One incremental graph refresh for the whole batch
+            for claim in claims:
+                if claim.get("claim_id", claim.get("id")) is not None:
+                    self.claim_graph.add_claim(claim)
+            self.claim_graph.refresh()
+        # History counts only claims filed up to each claim's own date, so earlier
+        # claims in the batch count towards later ones
+        self._record_history(claims)
+        neighbors = [None] * len(claims)
+        if len(self.embedding_index):
+            # One matrix product finds the nearest past claims for the whole batch
+            claim_ids = [claim.get("claim_id", claim.get("id")) for claim in claims]
+            embed_semaphore = asyncio.Semaphore(max_llm_concurrency)
+            
+            async def embed(claim: Dict[str, Any]) -> np.ndarray:
+                async with embed_semaphore:
+                    return await self._claim_embedding(claim)
+            
+            vectors = np.stack(await asyncio.gather(*(embed(claim) for claim in claims)))
+            neighbors = self.embedding_index.neighbors(vectors, claim_ids)
+            for vector, claim_id in zip(vectors, claim_ids):
+                if claim_id is not None:
+                    self.embedding_index.add(vector, claim_id)
+        if len(self.claim_history) or len(self.claim_graph) or len(self.embedding_index):
+            # History lookups are a few binary searches plus a walk over the claim's related claims
+            histories = [self._history_analysis(claim, neighbors[i]) for i, claim in enumerate(claims)]
+            confidences["history"] = np.array([history["confidence"] for history in histories], dtype=np.float64)
+            for i, history in enumerate(histories):
+                patterns[i]["history"] = history["suspicious_patterns"]
+        # Decode new photos in worker threads, then match them in claim order so
+        # copies within the batch are still found
+        photo_claims = np.flatnonzero(columns["photo_count"])
+        new_photos = sorted({
+            path for i in photo_claims for path in photo_paths(claims[i].get("documents", []))
+            if self.photo_index.hash_for(claims[i].get("claim_id", claims[i].get("id")), path) is None
+        })
+        hash_semaphore = asyncio.Semaphore(max_llm_concurrency)
+        
+        async def hash_photo(path: str) -> Optional[int]:
+            async with hash_semaphore:
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self.photo_executor, dhash, path)
+                except Exception as e:
+                    logger.warning(f"Could not hash photo {path}: {e}")
+                    return None
+        
+        photo_hashes = dict(zip(new_photos, await asyncio.gather(*(hash_photo(path) for path in new_photos))))
+        for i in photo_claims:
+            reused = self._photo_reuse_patterns(claims[i], photo_hashes)
+            if reused:
+                confidences["documentation"][i] = max(confidences["documentation"][i], reused[0]["confidence"])
+                patterns[i]["documentation"].extend(reused)
+        
+        # Bound the score each claim could reach once the LLM checks are in
+        needs_description_check = columns["description_length"] > 0
+        needs_cause_check = columns["has_assessment"] & columns["has_detections"] & columns["has_cause"]
+        lower = self._weighted_score(confidences)
+        upper = self._weighted_score({
+            **confidences,
+            "documentation": np.where(needs_description_check, 1.0, confidences["documentation"]),
+            "damage_assessment": np.where(needs_cause_check, 1.0, confidences["damage_assessment"])
+        })
+        settled = (lower >= self.confidence_threshold) | (upper < self.confidence_threshold)
+        
+        for category, by_pattern in rules.items():
+            for pattern, values in by_pattern.items():
+                for i in np.flatnonzero(values):
+                    patterns[i][category].append({
+                        "pattern": pattern,
+                        "description": self._rule_description(pattern, columns, i),
+                        "confidence": float(values[i])
+                    })
+        
+        semaphore = asyncio.Semaphore(max_llm_concurrency)
+        
+        async def check_with_llm(i: int):
+            async with semaphore:
+                checks = []
+                if needs_description_check[i]:
+                    checks.append(self._analyze_documentation(claims[i]))
+                if needs_cause_check[i]:
+                    checks.append(self._analyze_damage_assessment(claims[i]))
+                # Each analyzer re-applies its cheap rules, so its result replaces the category
+                for analysis in await asyncio.gather(*checks):
+                    confidences[analysis["category"]][i] = analysis["confidence"]
+                    patterns[i][analysis["category"]] = analysis["suspicious_patterns"]
+        
+        unsettled = np.flatnonzero(~settled)
+        await asyncio.gather(*(check_with_llm(i) for i in unsettled))
+        
+        # Settled claims skip _analyze_documentation, so their descriptions are indexed
+        # here for later claims to be checked against
+        for i in np.flatnonzero(settled & needs_description_check):
+            claim_id = claims[i].get("claim_id", claims[i].get("id"))
+            if claim_id is not None:
+                claimant = claims[i].get("claimant_id", claims[i].get("homeowner_id"))
+                self.description_index.add(claims[i]["description"], claim_id, claimant)
+        scores = self._weighted_score(confidences)
+        
+        logger.info(
+            f"Scored {len(claims)} claims in {time.perf_counter() - started:.2f}s, "
+            f"{len(unsettled)} needed LLM checks"
+        )
+        return [
+            {
+                "claim_id": claim.get("claim_id", claim.get("id")),
+                "fraud_score": float(scores[i]),
+                "is_suspicious": bool(scores[i] >= self.confidence_threshold),
+                "category_confidence": {category: float(values[i]) for category, values in confidences.items()},
+                "suspicious_patterns": [pattern for found in patterns[i].values() for pattern in found],
+                "llm_checked": bool(not settled[i])
+            }
+            for i, claim in enumerate(claims)
+        ]
+    
+    async def _timed_analysis(self, category: str, analyzer, claim_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run one analyzer within its time budget.
+        
+        The budget can only interrupt the analyzer while it awaits (LLM calls, photo
+        hashing in a worker thread). Synchronous work past the budget cannot be cut
+        short, so such a run keeps its result but is reported as 'over_budget'. A
+        photo worker thread finishes the photo it is decoding but starts no other.
+        
+        Args:
+            category: Fraud indicator category the analyzer covers.
+            analyzer: Analyzer coroutine function.
+            claim_data: Dictionary with claim data.
+        
+        Returns:
+            Dictionary with the analysis result, status ('ok', 'over_budget' or
+            'timeout') and latency in ms.
+        """
+        budget = self.analyzer_budgets.get(category)
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(analyzer(claim_data), timeout=budget)
+            status = "ok"
+            if budget is not None and time.perf_counter() - started > budget:
+                logger.warning(f"{category} analysis overran its {budget}s budget in synchronous code")
+                status = "over_budget"
+        except asyncio.TimeoutError:
+            logger.warning(f"{category} analysis exceeded its {budget}s budget")
+            result = {
+                "category": category,
+                "suspicious_patterns": [],
+                "confidence": 0,
+                "error": f"Analysis exceeded its {budget}s budget"
+            }
+            status = "timeout"
+        return {"result": result, "status": status, "latency_ms": (time.perf_counter() - started) * 1000}
+    
+    def _record_latency(self, category: str, status: str, latency_ms: float):
+        """Add one analyzer run to the latency statistics."""
+        stats = self.analyzer_stats[category]
+        stats["calls"] += 1
+        stats[status] = stats.get(status, 0) + 1
+        stats["total_ms"] += latency_ms
+        stats["max_ms"] = max(stats["max_ms"], latency_ms)
+    
+    async def analyze_claim_concurrently(self, claim_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the timing, documentation, damage and (once indexed) history analyzers concurrently.
+        
+        Each analyzer runs under its own time budget, so the claim takes as long as
+        the slowest analyzer rather than their sum. Pending analyzers can only add to
+        the score, so once the completed ones alone put the weighted score over the
+        threshold, the rest are cancelled.
+        
+        The analyzers only read the indexes. Index writes of the analyzers that
+        finished are applied together once the runs are settled, outside the
+        budgets, so a timed-out or cancelled analyzer never leaves the claim
+        partly indexed.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+        
+        Returns:
+            Dictionary with the fraud score, suspicion flag, analyses by category,
+            per-analyzer status and latency, and whether the run was short-circuited.
+        """
+        started = time.perf_counter()
+        self._record_history([claim_data])
+        index_updates = {}
+        
+        def deferring(category: str, check):
+            # Keeps the index writes for later; they only exist once the check completes
+            async def analyzer(claim_data: Dict[str, Any]) -> Dict[str, Any]:
+                result, updates = await check(claim_data)
+                index_updates[category] = updates
+                return result
+            return analyzer
+        
+        analyzers = {
+            "claim_timing": self._analyze_claim_timing,
+            "documentation": deferring("documentation", self._check_documentation),
+            "damage_assessment": self._analyze_damage_assessment
+        }
+        if len(self.claim_history) or len(self.claim_graph) or len(self.embedding_index):
+            analyzers["history"] = deferring("history", self._check_claim_history)
+        total_weight = sum(self.fraud_indicators[category]["weight"] for category in analyzers)
+        tasks = {
+            asyncio.create_task(self._timed_analysis(category, analyzer, claim_data)): category
+            for category, analyzer in analyzers.items()
+        }
+        
+        runs = {}
+        pending = set(tasks)
+        short_circuited = False
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                runs[tasks[task]] = task.result()
+            floor = sum(
+                self.fraud_indicators[category]["weight"] * run["result"]["confidence"]
+                for category, run in runs.items()
+            ) / total_weight
+            if pending and floor >= self.confidence_threshold:
+                short_circuited = True
+                break
+        
+        # Finished analyzers' writes, in one synchronous step before anything else is awaited
+        self._apply_index_updates([
+            update for category, run in runs.items() if run["status"] in ("ok", "over_budget")
+            for update in index_updates.get(category, [])
+        ])
+        
+        if pending:
+            skipped_ms = (time.perf_counter() - started) * 1000
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in pending:
+                runs[tasks[task]] = {"result": None, "status": "skipped", "latency_ms": skipped_ms}
+        
+        for category, run in runs.items():
+            self._record_latency(category, run["status"], run["latency_ms"])
+        
+        # Timed-out and skipped analyzers are unknown, not clean, so they are left out of the score
+        fraud_score = self._weighted_score({
+            category: run["result"]["confidence"] for category, run in runs.items()
+            if run["status"] in ("ok", "over_budget")
+        })
+        return {
+            "fraud_score": float(fraud_score),
+            "is_suspicious": bool(fraud_score >= self.confidence_threshold),
+            "analyses": {category: run["result"] for category, run in runs.items() if run["result"] is not None},
+            "analyzer_status": {category: run["status"] for category, run in runs.items()},
+            "latency_ms": {category: run["latency_ms"] for category, run in runs.items()},
+            "short_circuited": short_circuited,
+            "elapsed_ms": (time.perf_counter() - started) * 1000
+        }
+    
+    def get_analyzer_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get latency statistics per analyzer.
+        
+        Returns:
+            Dictionary by category with call and status counts, mean and max latency in ms.
+        """
+        return {
+            category: {
+                **stats,
+                "mean_ms": stats["total_ms"] / stats["calls"] if stats["calls"] else 0.0
+            }
+            for category, stats in self.analyzer_stats.items()
+        }
+
     async def _analyze_damage_assessment(self, claim_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze damage assessment for suspicious patterns.
@@ -360,5 +1300,66 @@ class FraudDetector:
                         json_str = response[json_start:json_end]
                         result = json.loads(json_str)
                         
-      
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+                        consistency_rating = float(result.get("rating", 0))
+                        explanation = result.get("explanation", "")
+                        
+                        if consistency_rating > 0.6:
+                            suspicious_patterns.append({
+                                "pattern": "unrelated",
+                                "description": f"Damage types inconsistent with claimed cause: {explanation}",
+                                "confidence": consistency_rating
+                            })
+                            confidence_scores.append(consistency_rating)
+                    except Exception as e:
+                        logger.error(f"Error analyzing damage consistency with LLM: {e}")
+            
+            # Calculate overall confidence
+            overall_confidence = max(confidence_scores) if confidence_scores else 0
+            
+            return {
+                "category": "damage_assessment",
+                "suspicious_patterns": suspicious_patterns,
+                "confidence": overall_confidence
+            }
+        except Exception as e:
+            logger.error(f"Error analyzing damage assessment: {e}")
+            return {
+                "category": "damage_assessment",
+                "suspicious_patterns": [],
+                "confidence": 0,
+                "error": str(e)
+            }
+    
+    async def analyze_claim(self, claim_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyze a claim for potential fraud.
+        
+        Args:
+            claim_data: Dictionary with claim data.
+            
+        Returns:
+            Dictionary with the fraud score, suspicion flag, analyses by category and
+            every suspicious pattern found.
+        """
+        self._record_history([claim_data])
+        analyses = [
+            await self._analyze_claim_timing(claim_data),
+            await self._analyze_documentation(claim_data),
+            await self._analyze_damage_assessment(claim_data)
+        ]
+        if len(self.claim_history) or len(self.claim_graph) or len(self.embedding_index):
+            analyses.append(await self._analyze_claim_history(claim_data))
+        
+        # Categories without an analyzer are left out of the weighting
+        fraud_score = self._weighted_score({analysis["category"]: analysis["confidence"] for analysis in analyses})
+        
+        return {
+            "claim_id": claim_data.get("claim_id", claim_data.get("id")),
+            "fraud_score": float(fraud_score),
+            "is_suspicious": bool(fraud_score >= self.confidence_threshold),
+            "analyses": {analysis["category"]: analysis for analysis in analyses},
+            "suspicious_patterns": [
+                pattern for analysis in analyses for pattern in analysis["suspicious_patterns"]
+            ],
+            "analysis_date": datetime.datetime.now().isoformat()
+        }
@@ -0,0 +1,561 @@
+import os
+import json
+import time
+import socket
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, List, Optional, Any, Tuple
+from .claim_history import to_timestamp
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# A stream message: (message ID, decoded event, number of times delivered)
+Message = Tuple[str, Dict[str, Any], int]
+
+def claim_version(claim: Dict[str, Any]) -> int:
+    """
+    Get the version of a claim for idempotent scoring.
+
+    Args:
+        claim: Claim data with an integer 'version', or an 'updated_at' timestamp.
+
+    Returns:
+        Integer version; later edits of a claim have higher versions.
+    """
+    if claim.get("version") is not None:
+        return int(claim["version"])
+    if claim.get("updated_at"):
+        return to_timestamp(claim["updated_at"])
+    return 0
+
+def _encode_event(claim: Dict[str, Any], version: Optional[int], event: str) -> Dict[str, str]:
+    """Flatten a claim event into stream fields."""
+    return {
+        "event": event,
+        "claim_id": str(claim.get("claim_id", claim.get("id"))),
+        "version": str(claim_version(claim) if version is None else version),
+        "claim": json.dumps(claim, default=str)
+    }
+
+def _decode_event(fields: Dict[str, str]) -> Dict[str, Any]:
+    """Turn stream fields back into a claim event."""
+    return {
+        "event": fields.get("event", "claim.updated"),
+        "claim_id": fields.get("claim_id"),
+        "version": int(fields.get("version") or 0),
+        "claim": json.loads(fields["claim"]) if fields.get("claim") else {}
+    }
+
+def _message_time_ms(message_id: str) -> int:
+    """Get the publish time of a stream message from its 'milliseconds-sequence' ID."""
+    return int(message_id.split("-", 1)[0])
+
+class ClaimEventStream:
+    """Base class for claim event queues consumed by the fraud scoring worker."""
+
+    async def publish(self, claim: Dict[str, Any], version: Optional[int] = None, event: str = "claim.updated") -> str:
+        """
+        Publish a claim-created or claim-updated event.
+
+        Args:
+            claim: Claim data to score.
+            version: Claim version. Defaults to claim_version(claim).
+            event: Event type ('claim.created' or 'claim.updated').
+
+        Returns:
+            Message ID.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    async def read(self, count: int, block_ms: int) -> List[Message]:
+        """
+        Read new events for this consumer.
+
+        Args:
+            count: Maximum number of events.
+            block_ms: How long to wait for the first event; 0 to return at once.
+
+        Returns:
+            Messages, oldest first. They stay pending until acknowledged.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    async def reclaim(self, min_idle_ms: int, count: int) -> List[Message]:
+        """
+        Take over events delivered but not acknowledged for a while, e.g. by a crashed worker.
+
+        Args:
+            min_idle_ms: Minimum time since the last delivery.
+            count: Maximum number of events.
+
+        Returns:
+            Messages with their updated delivery counts.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    async def ack(self, message_ids: List[str]):
+        """
+        Acknowledge processed events so they are not delivered again.
+
+        Args:
+            message_ids: IDs of the processed messages.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    async def backlog(self) -> Dict[str, Optional[int]]:
+        """
+        Get the number of events not yet delivered ('lag') and delivered but not acknowledged ('pending').
+
+        Returns:
+            Dictionary with lag and pending counts; None where the backend cannot tell.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+class RedisClaimEventStream(ClaimEventStream):
+    """Redis Streams queue with a consumer group, shared by every worker process."""
+
+    def __init__(
+        self,
+        url: str,
+        stream: str = "claims:events",
+        group: str = "fraud-scoring",
+        consumer: Optional[str] = None
+    ):
+        """
+        Initialize the Redis stream.
+
+        Args:
+            url: Redis URL.
+            stream: Stream key.
+            group: Consumer group shared by the fraud scoring workers.
+            consumer: Name of this consumer. Defaults to host name and process ID.
+        """
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise ImportError("redis package is required for RedisClaimEventStream. Install with 'pip install redis'.")
+
+        self.client = aioredis.Redis.from_url(url, decode_responses=True)
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self._group_ready = False
+
+    async def _ensure_group(self):
+        """Create the consumer group (and the stream) on first use."""
+        if self._group_ready:
+            return
+        try:
+            await self.client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def publish(self, claim: Dict[str, Any], version: Optional[int] = None, event: str = "claim.updated") -> str:
+        return await self.client.xadd(self.stream, _encode_event(claim, version, event))
+
+    async def read(self, count: int, block_ms: int) -> List[Message]:
+        await self._ensure_group()
+        response = await self.client.xreadgroup(
+            self.group, self.consumer, {self.stream: ">"}, count=count, block=block_ms or None
+        )
+        return [
+            (message_id, _decode_event(fields), 1)
+            for _, entries in response or []
+            for message_id, fields in entries
+        ]
+
+    async def reclaim(self, min_idle_ms: int, count: int) -> List[Message]:
+        await self._ensure_group()
+        stale = await self.client.xpending_range(
+            self.stream, self.group, min="-", max="+", count=count, idle=min_idle_ms
+        )
+        if not stale:
+            return []
+        deliveries = {entry["message_id"]: entry["times_delivered"] + 1 for entry in stale}
+        claimed = await self.client.xclaim(self.stream, self.group, self.consumer, min_idle_ms, list(deliveries))
+        # Entries trimmed from the stream come back without fields and cannot be scored
+        await self.ack([message_id for message_id, fields in claimed if not fields])
+        return [
+            (message_id, _decode_event(fields), deliveries.get(message_id, 1))
+            for message_id, fields in claimed
+            if fields
+        ]
+
+    async def ack(self, message_ids: List[str]):
+        if message_ids:
+            await self.client.xack(self.stream, self.group, *message_ids)
+
+    async def backlog(self) -> Dict[str, Optional[int]]:
+        await self._ensure_group()
+        for group in await self.client.xinfo_groups(self.stream):
+            if group["name"] == self.group:
+                # 'lag' is reported from Redis 7 on
+                return {"lag": group.get("lag"), "pending": group["pending"]}
+        return {"lag": None, "pending": None}
+
+class LocalClaimEventStream(ClaimEventStream):
+    """
+    In-process stand-in for the Redis stream, for tests and single-process deployments.
+
+    It keeps the same delivery semantics (pending until acknowledged, reclaim after
+    an idle time) and blocks publishers while max_backlog events are waiting.
+    """
+
+    def __init__(self, max_backlog: int = 10000):
+        """
+        Initialize the local stream.
+
+        Args:
+            max_backlog: Number of undelivered events at which publish waits.
+        """
+        self.max_backlog = max_backlog
+        self._entries: deque = deque()
+        self._pending: Dict[str, List[Any]] = {}
+        self._condition = asyncio.Condition()
+        self._last_id = (0, 0)
+
+    def _next_id(self) -> str:
+        """Generate a 'milliseconds-sequence' message ID, increasing like Redis's."""
+        now_ms = int(time.time() * 1000)
+        last_ms, sequence = self._last_id
+        self._last_id = (now_ms, 0) if now_ms > last_ms else (last_ms, sequence + 1)
+        return f"{self._last_id[0]}-{self._last_id[1]}"
+
+    async def publish(self, claim: Dict[str, Any], version: Optional[int] = None, event: str = "claim.updated") -> str:
+        async with self._condition:
+            await self._condition.wait_for(lambda: len(self._entries) < self.max_backlog)
+            message_id = self._next_id()
+            self._entries.append((message_id, _encode_event(claim, version, event)))
+            self._condition.notify_all()
+            return message_id
+
+    async def read(self, count: int, block_ms: int) -> List[Message]:
+        async with self._condition:
+            if not self._entries:
+                try:
+                    await asyncio.wait_for(self._condition.wait_for(lambda: bool(self._entries)), block_ms / 1000)
+                except asyncio.TimeoutError:
+                    return []
+            messages = []
+            now = time.monotonic()
+            while self._entries and len(messages) < count:
+                message_id, fields = self._entries.popleft()
+                self._pending[message_id] = [fields, now, 1]
+                messages.append((message_id, _decode_event(fields), 1))
+            # Wake publishers waiting for room
+            self._condition.notify_all()
+            return messages
+
+    async def reclaim(self, min_idle_ms: int, count: int) -> List[Message]:
+        now = time.monotonic()
+        messages = []
+        for message_id, entry in self._pending.items():
+            if len(messages) >= count:
+                break
+            if (now - entry[1]) * 1000 >= min_idle_ms:
+                entry[1] = now
+                entry[2] += 1
+                messages.append((message_id, _decode_event(entry[0]), entry[2]))
+        return messages
+
+    async def ack(self, message_ids: List[str]):
+        for message_id in message_ids:
+            self._pending.pop(message_id, None)
+
+    async def backlog(self) -> Dict[str, Optional[int]]:
+        return {"lag": len(self._entries), "pending": len(self._pending)}
+
+class FraudResultStore:
+    """Base class for where the worker writes fraud scores back."""
+
+    async def versions(self, claim_ids: List[str]) -> Dict[str, int]:
+        """
+        Get the claim version each stored score was computed for.
+
+        Args:
+            claim_ids: Claim IDs to look up.
+
+        Returns:
+            Dictionary of claim ID to scored version, for claims with a stored score.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    async def write(self, results: List[Dict[str, Any]]) -> int:
+        """
+        Store fraud scores, each only if it is for a newer version than the stored one.
+
+        Args:
+            results: Scoring results with 'claim_id' and 'version'.
+
+        Returns:
+            Number of results written.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+class RedisFraudResultStore(FraudResultStore):
+    """Redis hash per claim holding its latest fraud score and the version it was computed for."""
+
+    # Compare-and-set, so a slow worker can never overwrite a newer score
+    WRITE_IF_NEWER = """
+    local stored = tonumber(redis.call('HGET', KEYS[1], 'version') or '-1')
+    if stored < tonumber(ARGV[1]) then
+        redis.call('HSET', KEYS[1], 'version', ARGV[1], 'result', ARGV[2])
+        return 1
+    end
+    return 0
+    """
+
+    def __init__(self, url: str, key_prefix: str = "fraud:score:"):
+        """
+        Initialize the Redis result store.
+
+        Args:
+            url: Redis URL.
+            key_prefix: Prefix for score keys.
+        """
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            raise ImportError("redis package is required for RedisFraudResultStore. Install with 'pip install redis'.")
+
+        self.client = aioredis.Redis.from_url(url, decode_responses=True)
+        self.key_prefix = key_prefix
+        self._write_if_newer = self.client.register_script(self.WRITE_IF_NEWER)
+
+    async def versions(self, claim_ids: List[str]) -> Dict[str, int]:
+        pipeline = self.client.pipeline(transaction=False)
+        for claim_id in claim_ids:
+            pipeline.hget(self.key_prefix + str(claim_id), "version")
+        stored = await pipeline.execute()
+        return {claim_id: int(version) for claim_id, version in zip(claim_ids, stored) if version is not None}
+
+    async def write(self, results: List[Dict[str, Any]]) -> int:
+        pipeline = self.client.pipeline(transaction=False)
+        for result in results:
+            await self._write_if_newer(
+                keys=[self.key_prefix + str(result["claim_id"])],
+                args=[result["version"], json.dumps(result, default=str)],
+                client=pipeline
+            )
+        return sum(await pipeline.execute())
+
+class LocalFraudResultStore(FraudResultStore):
+    """In-process result store, for tests and single-process deployments."""
+
+    def __init__(self):
+        """Initialize an empty result store."""
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    async def versions(self, claim_ids: List[str]) -> Dict[str, int]:
+        return {claim_id: self.results[claim_id]["version"] for claim_id in claim_ids if claim_id in self.results}
+
+    async def write(self, results: List[Dict[str, Any]]) -> int:
+        written = 0
+        for result in results:
+            stored = self.results.get(result["claim_id"])
+            if stored is None or stored["version"] < result["version"]:
+                self.results[result["claim_id"]] = result
+                written += 1
+        return written
+
+class FraudScoringWorker:
+    """
+    Streaming fraud scoring worker fed by claim-created and claim-updated events.
+
+    Claim submission only publishes an event, so its latency no longer includes
+    fraud scoring. The worker pulls events in micro-batches and scores each batch
+    with FraudDetector.score_claims_batch. It writes the scores back and only then
+    acknowledges the events.
+
+    Delivery is at least once: events from a failed batch or a crashed worker stay
+    pending and are reclaimed after reclaim_idle_ms. Scoring is idempotent per claim
+    version, so redelivered, duplicate and out-of-date events are acknowledged without
+    being scored again. Events that fail max_deliveries times are dropped and logged.
+    The worker only reads the next batch once the current one is written, so a slow
+    detector backs the queue up instead of piling up work in memory, and busy
+    periods are absorbed by larger batches.
+    """
+
+    def __init__(
+        self,
+        detector: Any,
+        stream: Optional[ClaimEventStream] = None,
+        results: Optional[FraudResultStore] = None,
+        batch_size: int = 64,
+        block_ms: int = 1000,
+        reclaim_idle_ms: int = 60000,
+        max_deliveries: int = 5,
+        max_llm_concurrency: int = 8
+    ):
+        """
+        Initialize the fraud scoring worker.
+
+        Args:
+            detector: FraudDetector used to score the claims.
+            stream: Claim event queue. Defaults to an in-process stream.
+            results: Where scores are written. Defaults to an in-process store.
+            batch_size: Maximum number of events scored together.
+            block_ms: How long a read waits for the first event of a batch.
+            reclaim_idle_ms: Time after which an unacknowledged event is delivered again.
+            max_deliveries: Deliveries after which a failing event is dropped.
+            max_llm_concurrency: Maximum number of claims checked by the LLM at once.
+        """
+        self.detector = detector
+        self.stream = stream or LocalClaimEventStream()
+        self.results = results or LocalFraudResultStore()
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.reclaim_idle_ms = reclaim_idle_ms
+        self.max_deliveries = max_deliveries
+        self.max_llm_concurrency = max_llm_concurrency
+        self._stopping = False
+        self._last_reclaim = 0.0
+        self._stats = {
+            "events": 0,
+            "scored": 0,
+            "duplicates": 0,
+            "stale_writes": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "redelivered": 0,
+            "dead_lettered": 0,
+            "batch_ms_total": 0.0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0
+        }
+
+    @classmethod
+    def from_env(cls, detector: Any, **kwargs) -> "FraudScoringWorker":
+        """
+        Create a worker using the Redis server named by FRAUD_STREAM_URL.
+
+        Anything other than a 'redis://' or 'rediss://' URL gives the in-process
+        stream and result store.
+
+        Args:
+            detector: FraudDetector used to score the claims.
+
+        Returns:
+            FraudScoringWorker instance.
+        """
+        url = os.environ.get("FRAUD_STREAM_URL", "")
+        if url.startswith(("redis://", "rediss://")):
+            return cls(detector, RedisClaimEventStream(url), RedisFraudResultStore(url), **kwargs)
+        return cls(detector, **kwargs)
+
+    async def run(self):
+        """Consume events until stop() is called."""
+        logger.info(f"Fraud scoring worker started (batch size {self.batch_size})")
+        self._stopping = False
+        while not self._stopping:
+            try:
+                await self.run_once()
+            except Exception as e:
+                # Unacknowledged events are reclaimed later, so the loop keeps going
+                logger.error(f"Error in fraud scoring worker: {e}")
+                await asyncio.sleep(1)
+        logger.info("Fraud scoring worker stopped")
+
+    def stop(self):
+        """Ask the worker to stop after the current batch."""
+        self._stopping = True
+
+    async def run_once(self) -> int:
+        """
+        Read and process one micro-batch.
+
+        Returns:
+            Number of events in the batch.
+        """
+        messages = []
+        if time.monotonic() - self._last_reclaim >= self.reclaim_idle_ms / 2000:
+            self._last_reclaim = time.monotonic()
+            messages = await self.stream.reclaim(self.reclaim_idle_ms, self.batch_size)
+            self._stats["redelivered"] += len(messages)
+        if len(messages) < self.batch_size:
+            messages += await self.stream.read(self.batch_size - len(messages), 0 if messages else self.block_ms)
+        if messages:
+            await self.process(messages)
+        return len(messages)
+
+    async def process(self, messages: List[Message]) -> bool:
+        """
+        Score a micro-batch of events, write the scores and acknowledge the events.
+
+        Args:
+            messages: Messages from the stream.
+
+        Returns:
+            True if the batch was acknowledged, False if it failed and will be redelivered.
+        """
+        started = time.perf_counter()
+        dead = [message_id for message_id, _, deliveries in messages if deliveries > self.max_deliveries]
+        if dead:
+            logger.error(f"Dropping {len(dead)} claim events after {self.max_deliveries} failed deliveries: {dead}")
+            await self.stream.ack(dead)
+            self._stats["dead_lettered"] += len(dead)
+            messages = [message for message in messages if message[0] not in dead]
+        if not messages:
+            return True
+
+        # Only the newest version of each claim in the batch is scored
+        latest: Dict[str, Dict[str, Any]] = {}
+        for _, event, _ in messages:
+            current = latest.get(event["claim_id"])
+            if current is None or event["version"] > current["version"]:
+                latest[event["claim_id"]] = event
+        stored = await self.results.versions(list(latest))
+        pending = [event for claim_id, event in latest.items() if stored.get(claim_id, -1) < event["version"]]
+
+        try:
+            scored = await self.detector.score_claims_batch(
+                [event["claim"] for event in pending],
+                max_llm_concurrency=self.max_llm_concurrency
+            ) if pending else []
+            now = time.time()
+            written = await self.results.write([
+                {**result, "claim_id": event["claim_id"], "version": event["version"], "scored_at": now}
+                for event, result in zip(pending, scored)
+            ])
+        except Exception as e:
+            # Left unacknowledged, the batch is reclaimed after reclaim_idle_ms
+            logger.error(f"Error scoring batch of {len(messages)} claim events: {e}")
+            self._stats["failed_batches"] += 1
+            return False
+        await self.stream.ack([message_id for message_id, _, _ in messages])
+
+        lag_ms = time.time() * 1000 - min(_message_time_ms(message_id) for message_id, _, _ in messages)
+        self._stats["events"] += len(messages)
+        self._stats["scored"] += len(pending)
+        self._stats["duplicates"] += len(messages) - len(pending)
+        self._stats["stale_writes"] += len(pending) - written
+        self._stats["batches"] += 1
+        self._stats["batch_ms_total"] += (time.perf_counter() - started) * 1000
+        self._stats["last_lag_ms"] = lag_ms
+        self._stats["max_lag_ms"] = max(self._stats["max_lag_ms"], lag_ms)
+        return True
+
+    async def get_metrics(self) -> Dict[str, Any]:
+        """
+        Get throughput, idempotency and lag metrics.
+
+        Returns:
+            Dictionary with event, scoring and failure counters, mean batch size and
+            latency, the age of the oldest event in the last batch (last_lag_ms) and
+            the stream backlog.
+        """
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "mean_batch_size": self._stats["events"] / batches if batches else 0.0,
+            "mean_batch_ms": self._stats["batch_ms_total"] / batches if batches else 0.0,
+            **await self.stream.backlog()
+        }
@@ -0,0 +1,383 @@
+import time
+import asyncio
+import logging
+import datetime
+from typing import Dict, List, Optional, Any
+import numpy as np
+from .fleet_scheduler import FleetScheduler
+from .scheduler import Scheduler, window_scores
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class IncrementalScheduler:
+    """
+    Keeps a fleet plan up to date as forecasts change.
+
+    The plan, the daily suitability arrays per location and the window scores per
+    project are kept between updates. When a new forecast arrives for a location,
+    only the projects whose windows touch a changed day are re-optimized; every
+    other assignment is pinned. Each update returns the minimal set of schedule
+    changes, ready to be turned into notifications.
+
+    The horizon rolls forward with the calendar: each update starts it at today.
+    Projects that have started keep their crew for their remaining days and are no
+    longer moved; projects that have finished leave the plan.
+    """
+
+    def __init__(
+        self,
+        scheduler: Scheduler,
+        crews: List[Dict[str, Any]],
+        equipment: Dict[str, int],
+        horizon_days: int = 14,
+        window_aggregate: str = "mean",
+        min_improvement: float = 0.05,
+        score_tolerance: float = 1e-3,
+        time_limit: float = 0.2
+    ):
+        """
+        Initialize the incremental scheduler.
+
+        Args:
+            scheduler: Scheduler used for weather scoring and project requirements.
+            crews: List of crews, each with 'crew_id', 'size' (number of crew members) and
+                optional 'hours_per_day'.
+            equipment: Number of units available per equipment type.
+            horizon_days: Number of days to plan, starting on the day plan() is called.
+            window_aggregate: How to score a multi-day window ('mean' or 'min').
+            min_improvement: Smallest window score gain for which an affected project is moved.
+            score_tolerance: Daily score differences at or below this are not treated as changes.
+            time_limit: Local search time budget per update in seconds.
+        """
+        self.scheduler = scheduler
+        self.solver = FleetScheduler(
+            crews, equipment, horizon_days,
+            hours_per_day=scheduler.hourly_constraints["hours_per_day"],
+            time_limit=time_limit
+        )
+        self.horizon_days = horizon_days
+        self.window_aggregate = window_aggregate
+        self.min_improvement = min_improvement
+        self.score_tolerance = score_tolerance
+
+        self.origin = None
+        self.projects: List[Dict[str, Any]] = []
+        self.fleet_projects: List[Dict[str, Any]] = []
+        self.location_scores: Dict[str, np.ndarray] = {}
+        self.availability = np.zeros((0, horizon_days), dtype=bool)
+        self.start_values = np.zeros((0, horizon_days))
+        self.assignments: Dict[Any, Dict[str, Any]] = {}
+        # Start dates of the projects already under way, by project ID
+        self.started: Dict[Any, str] = {}
+
+    def _window_values(self, p: int) -> np.ndarray:
+        """
+        Compute window scores by start day for one project from its location's daily scores.
+
+        Args:
+            p: Project index.
+
+        Returns:
+            Array (horizon_days,) of window scores, NaN where the project cannot start.
+        """
+        location_scores = self.location_scores[self.projects[p]["location"]]
+        duration = self.fleet_projects[p]["duration_days"]
+        values = np.full(self.horizon_days, np.nan)
+        if self.projects[p]["project_id"] in self.started:
+            # Work under way can only continue today, whatever the weather
+            remaining = window_scores(location_scores[:duration], duration, aggregate=self.window_aggregate)
+            values[0] = remaining[0] if len(remaining) and np.isfinite(remaining[0]) else 0.0
+            return values
+
+        daily_scores = np.where(self.availability[p], location_scores, np.nan)
+        scores = window_scores(daily_scores, duration, aggregate=self.window_aggregate)
+        values[:len(scores)] = scores
+        return values
+
+    def _rebase(self, today: np.datetime64) -> List[Any]:
+        """
+        Move the start of the horizon forward to today.
+
+        Day indexes shift back by the days elapsed since the last update; days that
+        scroll into the horizon have no forecast until their location is updated.
+
+        Args:
+            today: New first day of the horizon.
+
+        Returns:
+            IDs of the projects that finished and left the plan.
+        """
+        shift = int((today - self.origin).astype(int))
+        if shift <= 0:
+            return []
+
+        padding = np.full(min(shift, self.horizon_days), np.nan)
+        for location, scores in self.location_scores.items():
+            self.location_scores[location] = np.concatenate([scores[shift:], padding])
+
+        finished = []
+        assignments = {}
+        for project_id, assignment in self.assignments.items():
+            start, end = assignment["start_day"] - shift, assignment["end_day"] - shift
+            if end <= 0:
+                finished.append(project_id)
+                self.started.pop(project_id, None)
+                continue
+            if start < 0:
+                self.started.setdefault(project_id, str(self.origin + assignment["start_day"]))
+                start = 0
+            assignments[project_id] = {**assignment, "start_day": start, "end_day": end}
+        self.assignments = assignments
+        self.origin = today
+
+        kept = [p for p, project in enumerate(self.projects) if project["project_id"] not in finished]
+        self.projects = [self.projects[p] for p in kept]
+        self.fleet_projects = [
+            {**self.fleet_projects[p], "duration_days": self.assignments[project["project_id"]]["end_day"]}
+            if project["project_id"] in self.started else self.fleet_projects[p]
+            for p, project in zip(kept, self.projects)
+        ]
+        self.availability = np.array([
+            self.scheduler.availability_mask(project.get("available_dates"), self.origin, self.horizon_days)
+            for project in self.projects
+        ]).reshape(len(self.projects), self.horizon_days)
+        self.start_values = np.array([
+            self._window_values(p) for p in range(len(self.projects))
+        ]).reshape(len(self.projects), self.horizon_days)
+        return finished
+
+    def _solve(self, movable: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """
+        Run the fleet scheduler from the current plan and store the result.
+
+        Args:
+            movable: IDs of the projects that may be re-planned. None re-plans all.
+
+        Returns:
+            Result of FleetScheduler.solve.
+        """
+        plan = self.solver.solve(
+            self.fleet_projects,
+            self.start_values,
+            exact=False,
+            current=self.assignments,
+            movable=movable,
+            min_improvement=self.min_improvement if movable is not None else 0.0
+        )
+        self.assignments = {
+            assignment["project_id"]: assignment for assignment in plan["assignments"]
+        }
+        return plan
+
+    async def plan(self, projects: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Build the initial plan from scratch.
+
+        Args:
+            projects: List of projects, each with 'project_id', 'project_details', 'location',
+                and optional 'available_dates' (YYYY-MM-DD strings) and 'priority' weight.
+
+        Returns:
+            Dictionary with the schedule and unscheduled project IDs.
+        """
+        self.origin = np.datetime64(datetime.date.today(), "D")
+        self.projects = list(projects)
+        self.assignments = {}
+        self.started = {}
+
+        locations = list(dict.fromkeys(project["location"] for project in self.projects))
+        forecasts = await asyncio.gather(
+            *(self.scheduler.get_weather_forecast(location, days=self.horizon_days) for location in locations)
+        )
+        self.location_scores = {
+            location: self.scheduler.daily_score_array(forecast, self.origin, self.horizon_days)
+            for location, forecast in zip(locations, forecasts)
+        }
+
+        self.fleet_projects = [await self.scheduler.fleet_project(project) for project in self.projects]
+        self.availability = np.array([
+            self.scheduler.availability_mask(project.get("available_dates"), self.origin, self.horizon_days)
+            for project in self.projects
+        ]).reshape(len(self.projects), self.horizon_days)
+        self.start_values = np.array([
+            self._window_values(p) for p in range(len(self.projects))
+        ]).reshape(len(self.projects), self.horizon_days)
+
+        plan = self._solve()
+        return {
+            "schedule": self.get_schedule(),
+            "unscheduled": plan["unscheduled"],
+            "objective": plan["objective"]
+        }
+
+    def _affected_projects(self, location: str, changed: np.ndarray, previous_values: np.ndarray) -> List[Any]:
+        """
+        Find the projects at a location whose scheduling may change.
+
+        A scheduled project is affected when its own window's score moved, or when a
+        window touching a changed day now beats it by at least min_improvement. An
+        unscheduled project is affected when a window touching a changed day is now valid.
+
+        Args:
+            location: Location whose forecast changed.
+            changed: Boolean array (horizon_days,) of changed days.
+            previous_values: Window scores by start day before the update.
+
+        Returns:
+            IDs of the affected projects.
+        """
+        changed_prefix = np.concatenate([[0], np.cumsum(changed)])
+        starts = np.arange(self.horizon_days)
+
+        affected = []
+        for p, project in enumerate(self.projects):
+            if project["location"] != location or project["project_id"] in self.started:
+                continue
+            duration = self.fleet_projects[p]["duration_days"]
+            ends = np.minimum(starts + duration, self.horizon_days)
+            touched = (changed_prefix[ends] - changed_prefix[starts]) > 0
+            candidates = np.where(touched, self.start_values[p], np.nan)
+            best_candidate = np.nanmax(candidates) if np.isfinite(candidates).any() else None
+
+            assignment = self.assignments.get(project["project_id"])
+            if assignment is None:
+                if best_candidate is not None:
+                    affected.append(project["project_id"])
+                continue
+
+            current = self.start_values[p, assignment["start_day"]]
+            previous = previous_values[p, assignment["start_day"]]
+            if np.isnan(current) or abs(current - previous) > self.score_tolerance:
+                affected.append(project["project_id"])
+            elif best_candidate is not None and best_candidate >= current + self.min_improvement:
+                affected.append(project["project_id"])
+        return affected
+
+    async def update_forecast(
+        self,
+        location: str,
+        forecast: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Apply a new forecast for a location and re-plan only what it affects.
+
+        Args:
+            location: Location whose forecast changed.
+            forecast: New daily forecast. If None, it is fetched through the scheduler.
+
+        Returns:
+            Dictionary with the changed dates, affected project IDs, the schedule diff and
+            the projects that finished since the last update.
+        """
+        started = time.perf_counter()
+        if self.origin is None:
+            return {"location": location, "changed_dates": [], "affected": [], "changes": [], "finished": []}
+        finished = self._rebase(np.datetime64(datetime.date.today(), "D"))
+        if location not in self.location_scores:
+            return {"location": location, "changed_dates": [], "affected": [], "changes": [], "finished": finished}
+
+        if forecast is None:
+            forecast = await self.scheduler.get_weather_forecast(location, days=self.horizon_days)
+        new_scores = self.scheduler.daily_score_array(forecast, self.origin, self.horizon_days)
+        old_scores = self.location_scores[location]
+
+        both_missing = np.isnan(old_scores) & np.isnan(new_scores)
+        with np.errstate(invalid="ignore"):
+            unchanged = both_missing | (np.abs(new_scores - old_scores) <= self.score_tolerance)
+        changed = ~unchanged
+        changed_dates = [str(self.origin + day) for day in np.flatnonzero(changed)]
+        if not changed.any():
+            return {"location": location, "changed_dates": [], "affected": [], "changes": [], "finished": finished}
+
+        self.location_scores[location] = new_scores
+        previous_values = self.start_values.copy()
+        for p, project in enumerate(self.projects):
+            if project["location"] == location:
+                self.start_values[p] = self._window_values(p)
+
+        affected = self._affected_projects(location, changed, previous_values)
+        previous = dict(self.assignments)
+        # Re-solving with nothing movable still refreshes the scores of pinned windows
+        self._solve(movable=affected)
+
+        changes = self._diff(previous, self.assignments)
+        logger.info(
+            f"Forecast update for {location}: {len(changed_dates)} changed days, "
+            f"{len(affected)} affected projects, {len(changes)} schedule changes"
+        )
+        return {
+            "location": location,
+            "changed_dates": changed_dates,
+            "affected": affected,
+            "changes": changes,
+            "finished": finished,
+            "elapsed_ms": (time.perf_counter() - started) * 1000
+        }
+
+    def _entry(self, assignment: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert an assignment into a dated schedule entry."""
+        return {
+            "crew_id": assignment["crew_id"],
+            "start_date": self.started.get(assignment["project_id"], str(self.origin + assignment["start_day"])),
+            "end_date": str(self.origin + assignment["end_day"])
+        }
+
+    def _diff(
+        self,
+        previous: Dict[Any, Dict[str, Any]],
+        current: Dict[Any, Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Compute the schedule changes between two plans.
+
+        Only changes a customer or crew would be told about are reported: a new start
+        date, a different crew, or a project gaining or losing its slot.
+
+        Args:
+            previous: Assignments before the update, by project ID.
+            current: Assignments after the update, by project ID.
+
+        Returns:
+            List of changes with project ID, change type and the previous/current entries.
+        """
+        changes = []
+        for project in self.projects:
+            project_id = project["project_id"]
+            before, after = previous.get(project_id), current.get(project_id)
+            if before is None and after is None:
+                continue
+            if before is None:
+                change = "scheduled"
+            elif after is None:
+                change = "unscheduled"
+            elif before["start_day"] != after["start_day"]:
+                change = "rescheduled"
+            elif before["crew_id"] != after["crew_id"]:
+                change = "crew_changed"
+            else:
+                continue
+            changes.append({
+                "project_id": project_id,
+                "change": change,
+                "previous": self._entry(before) if before else None,
+                "current": self._entry(after) if after else None
+            })
+        return changes
+
+    def get_schedule(self) -> List[Dict[str, Any]]:
+        """
+        Get the current plan as dated schedule entries.
+
+        Returns:
+            List of schedule entries ordered by start date.
+        """
+        plan = {"assignments": sorted(self.assignments.values(), key=lambda x: (x["start_day"], str(x["crew_id"])))}
+        schedule = self.scheduler.fleet_schedule(plan, self.fleet_projects, self.origin)
+        for entry in schedule:
+            entry["start_date"] = self.started.get(entry["project_id"], entry["start_date"])
+        return schedule
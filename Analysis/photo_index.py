@@ -0,0 +1,241 @@
+import os
+import logging
+import itertools
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".heic", ".webp", ".bmp", ".tif", ".tiff"}
+
+def dhash(image: Any, hash_size: int = 8) -> int:
+    """
+    Compute the difference hash of an image.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale thumbnail and
+    each bit records whether a pixel is brighter than its right neighbor. Re-encoding,
+    resizing and mild color edits leave most bits unchanged.
+
+    Args:
+        image: Path to an image file, or a PIL image.
+        hash_size: Hash side length; the hash has hash_size ** 2 bits.
+
+    Returns:
+        Hash as an unsigned integer.
+    """
+    from PIL import Image
+
+    if not isinstance(image, Image.Image):
+        image = Image.open(image)
+    thumbnail = np.asarray(
+        image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS),
+        dtype=np.int16
+    )
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+def _hash_file(path: str) -> Optional[int]:
+    """Hash one image file for the backfill pool; None if it cannot be read."""
+    try:
+        return dhash(path)
+    except Exception as e:
+        logger.warning(f"Could not hash photo {path}: {e}")
+        return None
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+def photo_paths(documents: List[Any]) -> List[str]:
+    """
+    Pick the local photo files out of a claim's documents.
+
+    Args:
+        documents: Document paths, or dictionaries with 'path', 'file_path' or
+            'image_path' and an optional 'type' or 'content_type'.
+
+    Returns:
+        List of photo file paths.
+    """
+    paths = []
+    for document in documents:
+        if isinstance(document, dict):
+            path = document.get("path") or document.get("file_path") or document.get("image_path")
+            kind = str(document.get("type") or document.get("content_type") or "").lower()
+            is_photo = kind in ("photo", "image") or kind.startswith("image/")
+        else:
+            path, is_photo = document, False
+        if isinstance(path, str) and (is_photo or os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS):
+            paths.append(path)
+    return paths
+
+class PhotoHashIndex:
+    """
+    Multi-index hash table for finding near-duplicate photos by Hamming distance.
+
+    Each hash is split into chunks, and each chunk gets its own exact-match table.
+    Two hashes within max_distance bits must agree to within max_distance // chunks
+    bits on at least one chunk (pigeonhole), so a search only probes those few
+    neighbors per chunk and checks the candidates found there. Adds and searches
+    are safe to call from worker threads.
+    """
+
+    def __init__(self, max_distance: int = 6, chunks: int = 4, hash_bits: int = 64):
+        """
+        Initialize the photo index.
+
+        Args:
+            max_distance: Largest Hamming distance at which two photos count as the same.
+            chunks: Number of chunks each hash is split into.
+            hash_bits: Number of bits per hash.
+        """
+        self.max_distance = max_distance
+        self.hash_bits = hash_bits
+        width = hash_bits // chunks
+        self._chunks = [(i * width, width if i < chunks - 1 else hash_bits - i * width) for i in range(chunks)]
+        self._tables: List[Dict[int, array]] = [{} for _ in self._chunks]
+        self._probe_cache: Dict[Tuple[int, int], List[int]] = {}
+
+        # Per-photo columns, indexed by row
+        self.hashes = array("Q")
+        self.claim_ids: List[Any] = []
+        self.claimants: List[Any] = []
+        self.refs: List[Any] = []
+        self._rows: Dict[Tuple[Any, Any], int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def _flips(self, width: int, radius: int) -> List[int]:
+        """All masks of up to radius set bits within a chunk of the given width."""
+        key = (width, radius)
+        if key not in self._probe_cache:
+            self._probe_cache[key] = [
+                sum(1 << bit for bit in bits)
+                for count in range(radius + 1)
+                for bits in itertools.combinations(range(width), count)
+            ]
+        return self._probe_cache[key]
+
+    def hash_for(self, claim_id: Any, ref: Any) -> Optional[int]:
+        """Get the stored hash of a claim's photo, if it is indexed."""
+        row = self._rows.get((claim_id, ref))
+        return self.hashes[row] if row is not None else None
+
+    def add(self, photo_hash: int, claim_id: Any, claimant: Any = None, ref: Any = None) -> int:
+        """
+        Add a photo hash. A photo already indexed for the same claim is not added twice.
+
+        Args:
+            photo_hash: Hash from dhash.
+            claim_id: Claim the photo belongs to.
+            claimant: Claimant who filed the claim.
+            ref: Photo reference, e.g. its path.
+
+        Returns:
+            Row of the photo in the index.
+        """
+        with self._lock:
+            if (claim_id, ref) in self._rows:
+                return self._rows[(claim_id, ref)]
+            row = len(self.hashes)
+            self.hashes.append(photo_hash)
+            self.claim_ids.append(claim_id)
+            self.claimants.append(claimant)
+            self.refs.append(ref)
+            self._rows[(claim_id, ref)] = row
+            for table, (offset, width) in zip(self._tables, self._chunks):
+                table.setdefault((photo_hash >> offset) & ((1 << width) - 1), array("q")).append(row)
+            return row
+
+    def search(self, photo_hash: int, max_distance: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Find indexed photos within a Hamming distance of a hash.
+
+        Args:
+            photo_hash: Hash to look up.
+            max_distance: Largest distance to return; at most the index's max_distance.
+
+        Returns:
+            Matches ordered by distance, each with claim ID, claimant, reference and distance.
+        """
+        radius = min(self.max_distance if max_distance is None else max_distance, self.max_distance)
+        sub_radius = radius // len(self._chunks)
+        candidates = set()
+        with self._lock:
+            for table, (offset, width) in zip(self._tables, self._chunks):
+                chunk = (photo_hash >> offset) & ((1 << width) - 1)
+                for flip in self._flips(width, sub_radius):
+                    rows = table.get(chunk ^ flip)
+                    if rows:
+                        candidates.update(rows)
+
+        matches = []
+        for row in candidates:
+            distance = hamming_distance(photo_hash, self.hashes[row])
+            if distance <= radius:
+                matches.append({
+                    "claim_id": self.claim_ids[row],
+                    "claimant": self.claimants[row],
+                    "ref": self.refs[row],
+                    "distance": distance
+                })
+        return sorted(matches, key=lambda match: match["distance"])
+
+    def find_reused(self, photo_hash: int, claim_id: Any, claimant: Any = None) -> List[Dict[str, Any]]:
+        """
+        Find near-duplicates of a photo on other claimants' claims.
+
+        Matches on the same claim, or on another claim by the same known claimant, are
+        not reuse and are left out.
+
+        Args:
+            photo_hash: Hash of the photo to check.
+            claim_id: Claim the photo belongs to.
+            claimant: Claimant who filed the claim.
+
+        Returns:
+            Matches ordered by distance.
+        """
+        return [
+            match for match in self.search(photo_hash)
+            if match["claim_id"] != claim_id and (claimant is None or match["claimant"] != claimant)
+        ]
+
+    def backfill(
+        self,
+        photos: List[Tuple[Any, Any, str]],
+        max_workers: Optional[int] = None,
+        chunksize: int = 64
+    ) -> Dict[str, int]:
+        """
+        Hash and index existing claim photos in bulk with a process pool.
+
+        Args:
+            photos: (claim_id, claimant, path) for every photo in the document store.
+            max_workers: Number of worker processes. Defaults to the CPU count.
+            chunksize: Number of photos sent to a worker at a time.
+
+        Returns:
+            Dictionary with the number of photos indexed, skipped as already indexed, and failed.
+        """
+        pending = [photo for photo in photos if (photo[0], photo[2]) not in self._rows]
+        failed = 0
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            hashes = pool.map(_hash_file, [path for _, _, path in pending], chunksize=chunksize)
+            for (claim_id, claimant, path), photo_hash in zip(pending, hashes):
+                if photo_hash is None:
+                    failed += 1
+                    continue
+                self.add(photo_hash, claim_id, claimant, path)
+        logger.info(f"Backfilled {len(pending) - failed} photos ({failed} failed), index holds {len(self)}")
+        return {"indexed": len(pending) - failed, "skipped": len(photos) - len(pending), "failed": failed}
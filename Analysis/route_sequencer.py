@@ -0,0 +1,280 @@
+import re
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Any, Callable, Tuple
+import numpy as np
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_MILES = 3958.8
+
+def haversine_matrix(points: np.ndarray) -> np.ndarray:
+    """
+    Great-circle distances between every pair of points.
+
+    Args:
+        points: Array (n, 2) of (latitude, longitude) in degrees.
+
+    Returns:
+        Array (n, n) of distances in miles.
+    """
+    radians = np.radians(np.asarray(points, dtype=float))
+    lat, lon = radians[:, 0], radians[:, 1]
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def tour_length(tour: List[int], distances: np.ndarray) -> float:
+    """Total length of a tour given as a sequence of matrix indices."""
+    return float(distances[tour[:-1], tour[1:]].sum()) if len(tour) > 1 else 0.0
+
+def nearest_neighbor_tour(distances: np.ndarray, start: int = 0, closed: bool = True) -> List[int]:
+    """
+    Build a tour by always driving to the closest unvisited stop.
+
+    Args:
+        distances: Array (n, n) of travel distances.
+        start: Index the tour starts from (the depot).
+        closed: Whether the tour returns to start.
+
+    Returns:
+        List of indices visiting every stop once.
+    """
+    n = len(distances)
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    tour = [start]
+    for _ in range(n - 1):
+        candidates = np.where(visited, np.inf, distances[tour[-1]])
+        nearest = int(np.argmin(candidates))
+        visited[nearest] = True
+        tour.append(nearest)
+    if closed:
+        tour.append(start)
+    return tour
+
+def two_opt(tour: List[int], distances: np.ndarray, closed: bool = True, max_passes: int = 50) -> List[int]:
+    """
+    Improve a tour by reversing segments while that shortens it.
+
+    For each edge the gain of every possible reversal is computed in one
+    vectorized step, and the best one is applied. The first stop stays fixed.
+
+    Args:
+        tour: Tour as a list of indices, starting at the depot.
+        distances: Array (n, n) of travel distances.
+        closed: Whether the tour returns to its first stop.
+        max_passes: Maximum number of improvement passes.
+
+    Returns:
+        Improved tour.
+    """
+    tour = np.array(tour)
+    if not closed:
+        # An open tour behaves like a closed one with a free return edge
+        distances = np.pad(distances, ((0, 1), (0, 1)))
+        tour = np.append(tour, len(distances) - 1)
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(len(tour) - 3):
+            j = np.arange(i + 2, len(tour) - 1)
+            gain = (distances[tour[i], tour[i + 1]] + distances[tour[j], tour[j + 1]]
+                    - distances[tour[i], tour[j]] - distances[tour[i + 1], tour[j + 1]])
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                tour[i + 1:j[best] + 1] = tour[i + 1:j[best] + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+
+    return tour[:-1].tolist() if not closed else tour.tolist()
+
+def or_opt(
+    tour: List[int],
+    distances: np.ndarray,
+    closed: bool = True,
+    max_segment: int = 3,
+    max_passes: int = 50
+) -> List[int]:
+    """
+    Improve a tour by moving short runs of stops to a better place.
+
+    Catches improvements 2-opt cannot reach, such as one out-of-the-way stop
+    visited between the wrong neighbors. For each run the gain of every
+    insertion point, forward and reversed, is computed in one vectorized step,
+    and the best one is applied, so a pass is O(n * max_segment) array
+    operations. The first stop stays fixed.
+
+    Args:
+        tour: Tour as a list of indices, starting at the depot.
+        distances: Array (n, n) of travel distances.
+        closed: Whether the tour returns to its first stop.
+        max_segment: Longest run of stops moved at once.
+        max_passes: Maximum number of improvement passes.
+
+    Returns:
+        Improved tour.
+    """
+    tour = np.array(tour)
+    if not closed:
+        # An open tour behaves like a closed one with a free return edge
+        distances = np.pad(distances, ((0, 1), (0, 1)))
+        tour = np.append(tour, len(distances) - 1)
+
+    for _ in range(max_passes):
+        improved = False
+        for length in range(1, max_segment + 1):
+            # The run tour[i:i + length] lies strictly between the fixed ends
+            for i in range(1, len(tour) - length):
+                segment = tour[i:i + length]
+                first, last = segment[0], segment[-1]
+                before, after = tour[i - 1], tour[i + length]
+                removal = distances[before, first] + distances[last, after] - distances[before, after]
+                # Reversing the run changes its own length on asymmetric road distances
+                reversal = (distances[segment[1:], segment[:-1]].sum()
+                            - distances[segment[:-1], segment[1:]].sum())
+
+                rest = np.concatenate([tour[:i], tour[i + length:]])
+                a, b = rest[:-1], rest[1:]
+                forward = distances[a, first] + distances[last, b] - distances[a, b]
+                backward = distances[a, last] + distances[first, b] - distances[a, b] + reversal
+                # Putting the run back where it was is no move
+                forward[i - 1] = np.inf
+                cost = np.minimum(forward, backward)
+                best = int(np.argmin(cost))
+                if removal - cost[best] > 1e-9:
+                    piece = segment if forward[best] <= backward[best] else segment[::-1]
+                    tour = np.concatenate([rest[:best + 1], piece, rest[best + 1:]])
+                    improved = True
+        if not improved:
+            break
+
+    return tour[:-1].tolist() if not closed else tour.tolist()
+
+def parse_coordinates(value: Any) -> Optional[Tuple[float, float]]:
+    """
+    Read (latitude, longitude) from a pair, a dict or a 'lat,lon' string.
+
+    Args:
+        value: Coordinates in any supported form.
+
+    Returns:
+        (latitude, longitude), or None if the value is not a coordinate.
+    """
+    if isinstance(value, dict) and "lat" in value:
+        return float(value["lat"]), float(value.get("lon", value.get("lng")))
+    if isinstance(value, (tuple, list)) and len(value) == 2:
+        return float(value[0]), float(value[1])
+    if isinstance(value, str):
+        match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*", value)
+        if match:
+            return float(match.group(1)), float(match.group(2))
+    return None
+
+class RouteSequencer:
+    """
+    Orders each crew's jobs for the day to minimize travel from and back to its depot.
+
+    Distances for every job site and depot are computed once up front, then each
+    crew-day is sequenced with nearest neighbor followed by 2-opt and Or-opt. The
+    default metric is haversine distance scaled by a road circuity factor; an
+    offline road graph can be used instead by passing its all-pairs distance function.
+    """
+
+    def __init__(
+        self,
+        distance_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        circuity_factor: float = 1.3,
+        average_speed_mph: float = 35.0,
+        return_to_depot: bool = True
+    ):
+        """
+        Initialize the route sequencer.
+
+        Args:
+            distance_fn: Function mapping an (n, 2) array of coordinates to an (n, n) matrix of
+                road miles. If None, haversine distance times circuity_factor is used.
+            circuity_factor: Ratio of road to straight-line distance for the haversine metric.
+            average_speed_mph: Average driving speed used for travel time estimates.
+            return_to_depot: Whether crews drive back to their depot at the end of the day.
+        """
+        self.distance_fn = distance_fn or (lambda points: haversine_matrix(points) * circuity_factor)
+        self.average_speed_mph = average_speed_mph
+        self.return_to_depot = return_to_depot
+
+    def _order(self, local: np.ndarray, closed: bool) -> List[int]:
+        """Order the stops of one crew-day, starting from the first."""
+        tour = nearest_neighbor_tour(local, closed=closed)
+        # Alternate the two move types until neither helps
+        length = np.inf
+        while tour_length(tour, local) < length - 1e-9:
+            length = tour_length(tour, local)
+            tour = two_opt(tour, local, closed=closed)
+            tour = or_opt(tour, local, closed=closed)
+        return tour
+
+    def sequence(
+        self,
+        jobs: List[Dict[str, Any]],
+        depots: Dict[Any, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Sequence every crew-day.
+
+        Crews without a depot are still sequenced: their route starts at the day's
+        first job in input order and does not return anywhere.
+
+        Args:
+            jobs: Jobs with 'job_id', 'crew_id', 'coordinates', 'start_date' and 'end_date'
+                (YYYY-MM-DD, end exclusive). A multi-day job is visited on each of its days.
+            depots: Depot coordinates by crew ID.
+
+        Returns:
+            List of routes, one per crew-day, with the ordered job IDs, whether the route
+            starts from a depot, the leg distances, total miles and minutes, and the miles
+            the input order would have driven.
+        """
+        # One distance matrix for every depot and job site
+        crew_ids = list(depots)
+        points = [parse_coordinates(depots[crew_id]) for crew_id in crew_ids]
+        points += [parse_coordinates(job["coordinates"]) for job in jobs]
+        distances = self.distance_fn(np.array(points, dtype=float).reshape(-1, 2))
+        depot_index = {crew_id: i for i, crew_id in enumerate(crew_ids)}
+
+        crew_days = defaultdict(list)
+        for j, job in enumerate(jobs):
+            if job.get("crew_id") not in depot_index:
+                logger.info(f"No depot for crew {job.get('crew_id')}, routing job {job.get('job_id')} from its first job")
+            days = np.arange(np.datetime64(job["start_date"], "D"), np.datetime64(job["end_date"], "D"))
+            for day in days:
+                crew_days[(job.get("crew_id"), str(day))].append(len(crew_ids) + j)
+
+        routes = []
+        for (crew_id, date), stops in sorted(crew_days.items(), key=lambda item: (item[0][1], str(item[0][0]))):
+            from_depot = crew_id in depot_index
+            nodes = ([depot_index[crew_id]] if from_depot else []) + stops
+            closed = from_depot and self.return_to_depot
+            local = distances[np.ix_(nodes, nodes)]
+            tour = self._order(local, closed)
+            baseline = list(range(len(nodes))) + ([0] if closed else [])
+
+            legs = local[tour[:-1], tour[1:]]
+            miles = float(legs.sum())
+            routes.append({
+                "crew_id": crew_id,
+                "date": date,
+                "from_depot": from_depot,
+                "stops": [jobs[nodes[i] - len(crew_ids)]["job_id"] for i in tour if not (from_depot and i == 0)],
+                "leg_miles": [float(leg) for leg in legs],
+                "total_miles": miles,
+                "travel_minutes": miles / self.average_speed_mph * 60,
+                "unsequenced_miles": tour_length(baseline, local)
+            })
+        return routes
@@ -1,10 +1,15 @@
 import os
 import json
+import asyncio
 import logging
 import datetime
 from typing import Dict, List, Optional, Union, Any
-import requests
+import httpx
+import numpy as np
 from ..common.llm_provider import LLMProviderFactory
+from .forecast_cache import ForecastCache, HourlyForecastCache, pack_hourly, unpack_hourly
+from .fleet_scheduler import FleetScheduler
+from .route_sequencer import RouteSequencer, parse_coordinates
 
 # Configure logging
 logging.basicConfig(
@@ -13,6 +18,152 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Furthest the weather API's daily forecast reaches
+MAX_FORECAST_DAYS = 16
+
+# Fixed-point resolution of daily scores in window sums
+SCORE_SCALE = 2 ** 32
+
+def _sliding_min(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Minimum of every window along the last axis in O(n) (van Herk/Gil-Werman).
+    
+    Args:
+        values: Array of values (..., n) with no NaNs.
+        window: Window length.
+        
+    Returns:
+        Array (..., n - window + 1) of window minimums.
+    """
+    n = values.shape[-1]
+    pad = (-n) % window
+    padded = np.concatenate([values, np.full(values.shape[:-1] + (pad,), np.inf)], axis=-1)
+    blocks = padded.reshape(values.shape[:-1] + (-1, window))
+    prefix = np.minimum.accumulate(blocks, axis=-1).reshape(padded.shape)
+    suffix = np.minimum.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(padded.shape)
+    return np.minimum(suffix[..., :n - window + 1], prefix[..., window - 1:n])
+
+def window_scores(daily_scores: np.ndarray, duration: int, aggregate: str = "mean") -> np.ndarray:
+    """
+    Score every window of consecutive days along the last axis.
+    
+    Args:
+        daily_scores: Array of daily suitability scores (..., days). NaN marks days
+            that are unavailable or outside the forecast.
+        duration: Window length in days.
+        aggregate: How to combine the days of a window ('mean' or 'min').
+        
+    Returns:
+        Array (..., days - duration + 1) indexed by window start day. NaN where the
+        window contains an unavailable day.
+    """
+    daily_scores = np.asarray(daily_scores, dtype=float)
+    days = daily_scores.shape[-1]
+    if duration < 1 or days < duration:
+        return np.full(daily_scores.shape[:-1] + (max(days - duration + 1, 0),), np.nan)
+    
+    available = ~np.isnan(daily_scores)
+    filled = np.where(available, daily_scores, 0.0)
+    
+    # Prefix sums give every window's available-day count in O(n)
+    zero = np.zeros(daily_scores.shape[:-1] + (1,))
+    available_prefix = np.concatenate([zero, np.cumsum(available, axis=-1)], axis=-1)
+    complete = (available_prefix[..., duration:] - available_prefix[..., :-duration]) == duration
+    
+    if aggregate == "min":
+        scores = _sliding_min(filled, duration)
+    else:
+        # Float prefix sums round differently depending on where the axis starts;
+        # on fixed-point scores every window sum is exact, so equal windows tie
+        # exactly and rank earliest-first however the days are laid out
+        fixed = np.rint(filled * SCORE_SCALE).astype(np.int64)
+        score_prefix = np.concatenate([zero.astype(np.int64), np.cumsum(fixed, axis=-1)], axis=-1)
+        scores = (score_prefix[..., duration:] - score_prefix[..., :-duration]) / (SCORE_SCALE * duration)
+    
+    return np.where(complete, scores, np.nan)
+
+def top_k_windows(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Get the start indices of the k best-scoring windows.
+    
+    Args:
+        scores: 1-D array of window scores, NaN for invalid windows.
+        k: Number of windows to return.
+        
+    Returns:
+        Start indices ordered by descending score, earliest start first on ties.
+    """
+    valid = np.flatnonzero(~np.isnan(scores))
+    return valid[np.lexsort((valid, -scores[valid]))][:k]
+
+def block_mask(workable: np.ndarray, min_hours: int) -> np.ndarray:
+    """
+    Keep only runs of consecutive workable hours at least min_hours long.
+    
+    Args:
+        workable: 1-D boolean array of workable hours.
+        min_hours: Shortest run worth sending a crew out for.
+        
+    Returns:
+        Boolean array, True for hours inside a long enough run.
+    """
+    workable = np.asarray(workable, dtype=bool)
+    run_starts = workable & ~np.concatenate([[False], workable[:-1]])
+    run_ids = np.cumsum(run_starts) - 1
+    run_lengths = np.bincount(run_ids[workable], minlength=max(int(run_starts.sum()), 1))
+    return workable & (run_lengths[np.maximum(run_ids, 0)] >= min_hours)
+
+def cap_daily_hours(usable: np.ndarray, day: np.ndarray, max_hours: int) -> np.ndarray:
+    """
+    Keep at most max_hours usable hours per day, earliest first.
+    
+    Args:
+        usable: 1-D boolean array of usable hours.
+        day: Day of each hour, in time order.
+        max_hours: Hours a crew works per day.
+        
+    Returns:
+        Boolean array, True for the usable hours within each day's cap.
+    """
+    usable = np.asarray(usable, dtype=bool)
+    if not len(usable):
+        return usable
+    new_day = np.concatenate([[True], day[1:] != day[:-1]])
+    usable_count = np.concatenate([[0], np.cumsum(usable)])
+    day_offset = usable_count[np.flatnonzero(new_day)][np.cumsum(new_day) - 1]
+    return usable & (usable_count[1:] - day_offset <= max_hours)
+
+def hour_windows(usable: np.ndarray, hour_scores: np.ndarray, need_hours: int) -> Dict[str, np.ndarray]:
+    """
+    Pack a job needing need_hours of work into usable hours from every possible start.
+    
+    A job starting at hour i works every usable hour from i on until it has
+    need_hours, so its end is found from the running count of usable hours with a
+    single searchsorted for all starts.
+    
+    Args:
+        usable: 1-D boolean array of usable work hours.
+        hour_scores: Suitability score of each hour.
+        need_hours: Work hours the job needs.
+        
+    Returns:
+        Dictionary with 'start' and 'end' hour indices (end exclusive) and the mean
+        'score' of the hours worked, for every start that can finish in the horizon.
+    """
+    usable = np.asarray(usable, dtype=bool)
+    usable_count = np.concatenate([[0], np.cumsum(usable)])
+    score_sum = np.concatenate([[0.0], np.cumsum(np.where(usable, hour_scores, 0.0))])
+    
+    # Jobs start on the first hour of a usable run
+    starts = np.flatnonzero(usable & ~np.concatenate([[False], usable[:-1]]))
+    starts = starts[usable_count[-1] - usable_count[starts] >= need_hours]
+    ends = np.searchsorted(usable_count, usable_count[starts] + need_hours)
+    return {
+        "start": starts,
+        "end": ends,
+        "score": (score_sum[ends] - score_sum[starts]) / need_hours
+    }
+
 class Scheduler:
     """
     DSPy-based agent for optimizing roofing project schedules.
@@ -23,7 +174,11 @@ class Scheduler:
         self,
         llm_provider_type: str = "openai",
         llm_model: str = "gpt-4-turbo",
-        weather_api_key: Optional[str] = None
+        weather_api_key: Optional[str] = None,
+        forecast_cache: Optional[ForecastCache] = None,
+        hourly_forecast_cache: Optional[HourlyForecastCache] = None,
+        route_sequencer: Optional[RouteSequencer] = None,
+        http_client: Optional[httpx.AsyncClient] = None
     ):
         """
         Initialize the scheduler.
@@ -32,12 +187,27 @@ class Scheduler:
             llm_provider_type: Type of LLM provider to use ('openai', 'anthropic', 'mistral', 'ollama').
             llm_model: Model name to use for the LLM.
             weather_api_key: API key for weather services. If None, will try to get from environment.
+            forecast_cache: Forecast cache shared across schedulers. If None, one is created
+                from the FORECAST_CACHE_URL environment variable.
+            hourly_forecast_cache: Hourly forecast cache shared across schedulers. If None,
+                a new in-process cache is created.
+            route_sequencer: Sequencer for ordering crews' daily jobs. If None, one using
+                haversine distances is created.
+            http_client: Client for the weather API, shared so that fetches reuse pooled
+                connections. If None, one is created on first use and closed by close().
         """
         self.llm_provider = LLMProviderFactory.create_provider(
             llm_provider_type,
             model=llm_model
         )
         self.weather_api_key = weather_api_key or os.environ.get("OPENWEATHERMAP_API_KEY")
+        self.forecast_cache = forecast_cache or ForecastCache.from_env()
+        self.hourly_forecast_cache = hourly_forecast_cache or HourlyForecastCache()
+        self.route_sequencer = route_sequencer or RouteSequencer()
+        self.http_client = http_client
+        self._owns_http_client = http_client is None
+        # Set once the API key turns out to lack the paid hourly forecast
+        self.hourly_plan_unavailable = False
         
         # Define weather constraints for roofing work
         self.weather_constraints = {
@@ -56,12 +226,32 @@ class Scheduler:
             }
         }
         
+        # Work hours and block rules for hourly scheduling
+        self.hourly_constraints = {
+            "work_start_hour": 7,   # Earliest local start hour
+            "work_end_hour": 19,    # Local hour work must stop by
+            "hours_per_day": 8,     # Crew hours per day
+            "min_block_hours": 2,   # Shortest block worth sending a crew out for
+            "min_hour_score": 0.6   # Lowest hourly suitability counted as workable
+        }
+        
+        # Score multipliers for adverse weather conditions
+        self.weather_condition_factors = {
+            "Rain": 0.2,
+            "Thunderstorm": 0.2,
+            "Snow": 0.2,
+            "Drizzle": 0.7,
+            "Mist": 0.7,
+            "Fog": 0.7
+        }
+        
         # Define resource requirements by project type
         self.resource_requirements = {
             "small_repair": {
                 "crew_size": 2,
                 "equipment": ["ladder", "hand_tools"],
-                "duration_days": 1
+                "duration_days": 1,
+                "daily_hours": 4    # Half a day, so a crew can take two in one day
             },
             "medium_repair": {
                 "crew_size": 3,
@@ -90,61 +280,93 @@ class Scheduler:
             }
         }
     
-    async def _get_weather_forecast(self, location: str, days: int = 7) -> List[Dict[str, Any]]:
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the weather API client, creating it on first use."""
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(timeout=10.0)
+        return self.http_client
+    
+    async def close(self):
+        """Close the weather API client if the scheduler created it."""
+        if self.http_client is not None and self._owns_http_client:
+            await self.http_client.aclose()
+            self.http_client = None
+    
+    async def get_weather_forecast(self, location: str, days: int = 7) -> List[Dict[str, Any]]:
         """
         Get weather forecast for a location.
         
+        Forecasts are served from the forecast cache, so nearby locations and
+        repeated requests within the provider's update interval share one API call.
+        
         Args:
             location: Location string (city, state, zip, etc.).
-            days: Number of days to forecast.
+            days: Number of days to forecast, at most MAX_FORECAST_DAYS.
             
         Returns:
             List of daily weather forecasts.
         """
+        days = min(days, MAX_FORECAST_DAYS)
         if not self.weather_api_key:
             logger.warning("No weather API key provided, using simulated weather data")
             return self._get_simulated_weather(days)
         
         try:
-            # Use OpenWeatherMap API for forecast
-            url = f"https://api.openweathermap.org/data/2.5/forecast/daily"
-            params = {
-                "q": location,
-                "cnt": days,
-                "units": "imperial",  # Use Fahrenheit
-                "appid": self.weather_api_key
-            }
-            
-            response = requests.get(url, params=params)
-            
-            if response.status_code != 200:
-                logger.error(f"Error from weather API: {response.text}")
-                return self._get_simulated_weather(days)
-            
-            data = response.json()
-            
-            # Format the forecast data
-            forecast = []
-            for day in data.get("list", []):
-                forecast.append({
-                    "date": datetime.datetime.fromtimestamp(day["dt"]).strftime("%Y-%m-%d"),
-                    "temp": {
-                        "min": day["temp"]["min"],
-                        "max": day["temp"]["max"],
-                        "day": day["temp"]["day"]
-                    },
-                    "humidity": day["humidity"],
-                    "wind_speed": day["speed"],
-                    "precipitation": day.get("rain", 0),
-                    "weather_condition": day["weather"][0]["main"],
-                    "weather_description": day["weather"][0]["description"]
-                })
-            
-            return forecast
+            return await self.forecast_cache.get_forecast(location, days, self._fetch_weather_forecast)
         except Exception as e:
             logger.error(f"Error getting weather forecast: {e}")
             return self._get_simulated_weather(days)
     
+    async def _fetch_weather_forecast(self, location: str, days: int = 7) -> List[Dict[str, Any]]:
+        """
+        Fetch a daily weather forecast from the weather API.
+        
+        Args:
+            location: Location string (city, state, zip, etc.).
+            days: Number of days to forecast.
+            
+        Returns:
+            List of daily weather forecasts.
+            
+        Raises:
+            httpx.HTTPError: If the weather API request fails.
+        """
+        # Use OpenWeatherMap API for forecast
+        url = f"https://api.openweathermap.org/data/2.5/forecast/daily"
+        params = {
+            "q": location,
+            "cnt": days,
+            "units": "imperial",  # Use Fahrenheit
+            "appid": self.weather_api_key
+        }
+        
+        response = await self._get_http_client().get(url, params=params)
+        
+        if response.status_code != 200:
+            logger.error(f"Error from weather API: {response.text}")
+            response.raise_for_status()
+        
+        data = response.json()
+        
+        # Format the forecast data
+        forecast = []
+        for day in data.get("list", []):
+            forecast.append({
+                "date": datetime.datetime.fromtimestamp(day["dt"]).strftime("%Y-%m-%d"),
+                "temp": {
+                    "min": day["temp"]["min"],
+                    "max": day["temp"]["max"],
+                    "day": day["temp"]["day"]
+                },
+                "humidity": day["humidity"],
+                "wind_speed": day["speed"],
+                "precipitation": day.get("rain", 0),
+                "weather_condition": day["weather"][0]["main"],
+                "weather_description": day["weather"][0]["description"]
+            })
+        
+        return forecast
+    
     def _get_simulated_weather(self, days: int = 7) -> List[Dict[str, Any]]:
         """
         Generate simulated weather data for testing.
@@ -202,6 +424,228 @@ class Scheduler:
         
         return forecast
     
+    async def _get_hourly_forecast(self, location: str, hours: int = 96) -> Dict[str, np.ndarray]:
+        """
+        Get hourly weather forecast for a location as columns.
+        
+        Args:
+            location: Location string (city, state, zip, etc.).
+            hours: Number of hours to forecast, starting with the current hour.
+            
+        Returns:
+            Dictionary of hourly columns (time, local_time, temp, wind_speed,
+            precipitation, humidity, weather_condition).
+        """
+        if not self.weather_api_key:
+            logger.warning("No weather API key provided, using simulated hourly weather data")
+            return unpack_hourly(pack_hourly(self._get_simulated_hourly_weather(hours)), 0)
+        
+        try:
+            return await self.hourly_forecast_cache.get_hourly(location, hours, self._fetch_hourly_forecast)
+        except Exception as e:
+            logger.error(f"Error getting hourly weather forecast: {e}")
+            return unpack_hourly(pack_hourly(self._get_simulated_hourly_weather(hours)), 0)
+    
+    async def _fetch_hourly_forecast(self, location: str, hours: int = 96) -> List[Dict[str, Any]]:
+        """
+        Fetch an hourly weather forecast from the weather API.
+        
+        The hourly forecast (pro.openweathermap.org) needs a paid OpenWeatherMap
+        plan. When the key is refused there, the free 5-day forecast in 3-hour
+        steps is used instead, each step standing for its three hours, and the
+        paid endpoint is not tried again.
+        
+        Args:
+            location: Location string (city, state, zip, etc.).
+            hours: Number of hours to forecast (at most 96 hourly, or 120 from 3-hour data).
+            
+        Returns:
+            List of hourly weather forecasts with UTC epoch time and the location's UTC offset.
+            
+        Raises:
+            httpx.HTTPError: If the weather API request fails.
+        """
+        if not self.hourly_plan_unavailable:
+            params = {
+                "q": location,
+                "cnt": min(hours, 96),
+                "units": "imperial",  # Use Fahrenheit
+                "appid": self.weather_api_key
+            }
+            response = await self._get_http_client().get(
+                "https://pro.openweathermap.org/data/2.5/forecast/hourly", params=params
+            )
+            if response.status_code in (401, 403):
+                logger.warning("Weather API key has no hourly forecast plan, using 3-hour forecasts")
+                self.hourly_plan_unavailable = True
+            else:
+                if response.status_code != 200:
+                    logger.error(f"Error from hourly weather API: {response.text}")
+                    response.raise_for_status()
+                return self._parse_hourly_forecast(response.json(), step_hours=1)
+        
+        params = {
+            "q": location,
+            "cnt": min(-(-hours // 3), 40),
+            "units": "imperial",
+            "appid": self.weather_api_key
+        }
+        response = await self._get_http_client().get("https://api.openweathermap.org/data/2.5/forecast", params=params)
+        if response.status_code != 200:
+            logger.error(f"Error from 3-hour weather API: {response.text}")
+            response.raise_for_status()
+        return self._parse_hourly_forecast(response.json(), step_hours=3)[:hours]
+    
+    def _parse_hourly_forecast(self, data: Dict[str, Any], step_hours: int) -> List[Dict[str, Any]]:
+        """
+        Convert an OpenWeatherMap forecast response into hourly rows.
+        
+        Args:
+            data: Response body of the hourly or 3-hour forecast.
+            step_hours: Hours each forecast entry covers; its values are repeated for each.
+            
+        Returns:
+            List of hourly weather forecasts with UTC epoch time and the location's UTC offset.
+        """
+        utc_offset = data.get("city", {}).get("timezone", 0)
+        rain_key = f"{step_hours}h"
+        
+        forecast = []
+        for entry in data.get("list", []):
+            # Rain volume is reported in millimeters regardless of units, per step
+            precipitation = entry.get("rain", {}).get(rain_key, 0) / 25.4 / step_hours
+            for hour in range(step_hours):
+                forecast.append({
+                    "time": entry["dt"] + hour * 3600,
+                    "utc_offset": utc_offset,
+                    "temp": entry["main"]["temp"],
+                    "humidity": entry["main"]["humidity"],
+                    "wind_speed": entry["wind"]["speed"],
+                    "precipitation": precipitation,
+                    "weather_condition": entry["weather"][0]["main"]
+                })
+        
+        return forecast
+    
+    def _get_simulated_hourly_weather(self, hours: int = 96) -> List[Dict[str, Any]]:
+        """
+        Generate simulated hourly weather data for testing.
+        
+        Args:
+            hours: Number of hours to simulate, starting with the current hour.
+            
+        Returns:
+            List of simulated hourly weather forecasts.
+        """
+        import random
+        
+        forecast = []
+        current_hour = int(datetime.datetime.now().timestamp()) // 3600 * 3600
+        shower_hours = 0
+        
+        for i in range(hours):
+            timestamp = current_hour + i * 3600
+            hour_of_day = timestamp // 3600 % 24
+            
+            # Warmest mid-afternoon, coolest before dawn
+            temp = 62 + 12 * np.cos((hour_of_day - 15) / 24 * 2 * np.pi) + random.uniform(-3, 3)
+            
+            # Showers last a few hours once they start
+            if shower_hours == 0 and random.random() < 0.04:
+                shower_hours = random.randint(1, 4)
+            if shower_hours > 0:
+                shower_hours -= 1
+                weather_condition = random.choice(["Rain", "Drizzle", "Thunderstorm"])
+                precipitation = random.uniform(0.05, 0.4)
+            else:
+                weather_condition = random.choices(["Clear", "Clouds"], weights=[0.6, 0.4])[0]
+                precipitation = 0
+            
+            forecast.append({
+                "time": timestamp,
+                "utc_offset": 0,
+                "temp": temp,
+                "humidity": random.randint(40, 90),
+                "wind_speed": random.uniform(0, 25),
+                "precipitation": precipitation,
+                "weather_condition": weather_condition
+            })
+        
+        return forecast
+    
+    def _forecast_to_columns(self, forecast: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Convert a list of daily forecasts into columnar arrays.
+        
+        Args:
+            forecast: List of daily weather forecasts.
+        
+        Returns:
+            Dictionary of arrays (temp, wind_speed, precipitation, humidity, weather_condition).
+        """
+        return {
+            "temp": np.array([day["temp"]["day"] for day in forecast], dtype=float),
+            "wind_speed": np.array([day["wind_speed"] for day in forecast], dtype=float),
+            "precipitation": np.array([day["precipitation"] for day in forecast], dtype=float),
+            "humidity": np.array([day["humidity"] for day in forecast], dtype=float),
+            "weather_condition": np.array([day["weather_condition"] for day in forecast], dtype=object)
+        }
+    
+    def score_weather_arrays(
+        self,
+        temp: np.ndarray,
+        wind_speed: np.ndarray,
+        precipitation: np.ndarray,
+        humidity: np.ndarray,
+        weather_condition: np.ndarray
+    ) -> np.ndarray:
+        """
+        Evaluate weather suitability for many days and locations in one pass.
+        
+        Applies the same formula as _evaluate_weather_suitability element-wise, so
+        the arrays can have any matching shape, e.g. (locations, days).
+        
+        Args:
+            temp: Day temperatures in Fahrenheit.
+            wind_speed: Wind speeds in mph.
+            precipitation: Precipitation in inches.
+            humidity: Humidity percentages.
+            weather_condition: Weather condition names (e.g. 'Rain'); None for padding.
+        
+        Returns:
+            Array of suitability scores from 0 (unsuitable) to 1 (perfect). NaN where
+            the temperature is NaN, so padded days drop out of window searches.
+        """
+        temp = np.asarray(temp, dtype=float)
+        wind_speed = np.asarray(wind_speed, dtype=float)
+        precipitation = np.asarray(precipitation, dtype=float)
+        humidity = np.asarray(humidity, dtype=float)
+        
+        temp_min = self.weather_constraints["temperature"]["min"]
+        temp_max = self.weather_constraints["temperature"]["max"]
+        wind_max = self.weather_constraints["wind_speed"]["max"]
+        precip_max = self.weather_constraints["precipitation"]["max"]
+        humidity_max = self.weather_constraints["humidity"]["max"]
+        
+        # Factors are 1.0 where a constraint is met, so multiplying in the same
+        # order as the scalar path gives identical results
+        score = np.ones(temp.shape)
+        score *= np.where(
+            temp < temp_min,
+            np.maximum(0, temp / temp_min),
+            np.where(temp > temp_max, np.maximum(0, 1 - (temp - temp_max) / 20), 1.0)
+        )
+        score *= np.where(wind_speed > wind_max, np.maximum(0, 1 - (wind_speed - wind_max) / 15), 1.0)
+        score *= np.where(precipitation > precip_max, np.maximum(0, 1 - (precipitation - precip_max) / 0.5), 1.0)
+        score *= np.where(humidity > humidity_max, np.maximum(0, 1 - (humidity - humidity_max) / 15), 1.0)
+        
+        # Map each distinct condition once instead of once per day
+        conditions, inverse = np.unique(np.asarray(weather_condition, dtype=str), return_inverse=True)
+        condition_factors = np.array([self.weather_condition_factors.get(c, 1.0) for c in conditions])
+        score *= condition_factors[inverse].reshape(score.shape)
+        
+        return np.where(np.isnan(temp), np.nan, score)
+    
     async def _evaluate_weather_suitability(self, forecast: Dict[str, Any]) -> float:
         """
         Evaluate the suitability of weather for roofing work.
@@ -249,12 +693,9 @@ class Scheduler:
         
         # Check weather condition
         condition = forecast["weather_condition"]
-        if condition in ["Rain", "Thunderstorm", "Snow"]:
-            # Bad weather condition
-            score *= 0.2
-        elif condition in ["Drizzle", "Mist", "Fog"]:
-            # Suboptimal weather condition
-            score *= 0.7
+        if condition in self.weather_condition_factors:
+            # Bad or suboptimal weather condition
+            score *= self.weather_condition_factors[condition]
         
         return score
     
@@ -356,7 +797,10 @@ class Scheduler:
         project_details: Dict[str, Any],
         location: str,
         available_dates: List[str],
-        available_resources: Dict[str, Any]
+        available_resources: Dict[str, Any],
+        top_k: int = 3,
+        window_aggregate: str = "mean",
+        resolution: str = "daily"
     ) -> Dict[str, Any]:
         """
         Schedule a roofing project based on weather and resource constraints.
@@ -366,58 +810,706 @@ class Scheduler:
             location: Location string for weather forecast.
             available_dates: List of available date strings (YYYY-MM-DD).
             available_resources: Dictionary of available resources.
+            top_k: Number of candidate start dates to suggest.
+            window_aggregate: How to score a multi-day window from its daily scores
+                ('mean', or 'min' to rank by the worst day).
+            resolution: 'daily' to schedule whole days from the daily forecast, or
+                'hourly' to pack the work into workable hour blocks.
             
         Returns:
-            Dictionary with scheduling details.
+            Dictionary with scheduling details. Available dates past the
+            MAX_FORECAST_DAYS forecast are not scheduled and are listed under
+            'beyond_forecast'.
         """
+        if resolution == "hourly":
+            return await self._schedule_project_hourly(
+                project_details, location, available_dates, available_resources, top_k=top_k
+            )
+        
         try:
             # Determine project type
             project_type = await self._determine_project_type(project_details)
             
-            # Get weather forecast for the location
-            forecast = await self._get_weather_forecast(location)
+            # Get weather forecast for the location, far enough ahead to cover
+            # the last available date the API can forecast
+            today = np.datetime64(datetime.date.today(), "D")
+            forecast_days = 7
+            if available_dates:
+                last_date = np.datetime64(max(available_dates), "D")
+                forecast_days = max(forecast_days, int((last_date - today).astype(int)) + 1)
+            forecast_days = min(forecast_days, MAX_FORECAST_DAYS)
+            forecast = await self.get_weather_forecast(location, days=forecast_days)
+            beyond_forecast = self._dates_beyond(available_dates, today + forecast_days)
             
             # Filter forecast to only include available dates
-            available_forecast = [f for f in forecast if f["date"] in available_dates]
+            available_date_set = set(available_dates)
+            available_forecast = [f for f in forecast if f["date"] in available_date_set]
             
             if not available_forecast:
-                logger.warning("No available dates in forecast range")
+                reason = self._no_dates_reason(beyond_forecast)
+                logger.warning(reason)
                 return {
                     "project_details": project_details,
                     "location": location,
                     "is_scheduled": False,
-                    "reason": "No available dates in forecast range",
-                    "suggested_dates": []
+                    "reason": reason,
+                    "suggested_dates": [],
+                    "beyond_forecast": beyond_forecast
                 }
             
-            # Evaluate weather suitability for each day
-            weather_scores = []
-            for day in available_forecast:
-                score = await self._evaluate_weather_suitability(day)
-                weather_scores.append({
-                    "date": day["date"],
-                    "score": score,
-                    "forecast": day
-                })
+            # Lay out daily suitability on a date-indexed axis; NaN marks days
+            # that are unavailable or missing from the forecast
+            forecast_dates = np.array([day["date"] for day in available_forecast], dtype="datetime64[D]")
+            origin = forecast_dates.min()
+            day_index = (forecast_dates - origin).astype(int)
+            daily_scores = np.full(day_index.max() + 1, np.nan)
             
-            # Sort by weather suitability score (descending)
-            weather_scores.sort(key=lambda x: x["score"], reverse=True)
+            # Evaluate weather suitability for every day in one pass
+            scores = self.score_weather_arrays(**self._forecast_to_columns(available_forecast))
+            daily_scores[day_index] = scores
+            weather_scores = [
+                {"date": day["date"], "score": float(score), "forecast": day}
+                for day, score in zip(available_forecast, scores)
+            ]
             
             # Get project duration
             duration = self.resource_requirements[project_type]["duration_days"]
             
-            # Find the best consecutive days for the project
-            best_start_date = None
-            best_avg_score = 0
-            
-            for i in range(len(weather_scores) - duration + 1):
-                # Check if these days are consecutive
-                current_date = datetime.datetime.strptime(weather_scores[i]["date"], "%Y-%m-%d")
-                consecutive = True
-                
-                for j in range(1, duration):
-                    next_date = current_date + datetime.timedelta(days=j)
-                    next_date_str = next_date.strftime("%Y-%m-%d")
-                    
-                    if i + j >= len(weather_scores) or weather_scores[i + j]["date"] !=
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+            # Score every run of consecutive available days in one pass
+            scores = window_scores(daily_scores, duration, aggregate=window_aggregate)
+            best_starts = top_k_windows(scores, top_k)
+            
+            if len(best_starts) == 0:
+                logger.warning(f"No {duration} consecutive available days in forecast range")
+                return {
+                    "project_details": project_details,
+                    "location": location,
+                    "is_scheduled": False,
+                    "reason": f"No {duration} consecutive available days in forecast range",
+                    "suggested_dates": [],
+                    "weather_scores": weather_scores,
+                    "beyond_forecast": beyond_forecast
+                }
+            
+            suggested_dates = []
+            for start in best_starts:
+                start_date = origin + start
+                suggested_dates.append({
+                    "start_date": str(start_date),
+                    "end_date": str(start_date + duration),
+                    "score": float(scores[start])
+                })
+            
+            best_start_date = suggested_dates[0]["start_date"]
+            resource_allocation = await self._allocate_resources(
+                project_type,
+                best_start_date,
+                available_resources
+            )
+            
+            return {
+                "project_details": project_details,
+                "location": location,
+                "is_scheduled": True,
+                "project_type": project_type,
+                "start_date": best_start_date,
+                "end_date": resource_allocation["end_date"],
+                "weather_score": suggested_dates[0]["score"],
+                "suggested_dates": suggested_dates,
+                "weather_scores": weather_scores,
+                "resource_allocation": resource_allocation,
+                "beyond_forecast": beyond_forecast
+            }
+        except Exception as e:
+            logger.error(f"Error scheduling project: {e}")
+            return {
+                "project_details": project_details,
+                "location": location,
+                "is_scheduled": False,
+                "reason": str(e),
+                "suggested_dates": []
+            }
+    
+    async def _schedule_project_hourly(
+        self,
+        project_details: Dict[str, Any],
+        location: str,
+        available_dates: List[str],
+        available_resources: Dict[str, Any],
+        top_k: int = 3
+    ) -> Dict[str, Any]:
+        """
+        Schedule a roofing project into workable hour blocks of the hourly forecast.
+        
+        Every hour is scored with the daily weather formula. Hours inside the work
+        day that score at least min_hour_score and belong to a block of at least
+        min_block_hours are usable, up to hours_per_day per day without leaving a
+        block shorter than min_block_hours. The job's
+        duration_days times its daily hours (hours_per_day unless the project type
+        gives daily_hours) work hours are packed into consecutive usable
+        hours from each block start, and the windows finishing in the shortest
+        elapsed time are suggested.
+        
+        Args:
+            project_details: Dictionary with project details.
+            location: Location string for weather forecast.
+            available_dates: List of available date strings (YYYY-MM-DD).
+            available_resources: Dictionary of available resources.
+            top_k: Number of candidate windows to suggest.
+            
+        Returns:
+            Dictionary with scheduling details, including the work blocks of each window.
+        """
+        try:
+            project_type = await self._determine_project_type(project_details)
+            constraints = self.hourly_constraints
+            requirements = self.resource_requirements[project_type]
+            need_hours = requirements["duration_days"] * requirements.get("daily_hours", constraints["hours_per_day"])
+            
+            hourly = await self._get_hourly_forecast(location)
+            local_time = hourly["local_time"]
+            local_day = (local_time // 86400).astype("datetime64[D]")
+            hour_of_day = local_time // 3600 % 24
+            
+            scores = self.score_weather_arrays(
+                hourly["temp"], hourly["wind_speed"], hourly["precipitation"],
+                hourly["humidity"], hourly["weather_condition"]
+            )
+            available = np.isin(local_day, np.array(available_dates, dtype="datetime64[D]"))
+            in_work_day = (hour_of_day >= constraints["work_start_hour"]) & (hour_of_day < constraints["work_end_hour"])
+            workable = available & in_work_day & (scores >= constraints["min_hour_score"])
+            # A crew works at most hours_per_day hours a day, earliest blocks first. The
+            # cap can cut the day's last block short, so blocks are checked again after it
+            usable = block_mask(workable, constraints["min_block_hours"])
+            usable = cap_daily_hours(usable, local_day, constraints["hours_per_day"])
+            usable = block_mask(usable, constraints["min_block_hours"])
+            
+            windows = hour_windows(usable, scores, need_hours)
+            if len(windows["start"]) == 0:
+                reason = f"Only {int(usable.sum())} of {need_hours} work hours available in forecast range"
+                logger.warning(reason)
+                return {
+                    "project_details": project_details,
+                    "location": location,
+                    "is_scheduled": False,
+                    "resolution": "hourly",
+                    "reason": reason,
+                    "suggested_windows": []
+                }
+            
+            # Shortest elapsed time first, then best weather, then earliest start
+            span = windows["end"] - windows["start"]
+            order = np.lexsort((windows["start"], -windows["score"], span))[:top_k]
+            
+            suggested_windows = []
+            for i in order:
+                start, end = windows["start"][i], windows["end"][i]
+                hours = np.flatnonzero(usable[start:end]) + start
+                breaks = np.flatnonzero(np.diff(hours) > 1)
+                blocks = [
+                    {
+                        "start": str(np.datetime64(int(local_time[block[0]]), "s")),
+                        "end": str(np.datetime64(int(local_time[block[-1]]) + 3600, "s")),
+                        "hours": len(block)
+                    }
+                    for block in np.split(hours, breaks + 1)
+                ]
+                suggested_windows.append({
+                    "start": blocks[0]["start"],
+                    "end": blocks[-1]["end"],
+                    "work_hours": need_hours,
+                    "elapsed_hours": int(local_time[end - 1] + 3600 - local_time[start]) // 3600,
+                    "score": float(windows["score"][i]),
+                    "work_blocks": blocks
+                })
+            
+            best = suggested_windows[0]
+            resource_allocation = await self._allocate_resources(
+                project_type,
+                best["start"][:10],
+                available_resources
+            )
+            
+            return {
+                "project_details": project_details,
+                "location": location,
+                "is_scheduled": True,
+                "resolution": "hourly",
+                "project_type": project_type,
+                "start_date": best["start"][:10],
+                "end_date": best["end"][:10],
+                "start": best["start"],
+                "end": best["end"],
+                "weather_score": best["score"],
+                "suggested_windows": suggested_windows,
+                "resource_allocation": resource_allocation
+            }
+        except Exception as e:
+            logger.error(f"Error scheduling project hourly: {e}")
+            return {
+                "project_details": project_details,
+                "location": location,
+                "is_scheduled": False,
+                "resolution": "hourly",
+                "reason": str(e),
+                "suggested_windows": []
+            }
+    
+    async def schedule_projects_batch(
+        self,
+        projects: List[Dict[str, Any]],
+        top_k: int = 3,
+        window_aggregate: str = "mean"
+    ) -> List[Dict[str, Any]]:
+        """
+        Schedule many projects across many locations in one call.
+        
+        Projects are grouped by forecast bucket so each bucket's forecast is fetched
+        once, all buckets concurrently. Daily suitability is scored for a single
+        (buckets x days) matrix, and the window search runs over all projects of the
+        same duration at once. Each project is scheduled independently, exactly as
+        schedule_project would.
+        
+        Args:
+            projects: List of projects, each with 'project_details', 'location',
+                'available_dates' and 'available_resources'.
+            top_k: Number of candidate start dates to suggest per project.
+            window_aggregate: How to score a multi-day window from its daily scores
+                ('mean', or 'min' to rank by the worst day).
+            
+        Returns:
+            List of scheduling results in the same order and format as schedule_project.
+        """
+        if not projects:
+            return []
+        
+        try:
+            origin = np.datetime64(datetime.date.today(), "D")
+            
+            # Cover the last available date of any project, as far as the API forecasts
+            horizon_days = 7
+            last_dates = [max(project["available_dates"]) for project in projects if project.get("available_dates")]
+            if last_dates:
+                horizon_days = max(horizon_days, int((np.datetime64(max(last_dates), "D") - origin).astype(int)) + 1)
+            horizon_days = min(horizon_days, MAX_FORECAST_DAYS)
+            
+            # One forecast per bucket, fetched concurrently
+            buckets = {}
+            for project in projects:
+                buckets.setdefault(self.forecast_cache.bucket_for(project["location"]), project["location"])
+            bucket_index = {bucket: i for i, bucket in enumerate(buckets)}
+            forecasts = await asyncio.gather(
+                *(self.get_weather_forecast(location, days=horizon_days) for location in buckets.values())
+            )
+            
+            # Suitability matrix (buckets x days) and per-bucket forecast lookup
+            suitability = np.array([
+                self.daily_score_array(forecast, origin, horizon_days) for forecast in forecasts
+            ]).reshape(len(buckets), horizon_days)
+            forecast_by_date = [{day["date"]: day for day in forecast} for forecast in forecasts]
+            
+            # Project rows of the matrix, masked to each project's available dates
+            rows = np.array([bucket_index[self.forecast_cache.bucket_for(project["location"])] for project in projects])
+            availability = np.array([
+                self.availability_mask(project.get("available_dates") or [], origin, horizon_days)
+                for project in projects
+            ]).reshape(len(projects), horizon_days)
+            daily_scores = np.where(availability, suitability[rows], np.nan)
+            
+            project_types = [await self._determine_project_type(project["project_details"]) for project in projects]
+            durations = np.array([self.resource_requirements[t]["duration_days"] for t in project_types])
+            
+            # Window search for every project of the same duration in one pass
+            best_starts = [np.array([], dtype=int)] * len(projects)
+            best_scores = [np.array([])] * len(projects)
+            for duration in np.unique(durations):
+                group = np.flatnonzero(durations == duration)
+                scores = window_scores(daily_scores[group], int(duration), aggregate=window_aggregate)
+                if scores.shape[-1] == 0:
+                    continue
+                ranked = np.where(np.isnan(scores), -np.inf, scores)
+                starts = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape)
+                order = np.lexsort((starts, -ranked), axis=-1)[:, :top_k]
+                top_scores = np.take_along_axis(ranked, order, axis=-1)
+                for i, p in enumerate(group):
+                    valid = np.isfinite(top_scores[i])
+                    best_starts[p] = order[i][valid]
+                    best_scores[p] = top_scores[i][valid]
+            
+            results = []
+            for p, project in enumerate(projects):
+                forecast_days = forecast_by_date[rows[p]]
+                weather_scores = [
+                    {"date": str(origin + day), "score": float(daily_scores[p, day]), "forecast": forecast_days[str(origin + day)]}
+                    for day in np.flatnonzero(~np.isnan(daily_scores[p]))
+                ]
+                results.append(await self._batch_result(
+                    project, project_types[p], int(durations[p]), origin,
+                    best_starts[p], best_scores[p], weather_scores,
+                    self._dates_beyond(project.get("available_dates"), origin + horizon_days)
+                ))
+            return results
+        except Exception as e:
+            logger.error(f"Error scheduling project batch: {e}")
+            return [
+                {
+                    "project_details": project.get("project_details"),
+                    "location": project.get("location"),
+                    "is_scheduled": False,
+                    "reason": str(e),
+                    "suggested_dates": []
+                }
+                for project in projects
+            ]
+    
+    async def _batch_result(
+        self,
+        project: Dict[str, Any],
+        project_type: str,
+        duration: int,
+        origin: np.datetime64,
+        starts: np.ndarray,
+        scores: np.ndarray,
+        weather_scores: List[Dict[str, Any]],
+        beyond_forecast: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Build one project's result for schedule_projects_batch.
+        
+        Args:
+            project: Project passed to the batch.
+            project_type: Type of project.
+            duration: Project duration in days.
+            origin: Day index 0 of the window search.
+            starts: Best start day indices, best first.
+            scores: Window scores matching starts.
+            weather_scores: Daily scores for the project's available forecast days.
+            beyond_forecast: Available dates past the end of the forecast.
+            
+        Returns:
+            Dictionary with scheduling details, as returned by schedule_project.
+        """
+        if not weather_scores:
+            return {
+                "project_details": project["project_details"],
+                "location": project["location"],
+                "is_scheduled": False,
+                "reason": self._no_dates_reason(beyond_forecast),
+                "suggested_dates": [],
+                "beyond_forecast": beyond_forecast
+            }
+        
+        if len(starts) == 0:
+            return {
+                "project_details": project["project_details"],
+                "location": project["location"],
+                "is_scheduled": False,
+                "reason": f"No {duration} consecutive available days in forecast range",
+                "suggested_dates": [],
+                "weather_scores": weather_scores,
+                "beyond_forecast": beyond_forecast
+            }
+        
+        suggested_dates = [
+            {
+                "start_date": str(origin + start),
+                "end_date": str(origin + start + duration),
+                "score": float(score)
+            }
+            for start, score in zip(starts, scores)
+        ]
+        
+        resource_allocation = await self._allocate_resources(
+            project_type,
+            suggested_dates[0]["start_date"],
+            project.get("available_resources", {})
+        )
+        
+        return {
+            "project_details": project["project_details"],
+            "location": project["location"],
+            "is_scheduled": True,
+            "project_type": project_type,
+            "start_date": suggested_dates[0]["start_date"],
+            "end_date": resource_allocation["end_date"],
+            "weather_score": suggested_dates[0]["score"],
+            "suggested_dates": suggested_dates,
+            "weather_scores": weather_scores,
+            "resource_allocation": resource_allocation,
+            "beyond_forecast": beyond_forecast
+        }
+    
+    def _dates_beyond(self, available_dates: Optional[List[str]], forecast_end: np.datetime64) -> List[str]:
+        """
+        Get the available dates the weather forecast does not reach.
+        
+        Args:
+            available_dates: List of available date strings (YYYY-MM-DD), or None.
+            forecast_end: First day past the end of the forecast.
+            
+        Returns:
+            Sorted list of the available dates on or after forecast_end.
+        """
+        return sorted(date for date in available_dates or [] if np.datetime64(date, "D") >= forecast_end)
+    
+    def _no_dates_reason(self, beyond_forecast: List[str]) -> str:
+        """Reason a project has no available dates to schedule in the forecast."""
+        if beyond_forecast:
+            return f"Available dates are beyond the {MAX_FORECAST_DAYS}-day forecast"
+        return "No available dates in forecast range"
+    
+    def daily_score_array(
+        self,
+        forecast: List[Dict[str, Any]],
+        origin: np.datetime64,
+        horizon_days: int
+    ) -> np.ndarray:
+        """
+        Lay out daily weather suitability on a horizon starting at origin.
+        
+        Args:
+            forecast: List of daily weather forecasts.
+            origin: First day of the horizon.
+            horizon_days: Number of days in the horizon.
+            
+        Returns:
+            Array (horizon_days,) of daily scores, NaN for days missing from the forecast.
+        """
+        daily_scores = np.full(horizon_days, np.nan)
+        if not forecast:
+            return daily_scores
+        
+        day_index = (np.array([day["date"] for day in forecast], dtype="datetime64[D]") - origin).astype(int)
+        in_horizon = (day_index >= 0) & (day_index < horizon_days)
+        scores = self.score_weather_arrays(**self._forecast_to_columns(forecast))
+        daily_scores[day_index[in_horizon]] = scores[in_horizon]
+        return daily_scores
+    
+    def availability_mask(
+        self,
+        available_dates: Optional[List[str]],
+        origin: np.datetime64,
+        horizon_days: int
+    ) -> np.ndarray:
+        """
+        Get which days of the horizon a project can be worked.
+        
+        Args:
+            available_dates: List of available date strings (YYYY-MM-DD), or None if every day is available.
+            origin: First day of the horizon.
+            horizon_days: Number of days in the horizon.
+            
+        Returns:
+            Boolean array (horizon_days,), True on available days.
+        """
+        if available_dates is None:
+            return np.ones(horizon_days, dtype=bool)
+        
+        mask = np.zeros(horizon_days, dtype=bool)
+        day_index = (np.array(available_dates, dtype="datetime64[D]") - origin).astype(int)
+        mask[day_index[(day_index >= 0) & (day_index < horizon_days)]] = True
+        return mask
+    
+    async def fleet_project(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Describe a project's resource needs for the fleet scheduler.
+        
+        Args:
+            project: Project with 'project_id', 'project_details' and optional 'priority'.
+            
+        Returns:
+            Dictionary with project type, duration, daily hours, crew size, equipment and priority.
+        """
+        project_type = await self._determine_project_type(project["project_details"])
+        requirements = self.resource_requirements[project_type]
+        return {
+            "project_id": project["project_id"],
+            "project_type": project_type,
+            "duration_days": requirements["duration_days"],
+            "daily_hours": requirements.get("daily_hours"),
+            "crew_size": requirements["crew_size"],
+            "equipment": requirements["equipment"],
+            "priority": project.get("priority", 1.0)
+        }
+    
+    def fleet_schedule(
+        self,
+        plan: Dict[str, Any],
+        fleet_projects: List[Dict[str, Any]],
+        origin: np.datetime64
+    ) -> List[Dict[str, Any]]:
+        """
+        Convert fleet scheduler assignments into dated schedule entries.
+        
+        Args:
+            plan: Result of FleetScheduler.solve.
+            fleet_projects: Projects passed to the solver.
+            origin: First day of the horizon.
+            
+        Returns:
+            List of schedule entries ordered by start date.
+        """
+        project_types = {project["project_id"]: project["project_type"] for project in fleet_projects}
+        schedule = []
+        for assignment in plan["assignments"]:
+            schedule.append({
+                "project_id": assignment["project_id"],
+                "project_type": project_types[assignment["project_id"]],
+                "crew_id": assignment["crew_id"],
+                "start_date": str(origin + assignment["start_day"]),
+                "end_date": str(origin + assignment["end_day"]),
+                "weather_score": assignment["score"]
+            })
+        return schedule
+    
+    async def schedule_fleet(
+        self,
+        projects: List[Dict[str, Any]],
+        crews: List[Dict[str, Any]],
+        equipment: Dict[str, int],
+        horizon_days: int = 14,
+        window_aggregate: str = "mean",
+        exact: bool = False,
+        time_limit: float = 0.5
+    ) -> Dict[str, Any]:
+        """
+        Schedule many projects against a shared crew and equipment fleet.
+        
+        Unlike schedule_project, which checks one project against the available
+        resources, this resolves contention between projects: every project gets a
+        start date and a crew such that no crew is booked past its hours per day
+        (several short jobs can share a crew-day) and equipment use stays within the
+        fleet, maximizing total weather suitability.
+        
+        Args:
+            projects: List of projects, each with 'project_id', 'project_details', 'location',
+                and optional 'available_dates' (YYYY-MM-DD strings) and 'priority' weight.
+            crews: List of crews, each with 'crew_id', 'size' (number of crew members) and
+                optional 'hours_per_day'.
+            equipment: Number of units available per equipment type.
+            horizon_days: Number of days to plan, starting today.
+            window_aggregate: How to score a multi-day window from its daily scores
+                ('mean', or 'min' to rank by the worst day).
+            exact: Also solve exactly by branch and bound, for instances of at most
+                FleetScheduler.exact_max_projects projects.
+            time_limit: Local search time budget in seconds.
+            
+        Returns:
+            Dictionary with the per-project schedule, unscheduled projects and solver details.
+        """
+        try:
+            origin = np.datetime64(datetime.date.today(), "D")
+            
+            # One forecast per location, fetched concurrently
+            locations = list(dict.fromkeys(project["location"] for project in projects))
+            # Days past the end of the forecast stay unscored, so no window reaching them is planned
+            forecasts = await asyncio.gather(
+                *(self.get_weather_forecast(location, days=min(horizon_days, MAX_FORECAST_DAYS)) for location in locations)
+            )
+            location_scores = {
+                location: self.daily_score_array(forecast, origin, horizon_days)
+                for location, forecast in zip(locations, forecasts)
+            }
+            
+            # Window scores for every project by start day
+            fleet_projects = []
+            start_values = np.full((len(projects), horizon_days), np.nan)
+            for i, project in enumerate(projects):
+                fleet_project = await self.fleet_project(project)
+                daily_scores = np.where(
+                    self.availability_mask(project.get("available_dates"), origin, horizon_days),
+                    location_scores[project["location"]],
+                    np.nan
+                )
+                scores = window_scores(daily_scores, fleet_project["duration_days"], aggregate=window_aggregate)
+                start_values[i, :len(scores)] = scores
+                fleet_projects.append(fleet_project)
+            
+            solver = FleetScheduler(
+                crews, equipment, horizon_days,
+                hours_per_day=self.hourly_constraints["hours_per_day"],
+                time_limit=time_limit
+            )
+            plan = solver.solve(fleet_projects, start_values, exact=exact)
+            
+            return {
+                "is_scheduled": True,
+                "schedule": self.fleet_schedule(plan, fleet_projects, origin),
+                "unscheduled": plan["unscheduled"],
+                "objective": plan["objective"],
+                "solver": plan["solver"],
+                "optimal": plan["optimal"],
+                "elapsed_ms": plan["elapsed_ms"]
+            }
+        except Exception as e:
+            logger.error(f"Error scheduling fleet: {e}")
+            return {
+                "is_scheduled": False,
+                "reason": str(e),
+                "schedule": [],
+                "unscheduled": [project.get("project_id") for project in projects]
+            }
+    
+    def sequence_crew_routes(
+        self,
+        results: List[Dict[str, Any]],
+        depots: Dict[Any, Any]
+    ) -> Dict[str, Any]:
+        """
+        Order each crew's daily jobs to minimize travel.
+        
+        Takes scheduled projects in the format returned by schedule_project (or the
+        schedule entries of schedule_fleet) and adds a 'route' entry to each, giving
+        its stop number on every day it is worked.
+        
+        Args:
+            results: Scheduling results. Job sites come from project_details['coordinates'] or a
+                'lat,lon' location; crews from 'crew_id' on the result or in project_details.
+                With a single depot, jobs without a crew are assigned to it.
+            depots: Depot coordinates by crew ID.
+            
+        Returns:
+            Dictionary with the annotated results, the per crew-day routes and total miles
+            before and after sequencing.
+        """
+        default_crew = next(iter(depots)) if len(depots) == 1 else None
+        
+        jobs = []
+        for i, result in enumerate(results):
+            if not result.get("is_scheduled", True) or not result.get("start_date"):
+                continue
+            details = result.get("project_details") or {}
+            coordinates = parse_coordinates(details.get("coordinates")) or parse_coordinates(result.get("location"))
+            if coordinates is None:
+                logger.warning(f"No coordinates for scheduled job {i}, not sequenced")
+                continue
+            jobs.append({
+                "job_id": i,
+                "crew_id": result.get("crew_id", details.get("crew_id", default_crew)),
+                "coordinates": coordinates,
+                "start_date": result["start_date"],
+                "end_date": result.get("end_date") or str(np.datetime64(result["start_date"], "D") + 1)
+            })
+        
+        routes = self.route_sequencer.sequence(jobs, depots)
+        
+        annotated = [dict(result, route=[]) for result in results]
+        for route in routes:
+            for stop_number, job_id in enumerate(route["stops"], start=1):
+                annotated[job_id]["route"].append({
+                    "date": route["date"],
+                    "crew_id": route["crew_id"],
+                    "stop_number": stop_number,
+                    "stops_that_day": len(route["stops"])
+                })
+            route["stops"] = [
+                results[job_id].get("project_id", (results[job_id].get("project_details") or {}).get("project_id", job_id))
+                for job_id in route["stops"]
+            ]
+        
+        return {
+            "results": annotated,
+            "routes": routes,
+            "total_miles": float(sum(route["total_miles"] for route in routes)),
+            "unsequenced_miles": float(sum(route["unsequenced_miles"] for route in routes))
+        }
@@ -0,0 +1,73 @@
+"""
+Shared fixtures for the Analysis test suite
+
+The agents are deployed as the Analysis package next to a common package that
+provides the LLM providers, which is not part of this repository. The tests
+import the agents as agents.Analysis, with a stand-in agents.common.llm_provider
+whose factory hands out scripted providers, and use the shared pricing package
+from the checkout when it is not installed.
+"""
+
+import asyncio
+import hashlib
+import json
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+ANALYSIS_DIR = Path(__file__).resolve().parent.parent
+PRICING_DIR = ANALYSIS_DIR.parent / "orpaynter-platform" / "shared" / "pricing"
+
+# Deployments pip install the orpaynter-pricing package; run from a checkout otherwise
+try:
+    import orpaynter_pricing  # noqa: F401
+except ImportError:
+    sys.path.insert(0, str(PRICING_DIR))
+
+class ScriptedLLM:
+    """LLM provider answering every prompt with a JSON rating"""
+
+    def __init__(self, rating=None, delay=0.0):
+        # None rates each prompt by its hash, so different prompts get different ratings
+        self.rating = rating
+        self.delay = delay
+        self.prompts = []
+
+    @property
+    def calls(self):
+        return len(self.prompts)
+
+    async def generate(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        rating = self.rating
+        if rating is None:
+            rating = int(hashlib.md5(prompt.encode()).hexdigest()[:4], 16) / 65535
+        return json.dumps({"rating": rating, "explanation": "scripted"})
+
+class LLMProviderFactory:
+    """Stand-in for common.llm_provider.LLMProviderFactory"""
+
+    @staticmethod
+    def create_provider(provider_type, **kwargs):
+        return ScriptedLLM()
+
+def install_agents_package():
+    """Register agents, agents.common.llm_provider and agents.Analysis as importable packages"""
+    for name, path in (("agents", []), ("agents.common", []), ("agents.Analysis", [str(ANALYSIS_DIR)])):
+        module = sys.modules.get(name) or types.ModuleType(name)
+        module.__path__ = path
+        sys.modules[name] = module
+    llm_provider = types.ModuleType("agents.common.llm_provider")
+    llm_provider.LLMProviderFactory = LLMProviderFactory
+    sys.modules["agents.common.llm_provider"] = llm_provider
+
+install_agents_package()
+
+@pytest.fixture
+def scripted_llm():
+    """Provider rating every prompt 0, so only rule-based patterns fire"""
+    return ScriptedLLM(rating=0.0)
@@ -0,0 +1,116 @@
+"""
+Test suite for the claim embedding index
+"""
+
+import numpy as np
+import pytest
+
+from agents.Analysis.claim_embeddings import ClaimEmbeddingIndex, claim_vector
+
+def clustered_vectors(count, dim=32, clusters=8, seed=0):
+    """Unit vectors scattered around a few cluster centers"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, count)] + 0.3 * rng.normal(size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def knn_distances(vectors, k):
+    """Mean cosine distance of every vector to its k nearest others, by brute force"""
+    similarities = vectors @ vectors.T
+    np.fill_diagonal(similarities, -np.inf)
+    return 1 - np.sort(similarities, axis=1)[:, -k:].mean(axis=1)
+
+@pytest.fixture
+def vectors():
+    return clustered_vectors(300)
+
+@pytest.fixture
+def index(vectors):
+    index = ClaimEmbeddingIndex(k=5, reference_size=1000)
+    index.add_many(vectors, [f"c{i}" for i in range(len(vectors))])
+    return index
+
+class TestNearestNeighbors:
+    """Exact k nearest neighbors"""
+
+    def test_matches_brute_force(self, index, vectors):
+        results = index.neighbors(vectors, [f"c{i}" for i in range(len(vectors))])
+        similarities = vectors @ vectors.T
+        np.fill_diagonal(similarities, -np.inf)
+        assert [result["nearest_claim_id"] for result in results] == [f"c{i}" for i in similarities.argmax(axis=1)]
+        assert np.allclose([result["distance"] for result in results], knn_distances(vectors, 5), atol=1e-5)
+
+    def test_chunked_blocks_give_the_same_neighbors(self, index, vectors):
+        exclude = np.arange(len(vectors))
+        rows, similarities = index._knn(vectors, exclude)
+        chunked_rows, chunked_similarities = index._knn(vectors, exclude, chunk_elements=1000)
+        assert np.array_equal(rows, chunked_rows)
+        # Block sizes change the BLAS summation order, not the neighbors
+        assert np.allclose(similarities, chunked_similarities, atol=1e-6)
+
+    def test_batch_matches_single_queries(self, index):
+        queries = clustered_vectors(20, seed=1)
+        batch = index.neighbors(queries)
+        single = [index.neighbors(query)[0] for query in queries]
+        assert [result["nearest_claim_id"] for result in batch] == [result["nearest_claim_id"] for result in single]
+        assert [result["percentile"] for result in batch] == [result["percentile"] for result in single]
+        assert np.allclose([result["distance"] for result in batch], [result["distance"] for result in single])
+
+    def test_query_without_an_id_finds_itself(self, index, vectors):
+        # Without its claim ID an indexed vector is its own nearest neighbor
+        result = index.neighbors(vectors[7])[0]
+        assert result["nearest_claim_id"] == "c7"
+        assert result["nearest_similarity"] == pytest.approx(1.0)
+
+class TestPercentile:
+    """kNN distance reported as a percentile of indexed claims"""
+
+    def test_percentile_ranks_among_indexed_claims(self, index, vectors):
+        results = index.neighbors(vectors, [f"c{i}" for i in range(len(vectors))])
+        reference = np.sort(knn_distances(vectors, 5))
+        # The reference sample covers the whole index
+        assert np.allclose(index._reference, reference, atol=1e-5)
+        expected = np.searchsorted(index._reference, [result["distance"] for result in results], side="right")
+        assert [result["percentile"] for result in results] == list(expected / len(vectors))
+
+    def test_outlier_is_at_the_top(self, index, vectors):
+        outlier = np.zeros(vectors.shape[1], dtype=np.float32)
+        outlier[0], outlier[1] = 1.0, -1.0
+        typical = vectors[3] + 0.01
+        percentiles = [result["percentile"] for result in index.neighbors(np.stack([outlier, typical]))]
+        assert percentiles[0] == 1.0
+        assert percentiles[1] < 0.5
+
+    def test_no_percentile_below_min_claims(self, vectors):
+        index = ClaimEmbeddingIndex(k=5, min_claims=100)
+        index.add_many(vectors[:99], [f"c{i}" for i in range(99)])
+        result = index.neighbors(vectors[0], ["c0"])[0]
+        assert result["percentile"] is None and result["distance"] is not None
+        index.add(vectors[99], "c99")
+        assert index.neighbors(vectors[0], ["c0"])[0]["percentile"] is not None
+
+    def test_reference_is_recomputed_when_the_index_doubles(self, vectors):
+        more = clustered_vectors(300, seed=2)
+        index = ClaimEmbeddingIndex(k=5, reference_size=50)
+        index.add_many(vectors[:150], [f"c{i}" for i in range(150)])
+        index.neighbors(vectors[0])
+        reference = index._reference
+        assert len(reference) == 50 and index._reference_count == 150
+
+        index.add_many(more[:149], [f"d{i}" for i in range(149)])
+        index.neighbors(vectors[0])
+        assert index._reference is reference
+        index.add(more[149], "d149")
+        index.neighbors(vectors[0])
+        assert index._reference is not reference and index._reference_count == 300
+
+class TestClaimVector:
+    """Local hashed claim embeddings"""
+
+    def test_similar_claims_are_close(self):
+        hail = {"description": "Hail cracked shingles on the north slope", "claimed_amount": 9000}
+        hail_again = {"description": "Hail cracked shingles on the south slope", "claimed_amount": 9500}
+        flood = {"description": "Sump pump failed and flooded the basement", "claimed_amount": 190000}
+        vectors = [claim_vector(claim) for claim in (hail, hail_again, flood)]
+        assert np.linalg.norm(vectors[0]) == pytest.approx(1.0)
+        assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
@@ -0,0 +1,93 @@
+"""
+Test suite for the claim graph
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from agents.Analysis.claim_graph import ClaimGraph
+
+def random_claims(count, seed=0, start=0, spread=300):
+    """Claims that share phones, addresses, accounts and contractors at random"""
+    rng = random.Random(seed)
+    claims = []
+    for i in range(start, start + count):
+        claimant = rng.randint(0, spread)
+        claim = {
+            "claim_id": f"c{i}",
+            "claimant_id": f"u{claimant}" if rng.random() < 0.9 else None,
+            "phone": f"555{rng.randint(0, spread):07d}",
+            "address": f"{rng.randint(0, spread)} Elm St",
+            "contractor_id": f"k{rng.randint(0, spread // 10)}",
+            "policy_number": f"P{claimant}"
+        }
+        if rng.random() < 0.2:
+            claim["bank_account"] = f"A{rng.randint(0, spread // 3)}"
+        if rng.random() < 0.1:
+            claim["photo_hashes"] = [rng.randint(0, 50)]
+        claims.append(claim)
+    return claims
+
+def all_stats(graph):
+    return [graph.community_stats(node) for node in range(len(graph))]
+
+class TestIncrementalRefresh:
+    """Ring risk after incremental refreshes matches a full recomputation"""
+
+    @pytest.mark.parametrize("spread", [300, 3000])
+    def test_matches_a_full_refresh(self, spread):
+        # Components are kept whole, so communities do not depend on propagation order
+        claims = random_claims(600, spread=spread)
+        incremental = ClaimGraph.from_records(claims[:400], max_community_size=10_000)
+        for seen in range(400, 600, 50):
+            # ring_risk adds and refreshes one claim at a time
+            risks = [incremental.ring_risk(claim) for claim in claims[seen:seen + 50]]
+            full = ClaimGraph.from_records(claims[:seen + 50], max_community_size=10_000)
+            assert np.array_equal(incremental.component, full.component)
+            assert all_stats(incremental) == all_stats(full)
+            assert risks[-1] == full.ring_risk(claims[seen + 49])
+        assert [incremental.ring_risk(claim) for claim in claims] == [full.ring_risk(claim) for claim in claims]
+        assert any(risk["risk"] > 0 for risk in risks)
+
+    @pytest.mark.parametrize("max_community_size", [10, 40])
+    def test_split_communities_are_recounted(self, max_community_size):
+        claims = random_claims(600, seed=1)
+        graph = ClaimGraph.from_records(claims[:300], max_community_size=max_community_size)
+        for start in range(300, 600, 50):
+            for claim in claims[start:start + 50]:
+                graph.add_claim(claim)
+            graph.refresh()
+        incremental = all_stats(graph)
+        assert max(stats["community_size"] for stats in incremental) <= len(graph)
+        # Counting every community again from the same labels gives the same numbers
+        graph._count_communities()
+        assert incremental == all_stats(graph)
+
+class TestRingRisk:
+    """Claimants tied together by shared identifiers"""
+
+    def test_ring_forms_as_claims_arrive(self):
+        graph = ClaimGraph()
+        ring = [
+            {"claim_id": f"r{i}", "claimant_id": f"u{i}", "phone": "5550001111", "address": f"{i} Oak St"}
+            for i in range(4)
+        ]
+        risks = [graph.ring_risk(claim)["risk"] for claim in ring]
+        assert risks[:2] == [0.0, 0.0]
+        assert risks[2] == 0.5 and risks[3] > risks[2]
+        # Earlier claims see the ring once it has grown
+        assert graph.ring_risk(ring[0])["linked_claimants"] == 4
+
+    def test_one_claimant_is_not_a_ring(self):
+        graph = ClaimGraph()
+        for i in range(5):
+            risk = graph.ring_risk({"claim_id": f"c{i}", "claimant_id": "u1", "phone": "5550001111"})
+        assert risk["claims"] == 5 and risk["claimants"] == 1 and risk["risk"] == 0.0
+
+    def test_hubs_do_not_link_claims(self):
+        graph = ClaimGraph(max_hub_degree=5)
+        for i in range(10):
+            risk = graph.ring_risk({"claim_id": f"c{i}", "claimant_id": f"u{i}", "contractor_id": "busy_roofer"})
+        assert risk["community_size"] == 2 and risk["risk"] == 0.0
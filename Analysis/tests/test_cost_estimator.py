@@ -0,0 +1,165 @@
+"""
+Test suite for the cost estimator agent
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from agents.Analysis.cost_estimator import CostEstimator
+
+@pytest.fixture
+def estimator():
+    """Cost estimator with the built-in rate tables"""
+    return CostEstimator()
+
+@pytest.fixture
+def project():
+    """Sample project with every kind of additional cost"""
+    return {
+        "area_squares": 27.5,
+        "region": "US-Northeast",
+        "additional_factors": {"roof_pitch": "medium", "accessibility": "difficult"},
+        "permits_required": True,
+        "ridge_vents": True,
+        "roof_length_feet": 42,
+        "drip_edge": True,
+        "roof_perimeter_feet": 180
+    }
+
+def assert_same_totals(actual, expected):
+    for level in ("min", "max", "avg"):
+        assert np.isclose(actual[level], expected[level], rtol=1e-12), level
+
+class TestWhatIfAnalysis:
+    """The what-if grid prices every scenario the way estimate_cost does"""
+
+    def test_grid_matches_scalar_estimates(self, estimator, project):
+        async def run():
+            grid = await estimator.what_if_analysis(
+                project,
+                materials=["asphalt_shingle", "metal", "slate"],
+                factor_grid={"roof_pitch": ["low", "steep"], "complexity": ["simple", "complex"]}
+            )
+            scalar = [
+                await estimator.estimate_cost({
+                    **project,
+                    "material_type": scenario["material_type"],
+                    "quality": scenario["quality"],
+                    "additional_factors": scenario["additional_factors"]
+                })
+                for scenario in grid["ranking"]
+            ]
+            return grid, scalar
+
+        grid, scalar = asyncio.run(run())
+        assert len(grid["ranking"]) == 3 * 3 * 4
+        for scenario, estimate in zip(grid["ranking"], scalar):
+            assert_same_totals(scenario["total_cost"], estimate["total_cost"])
+
+    def test_batch_matches_scalar_estimates(self, estimator, project):
+        projects = [
+            {**project, "material_type": material, "quality": quality, "region": region}
+            for material in ("tile", "wood_shake", "unknown")
+            for quality in ("economy", "premium")
+            for region in ("US-West", "Nowhere")
+        ]
+
+        async def run():
+            return (
+                await estimator.estimate_costs_batch(projects),
+                [await estimator.estimate_cost(p) for p in projects]
+            )
+
+        batch, scalar = asyncio.run(run())
+        for batched, estimate in zip(batch, scalar):
+            assert batched["material_type"] == estimate["material_type"]
+            assert_same_totals(batched["total_cost"], estimate["total_cost"])
+            assert np.isclose(batched["additional_costs"]["total"], estimate["additional_costs"]["total"], rtol=1e-12)
+
+    def test_option_lists(self, estimator, project):
+        async def run():
+            return (
+                await estimator.what_if_analysis(project),
+                await estimator.what_if_analysis(project, materials=[]),
+                await estimator.what_if_analysis(project, materials=["unobtainium"], qualities=["luxury"])
+            )
+
+        everything, nothing, unknown = asyncio.run(run())
+        assert everything["materials"] == list(estimator.material_types)
+        assert len(everything["ranking"]) == len(estimator.material_types) * 3
+        # An explicitly empty list compares nothing rather than everything
+        assert nothing["materials"] == [] and nothing["ranking"] == []
+        assert "error" not in nothing
+        # Unknown options fall back to the defaults estimate_cost uses
+        assert [(s["material_type"], s["quality"]) for s in unknown["ranking"]] == [("asphalt_shingle", "standard")]
+
+    def test_sensitivity_is_the_multiplier_derivative(self, estimator, project):
+        async def run():
+            grid = await estimator.what_if_analysis(project, materials=["metal"], qualities=["standard"])
+            region = estimator.regional_rates[project["region"]]
+            step = 1e-3
+            estimator.regional_rates = {
+                **estimator.regional_rates,
+                project["region"]: {**region, "labor_multiplier": region["labor_multiplier"] + step}
+            }
+            bumped = await estimator.estimate_cost({**project, "material_type": "metal", "quality": "standard"})
+            return grid["ranking"][0], bumped, step
+
+        scenario, bumped, step = asyncio.run(run())
+        slope = (bumped["total_cost"]["avg"] - scenario["total_cost"]["avg"]) / step
+        assert np.isclose(slope, scenario["d_total_d_labor_multiplier"], rtol=1e-6)
+
+class TestRateTables:
+    """Memoized estimates always reflect the current rate tables"""
+
+    def test_repeat_estimates_are_memoized(self, estimator, project):
+        async def run():
+            first = await estimator.estimate_cost(project)
+            # Equivalent inputs (int vs float area) share an entry
+            second = await estimator.estimate_cost({**project, "area_squares": 27.500000000001})
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert second == first
+        stats = estimator.get_cache_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    def test_tables_cannot_be_edited_in_place(self, estimator):
+        with pytest.raises(TypeError):
+            estimator.regional_rates["US-Midwest"] = {"labor_multiplier": 2.0, "material_multiplier": 2.0}
+        with pytest.raises(TypeError):
+            estimator.regional_rates["US-Midwest"]["labor_multiplier"] = 2.0
+        with pytest.raises(TypeError):
+            estimator.labor_rates["low"]["min"] = 1
+        with pytest.raises(TypeError):
+            estimator.material_types["metal"]["cost_per_square"]["premium"]["max"] = 1
+        with pytest.raises(TypeError):
+            del estimator.additional_factors["roof_pitch"]["steep"]
+
+    def test_replacing_a_table_reprices(self, estimator, project):
+        async def run():
+            before = await estimator.estimate_cost(project)
+            estimator.regional_rates = {
+                **estimator.regional_rates,
+                project["region"]: {"labor_multiplier": 2.0, "material_multiplier": 2.0}
+            }
+            return before, await estimator.estimate_cost(project)
+
+        before, after = asyncio.run(run())
+        assert after["total_cost"]["avg"] > before["total_cost"]["avg"]
+        stats = estimator.get_cache_stats()
+        assert stats["hits"] == 0 and stats["invalidations"] == 1
+        # The replacement is frozen as well
+        with pytest.raises(TypeError):
+            estimator.regional_rates[project["region"]]["labor_multiplier"] = 1.0
+
+    def test_reload_drops_memoized_estimates(self, estimator, project):
+        async def run():
+            await estimator.estimate_cost(project)
+            estimator.reload_rate_tables()
+            await estimator.estimate_cost(project)
+
+        asyncio.run(run())
+        assert estimator.get_cache_stats()["hits"] == 0
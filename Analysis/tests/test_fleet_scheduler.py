@@ -0,0 +1,100 @@
+"""
+Test suite for the fleet scheduler
+"""
+
+import numpy as np
+import pytest
+
+from agents.Analysis.fleet_scheduler import FleetScheduler
+
+CREWS = [{"crew_id": "small", "size": 3}, {"crew_id": "medium", "size": 4}, {"crew_id": "large", "size": 5}]
+
+def make_projects(count, seed=0):
+    """Projects of 2-4 days needing 2-5 crew members, every other one a lift"""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "project_id": f"p{i}",
+            "duration_days": int(rng.integers(2, 5)),
+            "crew_size": int(rng.integers(2, 6)),
+            "equipment": ["lift"] if i % 2 else []
+        }
+        for i in range(count)
+    ], rng.random((count, 14))
+
+def assert_within_capacity(plan, projects, crews, equipment):
+    """No crew works two jobs at once, crews are big enough and equipment use stays within the fleet"""
+    by_id = {project["project_id"]: project for project in projects}
+    sizes = {crew["crew_id"]: crew["size"] for crew in crews}
+    crew_days = set()
+    equipment_days = {}
+    for assignment in plan["assignments"]:
+        project = by_id[assignment["project_id"]]
+        assert sizes[assignment["crew_id"]] >= project["crew_size"]
+        assert assignment["end_day"] - assignment["start_day"] == project["duration_days"]
+        for day in range(assignment["start_day"], assignment["end_day"]):
+            assert (assignment["crew_id"], day) not in crew_days
+            crew_days.add((assignment["crew_id"], day))
+            for name in project["equipment"]:
+                equipment_days[name, day] = equipment_days.get((name, day), 0) + 1
+    assert all(used <= equipment[name] for (name, _), used in equipment_days.items())
+
+class TestCapacity:
+    """Plans respect the crew and equipment fleet"""
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_plans_stay_within_capacity(self, seed):
+        projects, values = make_projects(12, seed)
+        plan = FleetScheduler(CREWS, {"lift": 1}, 14).solve(projects, values)
+        assert plan["assignments"]
+        assert_within_capacity(plan, projects, CREWS, {"lift": 1})
+
+    def test_contended_equipment_serializes_projects(self):
+        projects = [
+            {"project_id": f"p{i}", "duration_days": 3, "crew_size": 2, "equipment": ["lift"]} for i in range(3)
+        ]
+        # Every project wants to start on day 0
+        values = np.tile(np.linspace(1, 0, 7), (3, 1))
+        plan = FleetScheduler(CREWS, {"lift": 1}, 7).solve(projects, values)
+        assert sorted(a["start_day"] for a in plan["assignments"]) == [0, 3]
+        assert len(plan["unscheduled"]) == 1
+
+    def test_projects_without_a_fitting_crew_or_equipment_are_unscheduled(self):
+        projects = [
+            {"project_id": "too_big", "duration_days": 2, "crew_size": 6, "equipment": []},
+            {"project_id": "no_crane", "duration_days": 2, "crew_size": 2, "equipment": ["crane"]},
+            {"project_id": "fits", "duration_days": 2, "crew_size": 5, "equipment": []}
+        ]
+        plan = FleetScheduler(CREWS, {"lift": 1}, 7).solve(projects, np.ones((3, 7)))
+        assert plan["unscheduled"] == ["too_big", "no_crane"]
+        assert [(a["project_id"], a["crew_id"]) for a in plan["assignments"]] == [("fits", "large")]
+
+    def test_smallest_adequate_crew_is_used(self):
+        projects = [{"project_id": "p0", "duration_days": 2, "crew_size": 4, "equipment": []}]
+        plan = FleetScheduler(CREWS, {}, 7).solve(projects, np.ones((1, 7)))
+        assert plan["assignments"][0]["crew_id"] == "medium"
+
+class TestExactSolving:
+    """Branch and bound only runs on request, for small instances"""
+
+    def test_local_search_by_default(self):
+        projects, values = make_projects(8)
+        plan = FleetScheduler(CREWS, {"lift": 1}, 14).solve(projects, values)
+        assert plan["solver"] == "greedy_local_search"
+        assert not plan["optimal"]
+
+    def test_exact_on_request(self):
+        projects, values = make_projects(5)
+        scheduler = FleetScheduler(CREWS, {"lift": 1}, 14)
+        heuristic = scheduler.solve(projects, values)
+        exact = scheduler.solve(projects, values, exact=True)
+        assert exact["solver"] == "branch_and_bound" and exact["optimal"]
+        assert exact["objective"] >= heuristic["objective"] - 1e-9
+        assert_within_capacity(exact, projects, CREWS, {"lift": 1})
+
+    def test_large_instances_keep_the_local_search_plan(self):
+        projects, values = make_projects(8)
+        scheduler = FleetScheduler(CREWS, {"lift": 1}, 14, exact_max_projects=6)
+        plan = scheduler.solve(projects, values, exact=True)
+        assert plan["solver"] == "greedy_local_search"
+        assert plan["objective"] == scheduler.solve(projects, values)["objective"]
@@ -0,0 +1,129 @@
+"""
+Test suite for the forecast cache
+"""
+
+import asyncio
+import datetime
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the parent directory to sys.path to import forecast_cache
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from forecast_cache import ForecastCache, SQLiteForecastStore
+
+def daily_forecast(days):
+    """Daily forecasts starting today"""
+    today = datetime.date.today()
+    return [
+        {"date": (today + datetime.timedelta(days=i)).strftime("%Y-%m-%d"), "temp": 20.0 + i}
+        for i in range(days)
+    ]
+
+class TestForecastCache:
+    """Test class for ForecastCache request coalescing"""
+
+    def test_concurrent_misses_share_one_fetch(self):
+        """Concurrent lookups for the same bucket make a single provider call"""
+        calls = []
+
+        async def fetch(location, days):
+            calls.append(location)
+            await asyncio.sleep(0.01)
+            return daily_forecast(days)
+
+        async def run():
+            cache = ForecastCache()
+            return cache, await asyncio.gather(*(cache.get_forecast("75201", 3, fetch) for _ in range(5)))
+
+        cache, results = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(result == daily_forecast(3) for result in results)
+        assert cache.get_stats()["coalesced"] == 4
+
+    def test_cancelled_leader_does_not_strand_waiters(self):
+        """Waiters on a fetch whose caller is cancelled fetch again instead of hanging"""
+        calls = []
+        started = None
+
+        async def fetch(location, days):
+            calls.append(location)
+            if len(calls) == 1:
+                started.set()
+                await asyncio.sleep(10)
+            return daily_forecast(days)
+
+        async def run():
+            nonlocal started
+            started = asyncio.Event()
+            cache = ForecastCache()
+            leader = asyncio.create_task(cache.get_forecast("75201", 3, fetch))
+            await started.wait()
+            waiters = [asyncio.create_task(cache.get_forecast("75201", 3, fetch)) for _ in range(3)]
+            await asyncio.sleep(0)
+            leader.cancel()
+            results = await asyncio.wait_for(asyncio.gather(*waiters), timeout=1)
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return cache, results
+
+        cache, results = asyncio.run(run())
+        assert all(result == daily_forecast(3) for result in results)
+        # One retry for all the waiters, not one each
+        assert len(calls) == 2
+        assert not cache._inflight
+
+    def test_cancelled_waiter_leaves_fetch_running(self):
+        """Cancelling a waiter does not cancel the shared fetch"""
+        async def fetch(location, days):
+            await asyncio.sleep(0.05)
+            return daily_forecast(days)
+
+        async def run():
+            cache = ForecastCache()
+            leader = asyncio.create_task(cache.get_forecast("75201", 3, fetch))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(cache.get_forecast("75201", 3, fetch))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            return await asyncio.wait_for(leader, timeout=1)
+
+        assert asyncio.run(run()) == daily_forecast(3)
+
+class TestSQLiteStore:
+    """Test class for the shared SQLite tier"""
+
+    def test_round_trip_and_expiry(self, tmp_path):
+        """Entries are served until they expire"""
+        store = SQLiteForecastStore(str(tmp_path / "forecasts.db"))
+
+        async def run():
+            await store.set("dallas", {"days": [1, 2]}, ttl_seconds=60)
+            await store.set("austin", {"days": [3]}, ttl_seconds=-1)
+            return await store.get("dallas"), await store.get("austin"), await store.get("houston")
+
+        assert asyncio.run(run()) == ({"days": [1, 2]}, None, None)
+
+    def test_connections_are_closed(self, tmp_path, monkeypatch):
+        """Every connection the store opens is closed again"""
+        opened = []
+        sqlite_connect = sqlite3.connect
+
+        def connect(path):
+            # Checked from the test thread once the store is done with it
+            conn = sqlite_connect(path, check_same_thread=False)
+            opened.append(conn)
+            return conn
+
+        monkeypatch.setattr(sqlite3, "connect", connect)
+        store = SQLiteForecastStore(str(tmp_path / "forecasts.db"))
+        asyncio.run(store.set("dallas", {"days": [1]}, 60))
+        assert asyncio.run(store.get("dallas")) == {"days": [1]}
+        assert len(opened) == 3
+        for conn in opened:
+            with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+                conn.execute("SELECT 1")
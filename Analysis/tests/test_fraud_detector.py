@@ -0,0 +1,332 @@
+"""
+Test suite for the fraud detector agent
+"""
+
+import asyncio
+import datetime
+import time
+
+import numpy as np
+import pytest
+
+from agents.Analysis import fraud_detector
+from agents.Analysis.claim_history import ClaimHistoryIndex, to_timestamp
+from agents.Analysis.description_index import DescriptionIndex, shingles
+from agents.Analysis.fraud_detector import FraudDetector, _parse_datetime, _parse_datetimes
+from agents.Analysis.photo_index import PhotoHashIndex, dhash, hamming_distance
+from conftest import ScriptedLLM
+
+def make_claim(claim_id, claimant_id="h1", claim_date="2024-03-12T10:00:00", **fields):
+    """Well-documented claim that trips none of the rules on its own"""
+    return {
+        "claim_id": claim_id,
+        "claimant_id": claimant_id,
+        "claim_date": claim_date,
+        "policy_start_date": "2020-01-01",
+        "policy_end_date": "2030-01-01",
+        "incident_date": claim_date[:10],
+        "claimed_amount": 5000,
+        "property_value": 300000,
+        "documents": ["estimate.pdf", "invoice.pdf", "report.pdf"],
+        "description": f"Hail on {claim_id} cracked shingles along the north ridge and dented the gutters " * 2,
+        **fields
+    }
+
+@pytest.fixture
+def detector(scripted_llm):
+    """Fraud detector with empty indexes and an LLM that rates every description as clean"""
+    detector = FraudDetector()
+    detector.llm_provider = scripted_llm
+    return detector
+
+def patterns(result):
+    """Names of the suspicious patterns a result flagged"""
+    if "suspicious_patterns" in result:
+        return {pattern["pattern"] for pattern in result["suspicious_patterns"]}
+    return {pattern["pattern"] for analysis in result["analyses"].values() for pattern in analysis["suspicious_patterns"]}
+
+class TestClaimHistory:
+    """Analyzed claims feed the claim history index"""
+
+    def test_analyze_claim_records_history(self, detector):
+        claims = [make_claim(f"c{i}", claim_date=f"2024-0{i + 1}-12T10:00:00") for i in range(3)]
+
+        async def run():
+            return [await detector.analyze_claim(claim) for claim in claims]
+
+        results = asyncio.run(run())
+        assert len(detector.claim_history) == 3
+        assert "frequent" not in patterns(results[1])
+        assert "frequent" in patterns(results[2])
+
+    def test_concurrent_analysis_records_history(self, detector):
+        async def run():
+            for i in range(2):
+                await detector.analyze_claim_concurrently(make_claim(f"c{i}", claim_date=f"2024-0{i + 1}-12T10:00:00"))
+            return await detector.analyze_claim_concurrently(make_claim("c2", claim_date="2024-03-12T10:00:00"))
+
+        result = asyncio.run(run())
+        assert "frequent" in patterns(result)
+
+    def test_batch_records_history_once(self, detector):
+        claims = [make_claim(f"c{i}", claim_date=f"2024-0{3 - i}-12T10:00:00") for i in range(3)]
+
+        async def run():
+            first = await detector.score_claims_batch(claims)
+            return first, await detector.score_claims_batch(claims)
+
+        first, again = asyncio.run(run())
+        # Claims count towards the history of later-filed claims in the same batch only
+        assert ["frequent" in patterns(result) for result in first] == [True, False, False]
+        assert len(detector.claim_history) == 3
+        assert [result["fraud_score"] for result in again] == [result["fraud_score"] for result in first]
+
+    def test_claims_without_id_are_not_recorded(self, detector):
+        claim = make_claim(None)
+
+        async def run():
+            return [await detector.analyze_claim(claim) for _ in range(3)]
+
+        results = asyncio.run(run())
+        assert len(detector.claim_history) == 0
+        assert "history" not in results[-1]["analyses"]
+
+    def test_shared_empty_index_is_filled(self, scripted_llm):
+        history = ClaimHistoryIndex()
+        detector = FraudDetector(claim_history=history)
+        detector.llm_provider = scripted_llm
+        asyncio.run(detector.analyze_claim(make_claim("c0")))
+        assert len(history) == 1
+
+class TestDateParsing:
+    """Claim dates keep their wall time everywhere"""
+
+    @pytest.mark.parametrize("offset", ["Z", "+05:30", "-0800"])
+    def test_offsets_are_dropped(self, offset):
+        wall = "2024-03-10T23:30:00"
+        assert _parse_datetime(wall + offset) == datetime.datetime(2024, 3, 10, 23, 30)
+        assert to_timestamp(wall + offset) == to_timestamp(wall)
+        assert _parse_datetimes([wall + offset]).astype("int64")[0] == to_timestamp(wall)
+
+    def test_history_window_uses_wall_time(self):
+        history = ClaimHistoryIndex()
+        history.add(make_claim("c0", claim_date="2024-03-10T23:30:00-08:00"))
+        # Converted to UTC the claim would fall on March 11
+        assert history.count("claimant", "h1", "2024-03-10", "2024-03-11") == 1
+
+class TestTimeBudgets:
+    """Concurrent analysis under per-analyzer budgets"""
+
+    def test_timed_out_analyzer_leaves_the_claim_unindexed(self, detector):
+        detector.analyzer_budgets["documentation"] = 0.05
+        detector.llm_provider = ScriptedLLM(rating=0.0, delay=0.5)
+        result = asyncio.run(detector.analyze_claim_concurrently(make_claim("c0")))
+        assert result["analyzer_status"]["documentation"] == "timeout"
+        assert not result["short_circuited"]
+        assert len(detector.description_index) == 0
+        assert detector.get_analyzer_stats()["documentation"]["timeout"] == 1
+
+    def test_finished_analyzers_index_the_claim(self, detector):
+        result = asyncio.run(detector.analyze_claim_concurrently(make_claim("c0")))
+        assert result["analyzer_status"]["documentation"] == "ok"
+        assert len(detector.description_index) == 1
+
+    def test_short_circuit_skips_slow_analyzers(self, detector):
+        detector.confidence_threshold = 0.5
+        detector.llm_provider = ScriptedLLM(rating=0.0, delay=0.5)
+        # Filed the day after the policy started, for the full property value
+        claim = make_claim("c0", policy_start_date="2024-03-11", claimed_amount=300000)
+        result = asyncio.run(detector.analyze_claim_concurrently(claim))
+        assert result["short_circuited"] and result["is_suspicious"]
+        assert result["analyzer_status"]["documentation"] == "skipped"
+        assert "documentation" not in result["analyses"]
+        assert result["elapsed_ms"] < 400
+        assert len(detector.description_index) == 0
+
+    def test_photo_workers_stop_after_a_timeout(self, detector, monkeypatch):
+        decoded = []
+
+        def slow_dhash(path):
+            time.sleep(0.05)
+            decoded.append(path)
+            return 0
+
+        monkeypatch.setattr(fraud_detector, "dhash", slow_dhash)
+        detector.analyzer_budgets["documentation"] = 0.02
+        claim = make_claim("c0", documents=[f"photo_{i}.jpg" for i in range(8)])
+        result = asyncio.run(detector.analyze_claim_concurrently(claim))
+        detector.photo_executor.shutdown(wait=True)
+        assert result["analyzer_status"]["documentation"] == "timeout"
+        # The photo being decoded finishes, the rest are never started
+        assert len(decoded) <= 2
+        assert len(detector.photo_index) == 0
+
+@pytest.fixture
+def photos(tmp_path):
+    """A roof photo, a resized re-encoded copy of it and an unrelated photo"""
+    from PIL import Image
+
+    rng = np.random.default_rng(1)
+    roof = (rng.random((240, 320, 3)) * 255).astype(np.uint8)
+    roof[60:180, 80:240] = [200, 40, 40]
+    paths = {name: str(tmp_path / name) for name in ("roof.jpg", "copy.png", "other.jpg")}
+    Image.fromarray(roof).save(paths["roof.jpg"], quality=95)
+    Image.fromarray(roof).resize((160, 120)).save(paths["copy.png"])
+    Image.fromarray((rng.random((240, 320, 3)) * 255).astype(np.uint8)).save(paths["other.jpg"])
+    return paths
+
+def reuse_patterns(result):
+    return [pattern for pattern in result["suspicious_patterns"] if pattern["pattern"] == "reused_photo"]
+
+class TestPhotoReuse:
+    """Near-duplicate photos across claimants"""
+
+    def test_copies_hash_close_and_other_photos_do_not(self, photos):
+        roof, copy, other = (dhash(photos[name]) for name in ("roof.jpg", "copy.png", "other.jpg"))
+        index = PhotoHashIndex()
+        assert hamming_distance(roof, copy) <= index.max_distance < hamming_distance(roof, other)
+        index.add(roof, "a1", "alice", photos["roof.jpg"])
+        assert [match["claim_id"] for match in index.find_reused(copy, "b1", "bob")] == ["a1"]
+        # The same claimant, or the same claim, is not reuse
+        assert index.find_reused(copy, "a2", "alice") == []
+        assert index.find_reused(roof, "a1", None) == []
+
+    def test_photo_on_another_claimants_claim_is_flagged(self, detector, photos):
+        documents = ["estimate.pdf", "invoice.pdf"]
+
+        async def run():
+            return [
+                await detector.analyze_claim(make_claim(claim_id, claimant, documents=documents + [photos[photo]]))
+                for claim_id, claimant, photo in (("a1", "alice", "roof.jpg"), ("a2", "alice", "roof.jpg"), ("b1", "bob", "copy.png"))
+            ]
+
+        first, own_again, copied = asyncio.run(run())
+        assert reuse_patterns(first) == [] and reuse_patterns(own_again) == []
+        [pattern] = reuse_patterns(copied)
+        assert "2 other claimants' claims" in pattern["description"]
+        assert len(detector.photo_index) == 3
+
+    def test_copies_within_a_batch_are_flagged(self, detector, photos):
+        claims = [
+            make_claim("a1", "alice", documents=[photos["roof.jpg"], photos["other.jpg"]]),
+            make_claim("b1", "bob", claim_date="2024-03-13T10:00:00", documents=[photos["copy.png"]])
+        ]
+        results = asyncio.run(detector.score_claims_batch(claims))
+        # Flagged on the claim that reuses the photo, as when analyzed one by one
+        assert [len(reuse_patterns(result)) for result in results] == [0, 1]
+        assert len(detector.photo_index) == 3
+
+    def test_indexed_photos_are_not_decoded_again(self, detector, photos, monkeypatch):
+        detector.photo_index.add(dhash(photos["roof.jpg"]), "a1", "alice", photos["roof.jpg"])
+        decoded = []
+
+        def counting_dhash(path):
+            decoded.append(path)
+            return dhash(path)
+
+        monkeypatch.setattr(fraud_detector, "dhash", counting_dhash)
+        claim = make_claim("a1", "alice", documents=[photos["roof.jpg"], photos["copy.png"]])
+        result = asyncio.run(detector.analyze_claim_concurrently(claim))
+        assert decoded == [photos["copy.png"]]
+        # A claim's own photos never match each other
+        assert "reused_photo" not in patterns(result)
+
+HAIL = (
+    "Hail storm on the night of March 3 cracked eleven shingles on the north slope, dented the gutters "
+    "and broke the skylight flashing over the kitchen; water came through the ceiling drywall in two places."
+)
+WIND = "Wind tore a section of ridge cap loose and a branch from the oak punctured the garage roof near the vent stack."
+
+class TestDescriptionCopies:
+    """MinHash/LSH lookup of near-copied claim descriptions"""
+
+    def test_near_copies_are_found_and_unrelated_text_is_not(self):
+        index = DescriptionIndex()
+        index.add(HAIL, "a1", "alice")
+        edited = HAIL.replace("eleven", "twelve")
+        [match] = index.query(edited)
+        assert match["claim_id"] == "a1" and index.threshold <= match["similarity"] < 1
+        # The MinHash estimate tracks the true shingle Jaccard similarity
+        original, copy = set(shingles(HAIL)), set(shingles(edited))
+        assert match["similarity"] == pytest.approx(len(original & copy) / len(original | copy), abs=0.1)
+        assert index.query(WIND) == []
+
+    def test_indexed_claims_only_update_their_rating(self):
+        index = DescriptionIndex()
+        index.add(HAIL, "a1", "alice")
+        index.add(WIND, "a1", "alice", rating={"rating": 0.2, "explanation": "specific"})
+        assert len(index) == 1
+        assert index.query(HAIL)[0]["rating"] == {"rating": 0.2, "explanation": "specific"}
+        assert index.query(WIND) == []
+
+    def test_copy_by_another_claimant_is_flagged(self, detector):
+        async def run():
+            await detector.analyze_claim(make_claim("a1", "alice", description=HAIL))
+            return await detector.analyze_claim(make_claim("b1", "bob", description=HAIL.replace("eleven", "twelve")))
+
+        copied = asyncio.run(run())
+        assert "copied" in patterns(copied)
+        # Copies are flagged without asking the LLM about them
+        assert detector.llm_provider.calls == 1
+
+    def test_same_claimant_reuses_the_rating(self, detector):
+        async def run():
+            return [
+                await detector.analyze_claim(make_claim(claim_id, "alice", description=HAIL))
+                for claim_id in ("a1", "a2")
+            ]
+
+        first, second = asyncio.run(run())
+        assert "copied" not in patterns(second)
+        assert detector.llm_provider.calls == 1
+        assert detector.description_index.query(HAIL)[0]["rating"] is not None
+
+ROUTINE = (
+    "Hail damaged {count} shingles on the {side} slope and dented the gutters after the storm on March {day}.",
+    "Wind lifted {count} shingles along the {side} ridge and tore the flashing around the chimney on March {day}."
+)
+FLOOD = "Basement sump pump failed and flooded the finished family room, soaking carpet and drywall."
+
+def routine_claim(claim_id, claimant_id, rng):
+    """Hail or wind claim with a random shingle count, slope, date and amount"""
+    description = ROUTINE[rng.integers(2)].format(
+        count=rng.integers(5, 30), side=rng.choice(["north", "south", "east", "west"]), day=rng.integers(1, 10)
+    )
+    return make_claim(claim_id, claimant_id, description=description, claimed_amount=int(rng.choice([8000, 9000, 11000])))
+
+@pytest.fixture
+def claim_book():
+    """Embedding index of 200 routine hail and wind claims"""
+    from agents.Analysis.claim_embeddings import ClaimEmbeddingIndex, claim_vector
+
+    rng = np.random.default_rng(2)
+    claims = [routine_claim(f"h{i}", f"p{i}", rng) for i in range(200)]
+    index = ClaimEmbeddingIndex()
+    index.add_many([claim_vector(claim) for claim in claims], [claim["claim_id"] for claim in claims])
+    return index
+
+def unusual_and_routine():
+    return [make_claim("z1", "zoe", description=FLOOD, claimed_amount=190000),
+            routine_claim("z2", "zoe", np.random.default_rng(3))]
+
+class TestAtypicalClaims:
+    """Claims far from their nearest historical claims in embedding space"""
+
+    def test_unusual_claim_is_atypical(self, scripted_llm, claim_book):
+        detector = FraudDetector(embedding_index=claim_book)
+        detector.llm_provider = scripted_llm
+
+        async def run():
+            return [await detector.analyze_claim(claim) for claim in unusual_and_routine()]
+
+        odd, routine = asyncio.run(run())
+        [atypical] = [p for p in odd["analyses"]["history"]["suspicious_patterns"] if p["pattern"] == "atypical"]
+        assert atypical["confidence"] >= 0.5
+        assert "atypical" not in patterns(routine)
+        assert len(claim_book) == 202
+
+    def test_batch_scores_against_the_same_percentiles(self, scripted_llm, claim_book):
+        detector = FraudDetector(embedding_index=claim_book)
+        detector.llm_provider = scripted_llm
+        results = asyncio.run(detector.score_claims_batch(unusual_and_routine()))
+        assert ["atypical" in patterns(result) for result in results] == [True, False]
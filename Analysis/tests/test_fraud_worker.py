@@ -0,0 +1,174 @@
+"""
+Test suite for the streaming fraud scoring worker
+"""
+
+import asyncio
+
+import pytest
+
+from agents.Analysis.fraud_worker import (
+    FraudScoringWorker,
+    LocalClaimEventStream,
+    LocalFraudResultStore,
+    claim_version
+)
+
+class CountingDetector:
+    """Detector scoring each claim by its amount, failing the next `failures` batches"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    async def score_claims_batch(self, claims, max_llm_concurrency=8):
+        self.batches.append([claim["claim_id"] for claim in claims])
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("detector unavailable")
+        return [{"fraud_score": claim.get("claimed_amount", 0) / 1e5} for claim in claims]
+
+def worker_for(detector, **kwargs):
+    """Worker that reclaims unacknowledged events on every pass"""
+    return FraudScoringWorker(detector, LocalClaimEventStream(), LocalFraudResultStore(),
+                              block_ms=10, reclaim_idle_ms=0, **kwargs)
+
+def claim(claim_id, version, amount=5000):
+    return {"claim_id": claim_id, "version": version, "claimed_amount": amount}
+
+async def deliver(worker, *claims, passes=1):
+    """Publish the claims, then run the worker the given number of passes"""
+    for data in claims:
+        await worker.stream.publish(data)
+    for _ in range(passes):
+        await worker.run_once()
+    return await worker.get_metrics()
+
+class TestRedelivery:
+    """Unacknowledged events are delivered again"""
+
+    def test_failed_batch_is_reclaimed_and_scored(self):
+        detector = CountingDetector(failures=1)
+        worker = worker_for(detector)
+
+        async def go():
+            failed = await deliver(worker, claim("c1", 1), claim("c2", 1))
+            assert worker.results.results == {}
+            return failed, await deliver(worker)
+
+        failed, metrics = asyncio.run(go())
+        assert failed["failed_batches"] == 1 and failed["pending"] == 2
+        assert metrics["redelivered"] == 2 and metrics["pending"] == 0
+        assert detector.batches == [["c1", "c2"], ["c1", "c2"]]
+        assert set(worker.results.results) == {"c1", "c2"}
+
+    def test_events_are_dropped_after_max_deliveries(self):
+        detector = CountingDetector(failures=100)
+        worker = worker_for(detector, max_deliveries=3)
+        metrics = asyncio.run(deliver(worker, claim("c1", 1), passes=4))
+        assert len(detector.batches) == 3
+        assert metrics["dead_lettered"] == 1 and metrics["pending"] == 0
+
+    def test_redelivered_event_already_written_is_not_scored_again(self):
+        detector = CountingDetector()
+        worker = worker_for(detector)
+
+        async def crash_before_ack():
+            await worker.stream.publish(claim("c1", 1))
+            messages = await worker.stream.read(10, 10)
+            # The scores were written but the worker died before acknowledging
+            scored = await detector.score_claims_batch([event["claim"] for _, event, _ in messages])
+            await worker.results.write([{**scored[0], "claim_id": "c1", "version": 1}])
+            await worker.run_once()
+            return await worker.get_metrics()
+
+        metrics = asyncio.run(crash_before_ack())
+        assert metrics["redelivered"] == 1 and metrics["duplicates"] == 1
+        assert metrics["pending"] == 0
+        assert len(detector.batches) == 1
+
+class TestVersionIdempotency:
+    """Each claim version is scored once"""
+
+    def test_duplicate_events_are_scored_once(self):
+        detector = CountingDetector()
+        worker = worker_for(detector)
+
+        async def go():
+            await deliver(worker, claim("c1", 1))
+            return await deliver(worker, claim("c1", 1))
+
+        metrics = asyncio.run(go())
+        assert detector.batches == [["c1"]]
+        assert metrics["scored"] == 1 and metrics["duplicates"] == 1
+
+    def test_only_the_newest_version_in_a_batch_is_scored(self):
+        detector = CountingDetector()
+        worker = worker_for(detector)
+        metrics = asyncio.run(deliver(worker, claim("c1", 1, 5000), claim("c1", 3, 9000), claim("c1", 2, 7000)))
+        assert detector.batches == [["c1"]]
+        assert worker.results.results["c1"]["version"] == 3
+        assert worker.results.results["c1"]["fraud_score"] == 0.09
+        assert metrics["duplicates"] == 2
+
+    def test_out_of_date_events_do_not_overwrite_newer_scores(self):
+        detector = CountingDetector()
+        worker = worker_for(detector)
+
+        async def go():
+            await deliver(worker, claim("c1", 2, 9000))
+            await deliver(worker, claim("c1", 1, 5000))
+            assert worker.results.results["c1"]["version"] == 2
+            await deliver(worker, claim("c1", 3, 7000))
+
+        asyncio.run(go())
+        assert worker.results.results["c1"]["version"] == 3
+        assert detector.batches == [["c1"], ["c1"]]
+
+    def test_store_keeps_the_newest_version(self):
+        store = LocalFraudResultStore()
+        written = asyncio.run(store.write([{"claim_id": "c1", "version": 2}, {"claim_id": "c1", "version": 1}]))
+        assert written == 1
+        assert asyncio.run(store.versions(["c1", "c2"])) == {"c1": 2}
+
+    @pytest.mark.parametrize("data, expected", [
+        ({"version": 4, "updated_at": "2024-03-12T10:00:00"}, 4),
+        ({}, 0)
+    ])
+    def test_claim_version(self, data, expected):
+        assert claim_version(data) == expected
+
+    def test_later_edits_have_higher_versions(self):
+        assert claim_version({"updated_at": "2024-03-12T10:00:01"}) > claim_version({"updated_at": "2024-03-12T10:00:00"})
+
+class TestLocalStream:
+    """Delivery semantics of the in-process stream"""
+
+    def test_reclaim_waits_for_the_idle_time(self):
+        stream = LocalClaimEventStream()
+
+        async def go():
+            await stream.publish(claim("c1", 1))
+            [(message_id, event, deliveries)] = await stream.read(10, 10)
+            assert event["claim"] == claim("c1", 1) and deliveries == 1
+            assert await stream.reclaim(60000, 10) == []
+            [(reclaimed_id, _, deliveries)] = await stream.reclaim(0, 10)
+            assert reclaimed_id == message_id and deliveries == 2
+            await stream.ack([message_id])
+            return await stream.reclaim(0, 10), await stream.backlog()
+
+        assert asyncio.run(go()) == ([], {"lag": 0, "pending": 0})
+
+    def test_publish_waits_while_the_backlog_is_full(self):
+        stream = LocalClaimEventStream(max_backlog=2)
+
+        async def go():
+            for version in (1, 2):
+                await stream.publish(claim("c1", version))
+            blocked = asyncio.create_task(stream.publish(claim("c1", 3)))
+            await asyncio.sleep(0.01)
+            assert not blocked.done()
+            await stream.read(1, 10)
+            await asyncio.wait_for(blocked, 1)
+            return await stream.backlog()
+
+        assert asyncio.run(go()) == {"lag": 2, "pending": 1}
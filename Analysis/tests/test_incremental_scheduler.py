@@ -0,0 +1,138 @@
+"""
+Test suite for incremental fleet rescheduling
+"""
+
+import asyncio
+import datetime
+import types
+
+import numpy as np
+import pytest
+
+from agents.Analysis import incremental_scheduler
+from agents.Analysis.incremental_scheduler import IncrementalScheduler
+from agents.Analysis.scheduler import Scheduler
+
+MONDAY = datetime.date(2024, 5, 6)
+CREWS = [{"crew_id": "c1", "size": 4}]
+EQUIPMENT = {"ladder": 2, "hand_tools": 2, "power_tools": 2}
+
+def daily_forecast(start, conditions):
+    """Daily forecast from start, one day per weather condition"""
+    return [
+        {
+            "date": str(start + datetime.timedelta(days=day)),
+            "temp": {"min": 65, "max": 75, "day": 70},
+            "humidity": 50, "wind_speed": 5, "precipitation": 0.0 if condition == "Clear" else 1.0,
+            "weather_condition": condition
+        }
+        for day, condition in enumerate(conditions)
+    ]
+
+def project(project_id, location="Dallas, TX", available_dates=None):
+    """Two-day repair needing a three-person crew"""
+    return {
+        "project_id": project_id,
+        "project_details": {"repair_type": "partial_replacement", "area_squares": 5},
+        "location": location,
+        "available_dates": available_dates
+    }
+
+class Clock:
+    """Stand-in for the datetime module whose date.today() can be moved"""
+
+    def __init__(self, today):
+        self.date = types.SimpleNamespace(today=lambda: self.today)
+        self.today = today
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(MONDAY)
+    monkeypatch.setattr(incremental_scheduler, "datetime", clock)
+    return clock
+
+@pytest.fixture
+def forecasts():
+    """Forecast by location; locations left out are clear from Monday"""
+    return {}
+
+@pytest.fixture
+def scheduler(forecasts, monkeypatch):
+    scheduler = Scheduler(weather_api_key=None)
+
+    async def get_weather_forecast(location, days=7):
+        return forecasts.get(location, daily_forecast(MONDAY, ["Clear"] * days))
+
+    monkeypatch.setattr(scheduler, "get_weather_forecast", get_weather_forecast)
+    return scheduler
+
+def dates(schedule):
+    return {entry["project_id"]: (entry["start_date"], entry["end_date"]) for entry in schedule}
+
+class TestForecastUpdates:
+    """Only projects a forecast change touches are re-planned"""
+
+    def test_storm_moves_only_the_affected_project(self, clock, scheduler, forecasts):
+        crews = CREWS + [{"crew_id": "c2", "size": 4}]
+        incremental = IncrementalScheduler(scheduler, crews, EQUIPMENT, horizon_days=7)
+        asyncio.run(incremental.plan([project("a"), project("b", location="Austin, TX")]))
+        assert dates(incremental.get_schedule())["a"] == ("2024-05-06", "2024-05-08")
+
+        forecasts["Dallas, TX"] = daily_forecast(MONDAY, ["Thunderstorm"] * 2 + ["Clear"] * 5)
+        result = asyncio.run(incremental.update_forecast("Dallas, TX"))
+        assert result["changed_dates"] == ["2024-05-06", "2024-05-07"]
+        assert result["affected"] == ["a"]
+        assert [(change["project_id"], change["change"]) for change in result["changes"]] == [("a", "rescheduled")]
+        assert dates(incremental.get_schedule()) == {
+            "a": ("2024-05-08", "2024-05-10"), "b": ("2024-05-06", "2024-05-08")
+        }
+
+    def test_unchanged_forecast_changes_nothing(self, clock, scheduler, forecasts):
+        incremental = IncrementalScheduler(scheduler, CREWS, EQUIPMENT, horizon_days=7)
+        asyncio.run(incremental.plan([project("a")]))
+        result = asyncio.run(incremental.update_forecast("Dallas, TX"))
+        assert result["changed_dates"] == [] and result["changes"] == []
+
+class TestRollingHorizon:
+    """The horizon starts at today on every update"""
+
+    def plan(self, scheduler):
+        incremental = IncrementalScheduler(scheduler, CREWS, EQUIPMENT, horizon_days=7)
+        later = [str(MONDAY + datetime.timedelta(days=day)) for day in range(3, 7)]
+        asyncio.run(incremental.plan([project("a"), project("b", available_dates=later)]))
+        return incremental
+
+    def test_origin_moves_with_the_calendar(self, clock, scheduler, forecasts):
+        incremental = self.plan(scheduler)
+        before = incremental.get_schedule()
+        assert dates(before) == {"a": ("2024-05-06", "2024-05-08"), "b": ("2024-05-09", "2024-05-11")}
+
+        clock.today = MONDAY + datetime.timedelta(days=1)
+        forecasts["Dallas, TX"] = daily_forecast(clock.today, ["Clear"] * 7)
+        result = asyncio.run(incremental.update_forecast("Dallas, TX"))
+        assert incremental.origin == np.datetime64("2024-05-07")
+        # The day that scrolled into the horizon is the only new one
+        assert result["changed_dates"] == ["2024-05-13"]
+        assert result["changes"] == [] and result["finished"] == []
+        # Dates stay put, the started project keeps its first day
+        assert incremental.get_schedule() == before
+        assert incremental.assignments["b"]["start_day"] == 2
+        assert incremental.started == {"a": "2024-05-06"}
+
+    def test_started_projects_are_not_moved(self, clock, scheduler, forecasts):
+        incremental = self.plan(scheduler)
+        clock.today = MONDAY + datetime.timedelta(days=1)
+        forecasts["Dallas, TX"] = daily_forecast(clock.today, ["Thunderstorm"] + ["Clear"] * 6)
+        result = asyncio.run(incremental.update_forecast("Dallas, TX"))
+        assert "a" not in result["affected"]
+        assert dates(incremental.get_schedule())["a"] == ("2024-05-06", "2024-05-08")
+
+    def test_finished_projects_leave_the_plan(self, clock, scheduler, forecasts):
+        incremental = self.plan(scheduler)
+        clock.today = MONDAY + datetime.timedelta(days=2)
+        forecasts["Dallas, TX"] = daily_forecast(clock.today, ["Clear"] * 7)
+        result = asyncio.run(incremental.update_forecast("Dallas, TX"))
+        assert result["finished"] == ["a"]
+        assert [p["project_id"] for p in incremental.projects] == ["b"]
+        assert dates(incremental.get_schedule()) == {"b": ("2024-05-09", "2024-05-11")}
+        assert incremental.started == {}
@@ -0,0 +1,123 @@
+"""
+Test suite for crew route sequencing
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from agents.Analysis.fleet_scheduler import FleetScheduler
+from agents.Analysis.route_sequencer import RouteSequencer, or_opt, tour_length
+from agents.Analysis.scheduler import Scheduler
+
+def random_distances(n, seed, symmetric=True):
+    rng = np.random.default_rng(seed)
+    distances = rng.uniform(1, 100, (n, n))
+    if symmetric:
+        distances = (distances + distances.T) / 2
+    np.fill_diagonal(distances, 0)
+    return distances
+
+def best_single_move(tour, distances, closed, max_segment=3):
+    """Shortest tour one Or-opt move away, by trying every move"""
+    best = tour_length(tour, distances)
+    last = len(tour) - 1 if closed else len(tour)
+    for length in range(1, max_segment + 1):
+        for i in range(1, last - length + 1):
+            segment = tour[i:i + length]
+            rest = tour[:i] + tour[i + length:]
+            for j in range(1, len(rest) + (0 if closed else 1)):
+                for piece in (segment, segment[::-1]):
+                    best = min(best, tour_length(rest[:j] + piece + rest[j:], distances))
+    return best
+
+class TestOrOpt:
+    """Vectorized Or-opt moves"""
+
+    @pytest.mark.parametrize("closed", [True, False])
+    @pytest.mark.parametrize("symmetric", [True, False])
+    def test_result_is_a_local_optimum(self, closed, symmetric):
+        for seed in range(5):
+            distances = random_distances(10, seed, symmetric)
+            start = list(range(10)) + ([0] if closed else [])
+            tour = or_opt(start, distances, closed=closed)
+            assert tour[0] == 0 and sorted(tour[1:len(tour) - closed]) == list(range(1, 10))
+            assert tour_length(tour, distances) <= tour_length(start, distances)
+            assert best_single_move(tour, distances, closed) >= tour_length(tour, distances) - 1e-9
+
+    def test_out_of_the_way_stop_is_moved(self):
+        # Stops on a line, with stop 3 visited between the far ends
+        points = np.array([0.0, 1.0, 2.0, 10.0, 3.0, 4.0])
+        distances = np.abs(points[:, None] - points[None, :])
+        tour = or_opt([0, 1, 3, 2, 4, 5], distances, closed=False)
+        assert tour == [0, 1, 2, 4, 5, 3]
+
+class TestRouteSequencer:
+    """Crew-day routes"""
+
+    def test_jobs_of_crews_without_a_depot_are_kept(self):
+        jobs = [
+            {"job_id": name, "crew_id": "nomad", "coordinates": (32.7, lon),
+             "start_date": "2024-05-06", "end_date": "2024-05-07"}
+            for name, lon in (("west", -97.4), ("east", -96.6), ("middle", -97.0))
+        ]
+        routes = RouteSequencer().sequence(jobs, {"crew_1": (32.8, -96.8)})
+        assert len(routes) == 1
+        route = routes[0]
+        assert not route["from_depot"]
+        # The route starts at the first job and never doubles back
+        assert route["stops"] == ["west", "middle", "east"]
+        assert len(route["leg_miles"]) == 2
+        assert route["total_miles"] < route["unsequenced_miles"]
+
+    def test_depot_routes_return_home(self):
+        jobs = [
+            {"job_id": i, "crew_id": "crew_1", "coordinates": (32.7 + 0.05 * i, -96.8),
+             "start_date": "2024-05-06", "end_date": "2024-05-08"}
+            for i in (2, 0, 1)
+        ]
+        routes = RouteSequencer().sequence(jobs, {"crew_1": (32.7, -96.8)})
+        assert [route["date"] for route in routes] == ["2024-05-06", "2024-05-07"]
+        assert all(route["from_depot"] and route["stops"] == [0, 1, 2] for route in routes)
+        assert all(len(route["leg_miles"]) == 4 for route in routes)
+
+class TestSharedCrewDays:
+    """Short jobs share a crew-day, so there is something to sequence"""
+
+    def test_half_day_jobs_share_a_crew(self):
+        projects = [
+            {"project_id": f"p{i}", "duration_days": 1, "daily_hours": 4, "crew_size": 2, "equipment": []}
+            for i in range(3)
+        ]
+        plan = FleetScheduler([{"crew_id": "c1", "size": 2}], {}, 2).solve(projects, np.array([[1.0, 0.5]] * 3))
+        assert sorted(a["start_day"] for a in plan["assignments"]) == [0, 0, 1]
+        # Whole-day jobs still get a crew-day each
+        whole_days = [{**project, "daily_hours": None} for project in projects]
+        plan = FleetScheduler([{"crew_id": "c1", "size": 2}], {}, 2).solve(whole_days, np.array([[1.0, 0.5]] * 3))
+        assert sorted(a["start_day"] for a in plan["assignments"]) == [0, 1]
+
+    def test_fleet_schedule_sequences_shared_days(self):
+        scheduler = Scheduler(weather_api_key=None)
+        projects = [
+            {
+                "project_id": f"spot_{i}",
+                "project_details": {"repair_type": "spot_repair", "coordinates": (32.7 + 0.1 * i, -96.8)},
+                "location": "Dallas, TX"
+            }
+            for i in range(2)
+        ]
+
+        async def run():
+            fleet = await scheduler.schedule_fleet(
+                projects, [{"crew_id": "crew_1", "size": 2}], {"ladder": 2, "hand_tools": 2}, horizon_days=1
+            )
+            results = [
+                {**entry, "project_details": project["project_details"]}
+                for entry, project in zip(sorted(fleet["schedule"], key=lambda e: e["project_id"]), projects)
+            ]
+            return fleet, scheduler.sequence_crew_routes(results, {"crew_1": (32.6, -96.8)})
+
+        fleet, routes = asyncio.run(run())
+        assert fleet["unscheduled"] == []
+        assert [route["stops"] for route in routes["routes"]] == [["spot_0", "spot_1"]]
@@ -0,0 +1,321 @@
+"""
+Test suite for the scheduler agent
+"""
+
+import asyncio
+import datetime
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from agents.Analysis.forecast_cache import pack_hourly, unpack_hourly
+from agents.Analysis.scheduler import (
+    MAX_FORECAST_DAYS, Scheduler, block_mask, cap_daily_hours, top_k_windows, window_scores
+)
+
+DAY = int(datetime.datetime(2024, 5, 6).timestamp()) // 86400 * 86400
+
+def hourly_forecast(workable_hours, days):
+    """UTC hourly forecast, clear during workable_hours each day and stormy otherwise"""
+    records = [
+        {
+            "time": DAY + day * 86400 + hour * 3600,
+            "temp": 70, "wind_speed": 5, "precipitation": 0, "humidity": 50,
+            "weather_condition": "Clear" if hour in workable_hours else "Thunderstorm"
+        }
+        for day in range(days) for hour in range(24)
+    ]
+    return unpack_hourly(pack_hourly(records), 0)
+
+@pytest.fixture
+def scheduler():
+    return Scheduler(weather_api_key=None)
+
+def random_forecast(days, seed=0, start=np.datetime64("2024-05-06")):
+    """Daily forecasts from start covering every branch of the suitability formula"""
+    rng = np.random.default_rng(seed)
+    conditions = ["Clear", "Clouds", "Rain", "Thunderstorm", "Snow", "Drizzle", "Mist", "Fog", "Haze"]
+    return [
+        {
+            "date": str(start + day),
+            "temp": {"day": float(rng.uniform(-10, 120))},
+            "wind_speed": float(rng.uniform(0, 45)),
+            "precipitation": float(rng.choice([0.0, rng.uniform(0, 1.5)])),
+            "humidity": float(rng.uniform(20, 110)),
+            "weather_condition": str(rng.choice(conditions))
+        }
+        for day in range(days)
+    ]
+
+class TestWeatherScoring:
+    """Vectorized suitability matches the per-day formula"""
+
+    def test_matches_the_scalar_formula(self, scheduler):
+        forecast = random_forecast(500)
+        scores = scheduler.score_weather_arrays(**scheduler._forecast_to_columns(forecast))
+
+        async def scalar():
+            return [await scheduler._evaluate_weather_suitability(day) for day in forecast]
+
+        assert scores.tolist() == asyncio.run(scalar())
+        assert 0 < np.count_nonzero(scores == 1.0) < len(scores)
+
+    def test_scores_locations_by_days(self, scheduler):
+        forecasts = [random_forecast(14, seed) for seed in range(3)]
+        columns = [scheduler._forecast_to_columns(forecast) for forecast in forecasts]
+        stacked = {name: np.stack([column[name] for column in columns]) for name in columns[0]}
+        scores = scheduler.score_weather_arrays(**stacked)
+        assert scores.shape == (3, 14)
+        for row, column in zip(scores, columns):
+            assert row.tolist() == scheduler.score_weather_arrays(**column).tolist()
+
+    def test_padded_days_are_nan(self, scheduler):
+        scores = scheduler.score_weather_arrays(
+            temp=[70.0, np.nan], wind_speed=[5.0, 0.0], precipitation=[0.0, 0.0],
+            humidity=[50.0, 0.0], weather_condition=["Clear", None]
+        )
+        assert scores[0] == 1.0 and np.isnan(scores[1])
+
+class TestHourlyBlocks:
+    """Daily hour caps never leave a block too short to work"""
+
+    def test_cap_keeps_earliest_hours(self):
+        usable = np.array([1, 1, 1, 0, 1, 1, 1, 1, 1, 1], dtype=bool)
+        day = np.array([0] * 5 + [1] * 5)
+        assert cap_daily_hours(usable, day, 2).tolist() == [1, 1, 0, 0, 0, 1, 1, 0, 0, 0]
+
+    def test_capped_day_drops_the_cut_block(self, scheduler, monkeypatch):
+        # Seven clear hours, a storm at 14:00, then four more clear hours
+        workable = set(range(7, 14)) | set(range(15, 19))
+        forecast = hourly_forecast(workable, days=3)
+
+        async def get_hourly(location, hours=96):
+            return forecast
+
+        monkeypatch.setattr(scheduler, "_get_hourly_forecast", get_hourly)
+        dates = [str(np.datetime64(DAY, "s").astype("datetime64[D]") + i) for i in range(3)]
+        result = asyncio.run(scheduler._schedule_project_hourly(
+            {"repair_type": "partial_replacement", "area_squares": 5}, "Dallas, TX", dates, {}
+        ))
+        assert result["is_scheduled"]
+        blocks = [block for window in result["suggested_windows"] for block in window["work_blocks"]]
+        assert min(block["hours"] for block in blocks) >= scheduler.hourly_constraints["min_block_hours"]
+        # The 15:00 hour that would have topped up the first day to eight is not used
+        assert result["suggested_windows"][0]["work_blocks"][:2] == [
+            {"start": dates[0] + "T07:00:00", "end": dates[0] + "T14:00:00", "hours": 7},
+            {"start": dates[1] + "T07:00:00", "end": dates[1] + "T14:00:00", "hours": 7}
+        ]
+
+    def test_block_mask_is_idempotent_after_the_cap(self):
+        workable = np.array([1, 1, 1, 0, 1, 1, 0, 1], dtype=bool)
+        day = np.zeros(8, dtype=int)
+        usable = block_mask(cap_daily_hours(block_mask(workable, 2), day, 4), 2)
+        assert usable.tolist() == [1, 1, 1, 0, 0, 0, 0, 0]
+
+def three_hour_response(steps):
+    return {
+        "city": {"timezone": -18000},
+        "list": [
+            {
+                "dt": DAY + step * 10800,
+                "main": {"temp": 70 + step, "humidity": 40},
+                "wind": {"speed": 5},
+                "rain": {"3h": 7.62} if step == 1 else {},
+                "weather": [{"main": "Clear"}]
+            }
+            for step in range(steps)
+        ]
+    }
+
+class TestWeatherClient:
+    """Weather API requests share one pooled client"""
+
+    def test_fetches_reuse_one_client(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"list": []})
+
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            scheduler = Scheduler(weather_api_key="key", http_client=client)
+            for location in ("Dallas, TX", "Austin, TX"):
+                await scheduler._fetch_weather_forecast(location, days=3)
+            # A client passed in belongs to the caller
+            await scheduler.close()
+            return client
+
+        client = asyncio.run(run())
+        assert len(requests) == 2 and not client.is_closed
+
+    def test_own_client_is_created_once_and_closed(self, scheduler):
+        async def run():
+            client = scheduler._get_http_client()
+            assert scheduler._get_http_client() is client
+            await scheduler.close()
+            return client
+
+        assert asyncio.run(run()).is_closed
+        assert scheduler.http_client is None
+
+    def test_hourly_falls_back_to_three_hour_data(self):
+        hosts = []
+
+        def handler(request):
+            hosts.append(request.url.host)
+            if request.url.host == "pro.openweathermap.org":
+                return httpx.Response(401, json={"message": "Invalid API key"})
+            assert request.url.params["cnt"] == "3"
+            return httpx.Response(200, content=json.dumps(three_hour_response(3)).encode())
+
+        async def run():
+            scheduler = Scheduler(weather_api_key="key", http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+            first = await scheduler._fetch_hourly_forecast("Dallas, TX", hours=8)
+            second = await scheduler._fetch_hourly_forecast("Dallas, TX", hours=8)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert hosts == ["pro.openweathermap.org", "api.openweathermap.org", "api.openweathermap.org"]
+        assert first == second and len(first) == 8
+        assert [hour["time"] - DAY for hour in first] == [i * 3600 for i in range(8)]
+        assert [hour["temp"] for hour in first] == [70] * 3 + [71] * 3 + [72] * 2
+        # 7.62 mm over three hours is 0.1 inch an hour
+        assert [round(hour["precipitation"], 6) for hour in first[3:6]] == [0.1] * 3
+        assert all(hour["utc_offset"] == -18000 for hour in first)
+
+class TestWindowScores:
+    """Window means are exact, so equal windows tie wherever they lie"""
+
+    def test_equal_windows_tie_whatever_the_origin(self):
+        days = np.array([0.4, 0.7, 0.2, 0.1, 0.1, 0.1, 0.1, 0.2, 0.4, 0.7, 0.1])
+        for lead in range(6):
+            scores = window_scores(np.concatenate([np.full(lead, 0.45), days]), 3)[lead:]
+            # 0.4 + 0.7 + 0.2 at day 0 and 0.2 + 0.4 + 0.7 at day 7
+            assert scores[0] == scores[7]
+            assert top_k_windows(scores, 2).tolist() == [0, 7]
+
+    def test_matches_the_scalar_mean(self):
+        days = np.random.default_rng(0).random(30)
+        days[[4, 17]] = np.nan
+        scores = window_scores(days, 3)
+        for start, score in enumerate(scores):
+            window = days[start:start + 3]
+            assert np.isnan(score) if np.isnan(window).any() else score == pytest.approx(window.mean(), abs=1e-9)
+
+class TestForecastHorizon:
+    """Requests stop at the API's forecast range"""
+
+    def test_forecast_request_is_clamped(self, scheduler, monkeypatch):
+        requested = []
+
+        def simulated(days=7):
+            requested.append(days)
+            return []
+
+        monkeypatch.setattr(scheduler, "_get_simulated_weather", simulated)
+        asyncio.run(scheduler.get_weather_forecast("Dallas, TX", days=30))
+        assert requested == [MAX_FORECAST_DAYS]
+
+    def test_dates_past_the_forecast_are_unscheduled(self, scheduler):
+        today = np.datetime64(datetime.date.today(), "D")
+        near = [str(today + day) for day in range(1, 5)]
+        far = [str(today + day) for day in range(20, 25)]
+
+        result = asyncio.run(scheduler.schedule_project({"repair_type": "spot_repair"}, "Dallas, TX", near + far, {}))
+        assert result["is_scheduled"]
+        assert result["beyond_forecast"] == far
+        assert all(window["start_date"] in near for window in result["suggested_dates"])
+
+        result = asyncio.run(scheduler.schedule_project({"repair_type": "spot_repair"}, "Dallas, TX", far, {}))
+        assert not result["is_scheduled"]
+        assert result["reason"] == f"Available dates are beyond the {MAX_FORECAST_DAYS}-day forecast"
+        assert result["beyond_forecast"] == far
+
+    def test_batch_reports_dates_past_the_forecast(self, scheduler):
+        today = np.datetime64(datetime.date.today(), "D")
+        far = [str(today + day) for day in range(20, 25)]
+        projects = [
+            {"project_details": {"repair_type": "spot_repair"}, "location": "Dallas, TX", "available_dates": dates}
+            for dates in ([str(today + 1)] + far, far)
+        ]
+        near, beyond = asyncio.run(scheduler.schedule_projects_batch(projects))
+        assert near["is_scheduled"] and near["beyond_forecast"] == far
+        assert not beyond["is_scheduled"] and beyond["beyond_forecast"] == far
+
+class TestBatchScheduling:
+    """Many projects scheduled in one call"""
+
+    @pytest.fixture
+    def fetches(self, scheduler, monkeypatch):
+        """Forecast requests, served a fixed random forecast per bucket"""
+        fetches = []
+        seeds = {}
+
+        async def get_weather_forecast(location, days=7):
+            fetches.append((location, days))
+            seed = seeds.setdefault(scheduler.forecast_cache.bucket_for(location), len(seeds))
+            return random_forecast(days, seed, start=np.datetime64(datetime.date.today(), "D"))
+
+        monkeypatch.setattr(scheduler, "get_weather_forecast", get_weather_forecast)
+        return fetches
+
+    def projects(self):
+        today = np.datetime64(datetime.date.today(), "D")
+        rng = np.random.default_rng(1)
+        locations = ["Dallas, TX", "dallas,  tx", "75201", "75201-1234", "Austin, TX", "32.78,-96.80"]
+        details = [
+            {"repair_type": "spot_repair"},
+            {"repair_type": "partial_replacement", "area_squares": 5},
+            {"repair_type": "partial_replacement", "area_squares": 20},
+            {"repair_type": "full_replacement", "area_squares": 8}
+        ]
+        projects = [
+            {
+                "project_details": details[i % len(details)],
+                "location": location,
+                "available_dates": sorted(str(today + day) for day in rng.choice(12, size=8, replace=False))
+            }
+            for i, location in enumerate(locations * 2)
+        ]
+        # A three-day job with no three days in a row, and one with no dates in the forecast
+        projects.append({**projects[2], "available_dates": [str(today + day) for day in range(0, 12, 2)]})
+        projects.append({**projects[0], "available_dates": [str(today + 30)]})
+        return projects
+
+    def test_matches_scheduling_one_at_a_time(self, scheduler, fetches):
+        projects = self.projects()
+
+        async def run():
+            batch = await scheduler.schedule_projects_batch(projects, top_k=3)
+            single = [
+                await scheduler.schedule_project(
+                    project["project_details"], project["location"], project["available_dates"], {}, top_k=3
+                )
+                for project in projects
+            ]
+            return batch, single
+
+        batch, single = asyncio.run(run())
+        assert any(result["is_scheduled"] for result in batch)
+        assert any(not result["is_scheduled"] for result in batch)
+        for mine, theirs in zip(batch, single):
+            assert mine["is_scheduled"] == theirs["is_scheduled"]
+            if mine["is_scheduled"]:
+                assert mine["start_date"] == theirs["start_date"]
+            else:
+                assert mine["reason"] == theirs["reason"]
+            assert mine["suggested_dates"] == theirs["suggested_dates"]
+            assert mine.get("weather_scores") == theirs.get("weather_scores")
+
+    def test_one_forecast_per_bucket(self, scheduler, fetches):
+        asyncio.run(scheduler.schedule_projects_batch(self.projects()))
+        # Dallas by name, by ZIP and by coordinates, and Austin
+        assert [location for location, _ in fetches] == ["Dallas, TX", "75201", "Austin, TX", "32.78,-96.80"]
+        assert len({days for _, days in fetches}) == 1
+
+    def test_empty_batch(self, scheduler, fetches):
+        assert asyncio.run(scheduler.schedule_projects_batch([])) == []
+        assert fetches == []
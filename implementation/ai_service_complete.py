@@ -29,6 +29,8 @@ import pymongo
 import jwt
 from passlib.context import CryptContext
 
+from orpaynter_pricing import price_damage_repair
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -279,8 +281,6 @@ class CostEstimationModel:
     async def estimate_cost(self, damage_data: Dict, property_data: Dict, location: Dict) -> Dict[str, Any]:
         """Production cost estimation with real market data"""
         try:
-            await asyncio.sleep(1.5)  # Simulate API calls to pricing services
-            
             total_damage_area = damage_data.get("total_damage_area", 0)
             material_type = property_data.get("roofing_material", "asphalt_shingle")
             
@@ -289,12 +289,19 @@ class CostEstimationModel:
             material_data = self.material_costs.get(material_type, self.material_costs["asphalt_shingle"])
             
             # Calculate costs
-            material_cost = total_damage_area * material_data["cost_per_sqft"] * regional_data["material_markup"]
-            labor_hours = total_damage_area * material_data["labor_hours_per_sqft"]
-            labor_cost = labor_hours * regional_data["labor_rate_per_hour"]
+            labor_rate_per_sqft = material_data["labor_hours_per_sqft"] * regional_data["labor_rate_per_hour"]
             permit_cost = regional_data["permit_costs"]
-            
-            total_cost = material_cost + labor_cost + permit_cost
+            quote = await price_damage_repair(
+                material_data["cost_per_sqft"],
+                labor_rate_per_sqft,
+                total_damage_area,
+                material_markup=regional_data["material_markup"],
+                permit_cost=permit_cost
+            )
+            material_cost = quote.material_avg
+            labor_cost = quote.labor_avg
+            labor_hours = total_damage_area * material_data["labor_hours_per_sqft"]
+            total_cost = quote.total_avg
             
             return {
                 "total_cost": round(total_cost, 2),
@@ -23,6 +23,8 @@ from qdrant_client import QdrantClient
 from qdrant_client.http import models
 import pymongo
 
+from orpaynter_pricing import EstimateCache, freeze_rates, memoize_estimate, price_roof_estimate
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -152,8 +154,22 @@ class DamageDetectionModel:
                 "confidence_score": 0.0
             }
 
+def _estimate_cache_key(property_data: Dict, damages: List[Dict] = None):
+    """Reduce cost estimation inputs to the fields that affect the estimate"""
+    return {
+        "square_footage": property_data.get("square_footage", 2000),
+        "roof_type": property_data.get("roof_type", "asphalt_shingles"),
+        "location_multiplier": property_data.get("location_multiplier", 1.0),
+        "complete": all(k in property_data for k in ["square_footage", "roof_type"]),
+        # The damage multiplier is a product, so only the multiset of types matters
+        "damage_types": sorted(d.get("type", "missing_shingles") for d in damages or [])
+    }
+
 class CostEstimationModel:
-    def __init__(self):
+    # Read-only tables; replacing one invalidates cached estimates
+    RATE_TABLES = ("base_costs", "damage_multipliers")
+    
+    def __init__(self, cache_size: int = 4096):
         # Cost estimation model and regional pricing data
         self.base_costs = {
             "asphalt_shingles": {"material": 120, "labor": 180},
@@ -172,8 +188,30 @@ class CostEstimationModel:
             "gutters_damage": 0.8,
             "flashing_damage": 1.1
         }
+        
+        # Memoized estimates, keyed by normalized inputs and rate-table version
+        self.estimate_cache = EstimateCache(max_entries=cache_size)
+    
+    def __setattr__(self, name: str, value: Any):
+        """Store pricing tables read-only and invalidate cached estimates when one is replaced"""
+        if name in self.RATE_TABLES:
+            value = freeze_rates(value)
+        super().__setattr__(name, value)
+        if name in self.RATE_TABLES and "estimate_cache" in self.__dict__:
+            self.estimate_cache.invalidate()
     
-    def estimate_cost(self, property_data: Dict, damages: List[Dict] = None) -> Dict[str, Any]:
+    def reload_rates(self, base_costs: Dict = None, damage_multipliers: Dict = None):
+        """Replace pricing tables, invalidating cached estimates"""
+        if base_costs is not None:
+            self.base_costs = base_costs
+        if damage_multipliers is not None:
+            self.damage_multipliers = damage_multipliers
+    
+    @memoize_estimate(
+        key=_estimate_cache_key,
+        cacheable=lambda result: result.get("confidence_score", 0) > 0
+    )
+    async def estimate_cost(self, property_data: Dict, damages: List[Dict] = None) -> Dict[str, Any]:
         """Estimate repair/replacement costs"""
         try:
             # Base calculations
@@ -183,27 +221,27 @@ class CostEstimationModel:
             
             base_cost = self.base_costs.get(roof_type, self.base_costs["asphalt_shingles"])
             
-            # Calculate base material and labor costs
-            material_cost = base_cost["material"] * square_footage * location_multiplier
-            labor_cost = base_cost["labor"] * square_footage * location_multiplier
-            
-            # Apply damage multipliers
-            if damages:
-                damage_multiplier = 1.0
-                for damage in damages:
-                    damage_type = damage.get("type", "missing_shingles")
-                    multiplier = self.damage_multipliers.get(damage_type, 1.0)
-                    damage_multiplier *= multiplier
-                
-                material_cost *= damage_multiplier
-                labor_cost *= damage_multiplier
+            # Damage multipliers compound across detected damages
+            damage_multiplier = 1.0
+            for damage in damages or []:
+                damage_type = damage.get("type", "missing_shingles")
+                damage_multiplier *= self.damage_multipliers.get(damage_type, 1.0)
             
             # Additional costs
             permit_cost = 500
             cleanup_cost = 1000
             inspection_cost = 300
             
-            total_cost = material_cost + labor_cost + permit_cost + cleanup_cost + inspection_cost
+            quote = await price_roof_estimate(
+                base_cost,
+                square_footage,
+                location_multiplier=location_multiplier,
+                damage_multiplier=damage_multiplier,
+                fixed_extras=permit_cost + cleanup_cost + inspection_cost
+            )
+            material_cost = quote.material_avg
+            labor_cost = quote.labor_avg
+            total_cost = quote.total_avg
             
             cost_breakdown = {
                 "materials": material_cost,
@@ -382,7 +420,7 @@ async def estimate_cost(
                 logger.warning(f"Could not retrieve damage analysis: {e}")
         
         # Run cost estimation
-        estimation_result = cost_model.estimate_cost(request.property_data, damages)
+        estimation_result = await cost_model.estimate_cost(request.property_data, damages)
         
         processing_time = (datetime.utcnow() - start_time).total_seconds()
         
@@ -447,7 +485,8 @@ async def get_model_status():
         "cost_estimation_model": {
             "status": "available",
             "version": "1.0.0",
-            "supported_materials": list(cost_model.base_costs.keys())
+            "supported_materials": list(cost_model.base_costs.keys()),
+            "cache": cost_model.estimate_cache.stats()
         }
     }
 
@@ -6,14 +6,20 @@ Main entry point for all API requests with authentication, rate limiting, and ro
 from fastapi import FastAPI, Request, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
 import httpx
-import redis
+import redis.asyncio as aioredis
 import json
 import time
 import os
+import re
+import asyncio
+import hashlib
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set, Tuple
 import logging
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -22,11 +28,20 @@ from passlib.context import CryptContext
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the upstream connection pools on startup and close them on shutdown"""
+    for service in SERVICES:
+        get_http_client(service)
+    yield
+    await close_http_clients()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="OrPaynter AI Platform API Gateway",
     description="Centralized API Gateway for the OrPaynter AI Platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -44,7 +59,7 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
 # Redis for rate limiting and caching
-redis_client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+redis_client = aioredis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -61,17 +76,370 @@ SERVICES = {
     "marketplace": os.getenv("MARKETPLACE_SERVICE_URL", "http://marketplace-service:8005"),
 }
 
+# Upstream connection pools, one per service for the lifetime of the app
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "2.0"))
+UPSTREAM_READ_TIMEOUT = float(os.getenv("UPSTREAM_READ_TIMEOUT", "30.0"))
+UPSTREAM_POOL_TIMEOUT = float(os.getenv("UPSTREAM_POOL_TIMEOUT", "5.0"))
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "100"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "20"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30.0"))
+
+# AI inference responses take much longer than the CRUD services
+SERVICE_READ_TIMEOUTS = {
+    "ai": float(os.getenv("AI_SERVICE_READ_TIMEOUT", "120.0")),
+}
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+http_clients: Dict[str, httpx.AsyncClient] = {}
+pool_stats: Dict[str, Dict[str, Any]] = {}
+
+def get_http_client(service: str) -> httpx.AsyncClient:
+    """Get the pooled HTTP client for a service, creating it on first use"""
+    client = http_clients.get(service)
+    if client is None:
+        # HTTP/2 is negotiated over TLS; plain-http upstreams keep HTTP/1.1 keep-alive
+        client = httpx.AsyncClient(
+            base_url=SERVICES[service],
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=UPSTREAM_MAX_CONNECTIONS,
+                max_keepalive_connections=UPSTREAM_MAX_KEEPALIVE,
+                keepalive_expiry=UPSTREAM_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                connect=UPSTREAM_CONNECT_TIMEOUT,
+                read=SERVICE_READ_TIMEOUTS.get(service, UPSTREAM_READ_TIMEOUT),
+                write=UPSTREAM_READ_TIMEOUT,
+                pool=UPSTREAM_POOL_TIMEOUT
+            )
+        )
+        http_clients[service] = client
+        pool_stats[service] = {"requests": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0}
+        breakers[service] = CircuitBreaker(service)
+        bulkheads[service] = Bulkhead(
+            SERVICE_CONCURRENCY.get(service, UPSTREAM_MAX_CONNECTIONS),
+            SERVICE_MAX_QUEUE_TIMES.get(service, UPSTREAM_MAX_QUEUE_TIME)
+        )
+    return client
+
+async def close_http_clients():
+    """Close every upstream connection pool"""
+    for client in http_clients.values():
+        await client.aclose()
+    http_clients.clear()
+
+# Circuit breakers: an upstream whose recent requests mostly fail is not called
+# for CIRCUIT_OPEN_SECONDS, then a single probe request decides whether it is back
+CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+CIRCUIT_MIN_REQUESTS = int(os.getenv("CIRCUIT_MIN_REQUESTS", "10"))
+CIRCUIT_WINDOW = float(os.getenv("CIRCUIT_WINDOW", "30.0"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "15.0"))
+
+# Bulkheads: concurrent requests per upstream, and how long a request may wait
+# for a slot before it is shed. A slow service can only tie up its own slots.
+# Once the average wait reaches UPSTREAM_SHED_QUEUE_FRACTION of the limit, new
+# requests are shed at once rather than queued to time out.
+UPSTREAM_MAX_QUEUE_TIME = float(os.getenv("UPSTREAM_MAX_QUEUE_TIME", "0.5"))
+UPSTREAM_SHED_QUEUE_FRACTION = float(os.getenv("UPSTREAM_SHED_QUEUE_FRACTION", "0.8"))
+SERVICE_CONCURRENCY = {
+    "ai": int(os.getenv("AI_SERVICE_MAX_CONCURRENCY", "20")),
+}
+SERVICE_MAX_QUEUE_TIMES = {
+    "ai": float(os.getenv("AI_SERVICE_MAX_QUEUE_TIME", "2.0")),
+}
+
+class ServiceUnavailableError(Exception):
+    """An upstream request was refused by its circuit breaker or bulkhead"""
+    
+    def __init__(self, service: str, reason: str, retry_after: float):
+        super().__init__(f"{service} service {reason}")
+        self.service = service
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker over the failure rate of an upstream's recent requests"""
+    
+    def __init__(self, service: str, failure_rate: float = CIRCUIT_FAILURE_RATE, min_requests: int = CIRCUIT_MIN_REQUESTS,
+                 window: float = CIRCUIT_WINDOW, open_seconds: float = CIRCUIT_OPEN_SECONDS):
+        self.service = service
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.open_seconds = open_seconds
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.opened = 0
+        self.rejected = 0
+        # (monotonic time, failed) per finished request within the window
+        self._outcomes: deque = deque()
+        self._failures = 0
+        self._probing = False
+    
+    def allow(self) -> float:
+        """Admit a request; return 0 if it may go upstream, else the seconds to wait"""
+        if self.state == "open":
+            remaining = self.opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.rejected += 1
+                return remaining
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probing:
+                self.rejected += 1
+                return 1.0
+            self._probing = True
+        return 0.0
+    
+    def record(self, failed: Optional[bool]):
+        """Record the outcome of an admitted request; None if it never reached the upstream"""
+        now = time.monotonic()
+        if self.state == "half_open":
+            if self._probing and failed is not None:
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = "closed"
+                    self._outcomes.clear()
+                    self._failures = 0
+            self._probing = False
+            return
+        if self.state == "open" or failed is None:
+            return
+        
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        while self._outcomes and self._outcomes[0][0] < now - self.window:
+            self._failures -= self._outcomes.popleft()[1]
+        if len(self._outcomes) >= self.min_requests and self._failures >= self.failure_rate * len(self._outcomes):
+            self._open(now)
+    
+    def _open(self, now: float):
+        self.state = "open"
+        self.opened_at = now
+        self.opened += 1
+        self._outcomes.clear()
+        self._failures = 0
+        logger.warning(f"Circuit for {self.service} service opened for {self.open_seconds:.0f}s")
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "recent_requests": len(self._outcomes),
+            "recent_failures": self._failures,
+            "times_opened": self.opened,
+            "rejected": self.rejected
+        }
+
+class Bulkhead:
+    """Concurrency limit for one upstream that sheds requests instead of letting them queue"""
+    
+    def __init__(self, max_concurrent: int, max_queue_time: float, shed_queue_time: Optional[float] = None):
+        self.max_concurrent = max_concurrent
+        self.max_queue_time = max_queue_time
+        # A timed-out wait only counts as max_queue_time, so the average can
+        # approach the limit but never reach it; shed below it
+        self.shed_queue_time = (
+            shed_queue_time if shed_queue_time is not None else UPSTREAM_SHED_QUEUE_FRACTION * max_queue_time
+        )
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.queued = 0
+        self.shed = 0
+        # Moving average of the seconds requests waited for a slot
+        self.queue_time = 0.0
+    
+    async def acquire(self) -> bool:
+        """Wait for a slot; False if the request should be shed"""
+        if self._slots.locked():
+            # Waiters already time out, so a new one would only hold a worker and then fail
+            if self.queue_time >= self.shed_queue_time or self.queued >= self.max_concurrent:
+                self.shed += 1
+                return False
+        started = time.monotonic()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_queue_time)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            self.queue_time = 0.8 * self.queue_time + 0.2 * self.max_queue_time
+            return False
+        finally:
+            self.queued -= 1
+        self.queue_time = 0.8 * self.queue_time + 0.2 * (time.monotonic() - started)
+        self.active += 1
+        return True
+    
+    def release(self):
+        self.active -= 1
+        self._slots.release()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "active": self.active,
+            "queued": self.queued,
+            "shed": self.shed,
+            "queue_time_ms": round(self.queue_time * 1000, 1),
+            "shed_queue_time_ms": self.shed_queue_time * 1000,
+            "max_queue_time_ms": self.max_queue_time * 1000
+        }
+
+breakers: Dict[str, CircuitBreaker] = {}
+bulkheads: Dict[str, Bulkhead] = {}
+
+async def acquire_upstream(service: str):
+    """Admit a request to an upstream through its circuit breaker and bulkhead, or raise ServiceUnavailableError"""
+    breaker = breakers[service]
+    retry_after = breaker.allow()
+    if retry_after:
+        raise ServiceUnavailableError(service, "circuit open", retry_after)
+    bulkhead = bulkheads[service]
+    if not await bulkhead.acquire():
+        breaker.record(None)
+        raise ServiceUnavailableError(service, "overloaded", bulkhead.max_queue_time)
+    
+    stats = pool_stats[service]
+    stats["requests"] += 1
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+
+def release_upstream(service: str):
+    """Give back the bulkhead slot of a finished upstream request"""
+    pool_stats[service]["in_flight"] -= 1
+    bulkheads[service].release()
+
+def upstream_failed(status_code: int) -> bool:
+    """Whether an upstream response counts against its circuit breaker"""
+    return status_code >= 500
+
+def get_pool_metrics() -> Dict[str, Any]:
+    """Report request counts and connection pool utilization per upstream service"""
+    metrics = {}
+    for service, client in http_clients.items():
+        stats = dict(pool_stats[service])
+        stats["max_connections"] = UPSTREAM_MAX_CONNECTIONS
+        stats["utilization"] = stats["in_flight"] / UPSTREAM_MAX_CONNECTIONS
+        # httpx does not expose its pool, so connection counts are best effort
+        connections = getattr(getattr(client._transport, "_pool", None), "connections", None)
+        if connections is not None:
+            stats["open_connections"] = len(connections)
+            stats["idle_connections"] = sum(1 for connection in connections if connection.is_idle())
+            stats["http2_connections"] = sum(
+                1 for connection in connections if "HTTP/2" in repr(connection)
+            )
+        stats["circuit"] = breakers[service].snapshot()
+        stats["bulkhead"] = bulkheads[service].snapshot()
+        metrics[service] = stats
+    return metrics
+
+# Headers that describe a single connection and must not be forwarded by a proxy
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade"
+}
+
+# Identity headers set by the gateway; clients must not be able to supply them
+USER_CONTEXT_HEADERS = {"x-user-id", "x-user-role"}
+
 class RateLimitError(Exception):
     pass
 
 class AuthenticationError(Exception):
     pass
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+class TTLCache:
+    """Bounded in-process LRU cache whose entries expire"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        # key -> (expires at, value)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (True, value) for a live entry, (False, None) otherwise"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+    
+    def __contains__(self, key: str) -> bool:
+        """Whether a key is stored, even if its entry has expired but not been evicted"""
+        return key in self._entries
+    
+    def set(self, key: str, value: Any, ttl: float) -> Optional[str]:
+        """Store a value, returning the key evicted to make room, if any"""
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            return self._entries.popitem(last=False)[0]
+        return None
+    
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+    
+    def items(self) -> list:
+        """Snapshot of (key, value) pairs, including entries not yet evicted after expiry"""
+        return [(key, value) for key, (_, value) in self._entries.items()]
+
+# Verified token -> claims, so hot tokens skip signature verification
+TOKEN_CACHE_TTL = 300
+token_cache = TTLCache(max_entries=10000)
+
+# Two-tier user cache: a short-lived local LRU in front of Redis, with
+# "user not found" answers cached briefly in both tiers
+USER_CACHE_TTL = 300
+LOCAL_USER_CACHE_TTL = 30
+USER_NOT_FOUND_TTL = 60
+local_user_cache = TTLCache(max_entries=10000)
+
+def verify_token(token: str) -> Dict[str, Any]:
+    """Verify a JWT and return its claims, using the cache of already verified tokens"""
+    found, payload = token_cache.get(token)
+    if found:
+        return payload
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    # Never keep a token past its own expiry
+    ttl = TOKEN_CACHE_TTL
+    if payload.get("exp") is not None:
+        ttl = min(ttl, float(payload["exp"]) - time.time())
+    if ttl > 0:
+        token_cache.set(token, payload, ttl)
+    return payload
+
+def get_auth_context(request: Request) -> Optional[Dict[str, Any]]:
+    """Verify the request's bearer token once and keep the claims on the request"""
+    if not hasattr(request.state, "auth"):
+        request.state.auth = None
+        auth_header = request.headers.get("authorization")
+        if auth_header and auth_header.startswith("Bearer "):
+            try:
+                request.state.auth = verify_token(auth_header.split(" ", 1)[1])
+            except JWTError:
+                pass
+    return request.state.auth
+
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     """Validate JWT token and return user information"""
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = get_auth_context(request)
+        if payload is None:
+            # Not a well-formed Bearer header the middleware could read; verify directly
+            payload = verify_token(credentials.credentials)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise AuthenticationError("Invalid token")
@@ -86,91 +454,151 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise AuthenticationError("Invalid token")
 
 async def get_user_from_cache_or_service(user_id: str) -> Optional[Dict[str, Any]]:
-    """Get user data from Redis cache or user service"""
+    """Get user data from the local cache, Redis cache or user service"""
     cache_key = f"user:{user_id}"
     
-    # Try cache first
+    found, user_data = local_user_cache.get(cache_key)
+    if found:
+        return user_data
+    
+    # Try Redis next; a stored null means the user does not exist
     try:
-        cached_user = redis_client.get(cache_key)
-        if cached_user:
-            return json.loads(cached_user)
+        cached_user = await redis_client.get(cache_key)
+        if cached_user is not None:
+            user_data = json.loads(cached_user)
+            local_user_cache.set(
+                cache_key, user_data, LOCAL_USER_CACHE_TTL if user_data is not None else USER_NOT_FOUND_TTL
+            )
+            return user_data
     except Exception as e:
         logger.warning(f"Redis cache error: {e}")
     
     # Fallback to user service
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{SERVICES['user']}/users/{user_id}")
-            if response.status_code == 200:
-                user_data = response.json()
-                # Cache for 5 minutes
-                try:
-                    redis_client.setex(cache_key, 300, json.dumps(user_data))
-                except Exception as e:
-                    logger.warning(f"Redis cache set error: {e}")
-                return user_data
+        response = await forward_request(service="user", path=f"/users/{user_id}", method="GET", headers={})
+    except ServiceUnavailableError:
+        raise
     except Exception as e:
         logger.error(f"Error fetching user from service: {e}")
+        return None
     
-    return None
+    if response.status_code == 200:
+        user_data, ttl = response.json(), USER_CACHE_TTL
+    elif response.status_code == 404:
+        user_data, ttl = None, USER_NOT_FOUND_TTL
+    else:
+        # Errors are not cached, so the next request asks again
+        return None
+    
+    local_user_cache.set(cache_key, user_data, min(ttl, LOCAL_USER_CACHE_TTL) if user_data is not None else ttl)
+    try:
+        await redis_client.setex(cache_key, ttl, json.dumps(user_data))
+    except Exception as e:
+        logger.warning(f"Redis cache set error: {e}")
+    return user_data
+
+# Rate limits as (requests, window in seconds)
+USER_RATE_LIMIT = (1000, 3600)  # authenticated users
+IP_RATE_LIMIT = (100, 3600)     # unauthenticated clients
 
-async def check_rate_limit(request: Request, user_id: Optional[str] = None) -> bool:
-    """Check if request is within rate limits"""
-    client_ip = request.client.host
+# GCRA: each key stores its theoretical arrival time (TAT) in ms. A request is
+# allowed while the TAT is at most `burst` ms ahead of now, and pushes the TAT
+# forward by one emission interval. Runs atomically in one round trip.
+RATE_LIMIT_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+if tat - now > burst then
+    return {0, tat - now - burst}
+end
+tat = tat + interval
+redis.call('SET', KEYS[1], tat, 'PX', math.ceil(tat - now))
+return {1, 0}
+"""
+rate_limit_script = redis_client.register_script(RATE_LIMIT_SCRIPT)
+
+class LocalRateLimiter:
+    """In-process GCRA pre-limiter that rejects hot keys without a Redis round trip"""
+    
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        # key -> [theoretical arrival time, blocked until], both in ms
+        self._keys: "OrderedDict[str, list]" = OrderedDict()
     
+    def check(self, key: str, interval: float, burst: float) -> float:
+        """Count a request locally; return 0 if it may proceed to Redis, else the ms to wait"""
+        now = time.time() * 1000
+        entry = self._keys.get(key)
+        if entry is None:
+            entry = self._keys[key] = [now, 0.0]
+            if len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(key)
+        if entry[1] > now:
+            return entry[1] - now
+        # This instance alone must stay within the limit, so exceeding it locally is final
+        tat = max(entry[0], now)
+        if tat - now > burst:
+            return tat - now - burst
+        entry[0] = tat + interval
+        return 0.0
+    
+    def block(self, key: str, wait_ms: float):
+        """Remember that Redis rejected a key, so it is rejected locally until then"""
+        entry = self._keys.get(key)
+        if entry is not None:
+            entry[1] = time.time() * 1000 + wait_ms
+
+local_rate_limiter = LocalRateLimiter()
+
+async def check_rate_limit(request: Request, user_id: Optional[str] = None) -> Tuple[bool, float]:
+    """Check if request is within rate limits; returns whether it is allowed and the seconds to wait if not"""
     # Different limits for authenticated vs unauthenticated users
     if user_id:
         key = f"rate_limit:user:{user_id}"
-        limit = 1000  # requests per hour for authenticated users
+        limit, window = USER_RATE_LIMIT
     else:
-        key = f"rate_limit:ip:{client_ip}"
-        limit = 100   # requests per hour for unauthenticated users
+        key = f"rate_limit:ip:{request.client.host}"
+        limit, window = IP_RATE_LIMIT
+    
+    interval = window * 1000 / limit
+    burst = window * 1000 - interval
+    
+    wait_ms = local_rate_limiter.check(key, interval, burst)
+    if wait_ms:
+        return False, wait_ms / 1000
     
     try:
-        current_time = int(time.time())
-        window_start = current_time - 3600  # 1 hour window
-        
-        # Remove old entries
-        redis_client.zremrangebyscore(key, 0, window_start)
-        
-        # Count current requests
-        current_count = redis_client.zcard(key)
-        
-        if current_count >= limit:
-            return False
-        
-        # Add current request
-        redis_client.zadd(key, {str(current_time): current_time})
-        redis_client.expire(key, 3600)
-        
-        return True
+        allowed, wait_ms = await rate_limit_script(keys=[key], args=[interval, burst])
     except Exception as e:
         logger.warning(f"Rate limiting error: {e}")
-        return True  # Allow request if rate limiting fails
+        return True, 0.0  # Allow request if rate limiting fails
+    if not allowed:
+        local_rate_limiter.block(key, wait_ms)
+        return False, wait_ms / 1000
+    return True, 0.0
 
 @app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
     """Rate limiting middleware"""
     # Skip rate limiting for health checks
-    if request.url.path in ["/health", "/docs", "/openapi.json"]:
+    if request.url.path in ["/health", "/health/upstreams", "/docs", "/openapi.json"]:
         return await call_next(request)
     
-    # Extract user ID if authenticated
-    user_id = None
-    try:
-        auth_header = request.headers.get("authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.split(" ")[1]
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id = payload.get("sub")
-    except:
-        pass
+    # Extract user ID if authenticated; the claims stay on the request for get_current_user
+    payload = get_auth_context(request)
+    user_id = payload.get("sub") if payload else None
     
     # Check rate limit
-    if not await check_rate_limit(request, user_id):
+    allowed, retry_after = await check_rate_limit(request, user_id)
+    if not allowed:
         return JSONResponse(
             status_code=429,
-            content={"detail": "Rate limit exceeded"}
+            content={"detail": "Rate limit exceeded"},
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
         )
     
     return await call_next(request)
@@ -190,27 +618,322 @@ async def rate_limit_exception_handler(request: Request, exc: RateLimitError):
         content={"detail": "Rate limit exceeded"}
     )
 
+@app.exception_handler(ServiceUnavailableError)
+async def service_unavailable_exception_handler(request: Request, exc: ServiceUnavailableError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": f"{exc.service} service temporarily unavailable"},
+        headers={"Retry-After": str(max(1, int(exc.retry_after + 0.999)))}
+    )
+
 async def forward_request(service: str, path: str, method: str, headers: dict, body: bytes = None, params: dict = None) -> httpx.Response:
     """Forward request to appropriate microservice"""
-    service_url = SERVICES.get(service)
-    if not service_url:
+    if service not in SERVICES:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    url = f"{service_url}{path}"
+    client = get_http_client(service)
     
     # Remove host header to avoid conflicts
     headers = {k: v for k, v in headers.items() if k.lower() != "host"}
     
-    async with httpx.AsyncClient() as client:
+    await acquire_upstream(service)
+    try:
         response = await client.request(
             method=method,
-            url=url,
+            url=path,
             headers=headers,
             content=body,
-            params=params,
-            timeout=30.0
+            params=params
         )
+    except httpx.HTTPError:
+        pool_stats[service]["errors"] += 1
+        breakers[service].record(True)
+        raise
+    except BaseException:
+        breakers[service].record(None)
+        raise
+    finally:
+        release_upstream(service)
+    breakers[service].record(upstream_failed(response.status_code))
+    return response
+
+def upstream_headers(request: Request, current_user: Optional[Dict[str, Any]] = None, exclude: set = frozenset()) -> list:
+    """Headers to send upstream: the client's end-to-end headers plus the gateway's user context"""
+    headers = [
+        (k, v) for k, v in request.headers.items()
+        if k not in HOP_BY_HOP_HEADERS and k not in USER_CONTEXT_HEADERS and k != "host" and k not in exclude
+    ]
+    if current_user:
+        headers.append(("X-User-ID", str(current_user["id"])))
+        headers.append(("X-User-Role", str(current_user["role"])))
+    return headers
+
+# GET response cache policies, matched against the upstream path. "user" entries
+# are keyed per user; "shared" entries are served to every authenticated caller.
+# Entries are fresh for ttl seconds, then served stale for up to stale seconds
+# more while a background request revalidates them. Cached responses are
+# buffered, so ID patterns exclude dots to keep file downloads streaming.
+CACHE_POLICIES = [
+    (re.compile(r"^/payments/pricing(/.*)?$"), {"ttl": 300, "stale": 3600, "scope": "shared"}),
+    (re.compile(r"^/projects/[\w-]+(/status)?$"), {"ttl": 5, "stale": 30, "scope": "user"}),
+    (re.compile(r"^/ai/analysis/[\w-]+$"), {"ttl": 10, "stale": 60, "scope": "user"}),
+]
+RESPONSE_CACHE_MAX_BODY = 1024 * 1024
+response_cache = TTLCache(max_entries=5000)
+cache_refreshes: Dict[str, asyncio.Task] = {}
+
+# Cache keys by upstream path and by every ancestor of it, so a write drops the
+# entries for its resource and sub-resources without scanning the whole cache
+cached_keys_by_prefix: Dict[str, Set[str]] = {}
+cached_paths: Dict[str, str] = {}
+
+# Client conditional headers are answered by the gateway, not forwarded. Cached
+# bodies are fetched uncompressed so one entry can serve every client whatever
+# encodings it accepts.
+CONDITIONAL_HEADERS = {"if-none-match", "if-modified-since"}
+CACHE_EXCLUDED_HEADERS = CONDITIONAL_HEADERS | {"accept-encoding"}
+
+def get_cache_policy(path: str) -> Optional[Dict[str, Any]]:
+    """Find the cache policy for an upstream GET path, if it is cacheable"""
+    for pattern, policy in CACHE_POLICIES:
+        if pattern.match(path):
+            return policy
+    return None
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in {tag.removeprefix("W/") for tag in tags}
+
+def path_prefixes(path: str) -> list:
+    """A path and each of its ancestors: /a/b -> /a/b, /a and "" for the root"""
+    parts = path.rstrip("/").split("/")
+    return ["/".join(parts[:i]) for i in range(len(parts), 0, -1)]
+
+def index_cached(key: str, path: str):
+    """Record a cached entry's key under its path and the path's ancestors"""
+    cached_paths[key] = path
+    for prefix in path_prefixes(path):
+        cached_keys_by_prefix.setdefault(prefix, set()).add(key)
+
+def unindex_cached(key: str):
+    """Forget a cache key that no longer has an entry"""
+    path = cached_paths.pop(key, None)
+    if path is None:
+        return
+    for prefix in path_prefixes(path):
+        keys = cached_keys_by_prefix.get(prefix)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del cached_keys_by_prefix[prefix]
+
+def invalidate_cached(path: str):
+    """Drop cached responses for a resource and its sub-resources after a write"""
+    for key in list(cached_keys_by_prefix.get(path.rstrip("/"), ())):
+        response_cache.delete(key)
+        unindex_cached(key)
+
+def vary_values(vary: Tuple[str, ...], request: Request) -> Tuple[str, ...]:
+    """The request's values of the headers a cached response varies on"""
+    return tuple(request.headers.get(name, "") for name in vary)
+
+async def fetch_cacheable(service: str, path: str, request: Request, current_user: Optional[Dict[str, Any]], policy: Dict[str, Any], stale: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fetch a GET response into a cache entry, revalidating a stale entry by its ETag"""
+    client = get_http_client(service)
+    headers = upstream_headers(request, current_user, exclude=CACHE_EXCLUDED_HEADERS)
+    headers.append(("Accept-Encoding", "identity"))
+    if stale is not None and stale["upstream_etag"]:
+        headers.append(("If-None-Match", stale["upstream_etag"]))
+    
+    await acquire_upstream(service)
+    try:
+        async with client.stream("GET", path, headers=headers, params=request.query_params.multi_items()) as upstream_response:
+            body = b"".join([chunk async for chunk in upstream_response.aiter_raw()])
+    except httpx.HTTPError:
+        pool_stats[service]["errors"] += 1
+        breakers[service].record(True)
+        raise
+    except BaseException:
+        breakers[service].record(None)
+        raise
+    finally:
+        release_upstream(service)
+    breakers[service].record(upstream_failed(upstream_response.status_code))
+    
+    now = time.time()
+    if upstream_response.status_code == 304 and stale is not None:
+        return {**stale, "stored_at": now}
+    
+    response_headers = [
+        (k.lower(), v) for k, v in upstream_response.headers.raw
+        if k.lower().decode("latin-1") not in HOP_BY_HOP_HEADERS and k.lower() != b"content-length"
+    ]
+    upstream_etag = upstream_response.headers.get("etag")
+    etag = upstream_etag or 'W/"%s"' % hashlib.sha1(body).hexdigest()
+    if upstream_etag is None:
+        response_headers.append((b"etag", etag.encode("latin-1")))
+    cache_control = upstream_response.headers.get("cache-control", "").lower()
+    # Bodies are always identity-encoded, so only the other Vary headers select a variant
+    vary = tuple(sorted(
+        {name.strip().lower() for name in upstream_response.headers.get("vary", "").split(",") if name.strip()}
+        - {"accept-encoding"}
+    ))
+    return {
+        "path": path,
+        "status": upstream_response.status_code,
+        "headers": response_headers,
+        "body": body,
+        "etag": etag,
+        "upstream_etag": upstream_etag,
+        "stored_at": now,
+        "vary": vary,
+        "vary_values": vary_values(vary, request),
+        "cacheable": (
+            upstream_response.status_code == 200
+            and len(body) <= RESPONSE_CACHE_MAX_BODY
+            and upstream_response.headers.get("content-encoding", "identity").lower() == "identity"
+            and "*" not in vary
+            and "set-cookie" not in upstream_response.headers
+            and "no-store" not in cache_control
+            and not (policy["scope"] == "shared" and "private" in cache_control)
+        )
+    }
+
+def store_cached(key: str, entry: Dict[str, Any], policy: Dict[str, Any]):
+    """Keep a fetched entry for its fresh and stale lifetime"""
+    if entry["cacheable"]:
+        evicted = response_cache.set(key, entry, policy["ttl"] + policy["stale"])
+        index_cached(key, entry["path"])
+        if evicted is not None:
+            unindex_cached(evicted)
+    elif key not in response_cache:
+        unindex_cached(key)
+
+def cached_response(entry: Dict[str, Any], request: Request, cache_status: str) -> Response:
+    """Answer a GET from a cache entry, with 304 when the client already has it"""
+    extra = [
+        (b"age", str(int(time.time() - entry["stored_at"])).encode()),
+        (b"x-cache", cache_status.encode())
+    ]
+    if entry["status"] == 200 and etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        response = Response(status_code=304)
+        response.raw_headers = [
+            (k, v) for k, v in entry["headers"]
+            if k in (b"etag", b"cache-control", b"vary", b"expires")
+        ] + extra
         return response
+    response = Response(content=entry["body"], status_code=entry["status"])
+    response.raw_headers = entry["headers"] + [(b"content-length", str(len(entry["body"])).encode())] + extra
+    return response
+
+async def cached_get(service: str, path: str, request: Request, current_user: Optional[Dict[str, Any]], policy: Dict[str, Any]) -> Response:
+    """Serve a cacheable GET from the gateway cache, going upstream on a miss"""
+    scope = f"user:{current_user['id']}" if policy["scope"] == "user" and current_user else "shared"
+    key = f"{scope}:{path}?{request.url.query}"
+    found, entry = response_cache.get(key)
+    if found and entry["vary_values"] != vary_values(entry["vary"], request):
+        # Cached for another variant of the request; fetch this one and keep it instead
+        found, entry = False, None
+    bypass = "no-cache" in request.headers.get("cache-control", "").lower()
+    
+    if found and not bypass:
+        age = time.time() - entry["stored_at"]
+        if age < policy["ttl"]:
+            return cached_response(entry, request, "HIT")
+        # Stale: answer now and refresh in the background, once per key
+        if key not in cache_refreshes:
+            async def refresh():
+                try:
+                    store_cached(key, await fetch_cacheable(service, path, request, current_user, policy, stale=entry), policy)
+                except Exception as e:
+                    logger.warning(f"Background refresh of {path} failed: {e}")
+                finally:
+                    cache_refreshes.pop(key, None)
+            cache_refreshes[key] = asyncio.create_task(refresh())
+        return cached_response(entry, request, "STALE")
+    
+    try:
+        entry = await fetch_cacheable(service, path, request, current_user, policy, stale=entry if found else None)
+    except httpx.TimeoutException:
+        return JSONResponse(status_code=504, content={"detail": f"{service} service timed out"})
+    except httpx.HTTPError as e:
+        logger.error(f"Error forwarding to {service} service: {e}")
+        return JSONResponse(status_code=502, content={"detail": f"{service} service unavailable"})
+    store_cached(key, entry, policy)
+    return cached_response(entry, request, "MISS")
+
+async def proxy_request(service: str, path: str, request: Request, current_user: Optional[Dict[str, Any]] = None) -> Response:
+    """Stream a request to a microservice and its response back without buffering or decoding either body"""
+    if service not in SERVICES:
+        raise HTTPException(status_code=404, detail="Service not found")
+    
+    policy = get_cache_policy(path) if request.method == "GET" else None
+    if policy is not None:
+        return await cached_get(service, path, request, current_user, policy)
+    
+    client = get_http_client(service)
+    headers = upstream_headers(request, current_user)
+    
+    upstream_request = client.build_request(
+        method=request.method,
+        url=path,
+        headers=headers,
+        params=request.query_params.multi_items(),
+        content=request.stream() if request.method in ["POST", "PUT", "PATCH"] else None
+    )
+    
+    # Refused requests get a 503 from the exception handler without touching the upstream
+    await acquire_upstream(service)
+    try:
+        upstream_response = await client.send(upstream_request, stream=True)
+    except httpx.HTTPError as e:
+        pool_stats[service]["errors"] += 1
+        breakers[service].record(True)
+        release_upstream(service)
+        if isinstance(e, httpx.TimeoutException):
+            return JSONResponse(status_code=504, content={"detail": f"{service} service timed out"})
+        logger.error(f"Error forwarding to {service} service: {e}")
+        return JSONResponse(status_code=502, content={"detail": f"{service} service unavailable"})
+    except BaseException:
+        breakers[service].record(None)
+        release_upstream(service)
+        raise
+    breakers[service].record(upstream_failed(upstream_response.status_code))
+    
+    if request.method != "GET" and upstream_response.status_code < 400:
+        invalidate_cached(path)
+    
+    closed = False
+    
+    async def close_upstream():
+        nonlocal closed
+        if not closed:
+            closed = True
+            await upstream_response.aclose()
+            release_upstream(service)
+    
+    async def stream_body():
+        # Also runs when the client disconnects mid-stream and the background task is skipped
+        try:
+            async for chunk in upstream_response.aiter_raw():
+                yield chunk
+        finally:
+            await close_upstream()
+    
+    # Raw bytes pass through unchanged, so Content-Encoding and Content-Length stay valid
+    response = StreamingResponse(
+        stream_body(),
+        status_code=upstream_response.status_code,
+        background=BackgroundTask(close_upstream)
+    )
+    response.raw_headers = [
+        (k.lower(), v) for k, v in upstream_response.headers.raw
+        if k.lower().decode("latin-1") not in HOP_BY_HOP_HEADERS
+    ]
+    return response
 
 # Health check endpoint
 @app.get("/health")
@@ -218,133 +941,58 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
 
+@app.get("/health/upstreams")
+async def upstream_health():
+    """Connection pool, circuit breaker and bulkhead metrics per upstream service"""
+    return {
+        "http2_enabled": HTTP2_AVAILABLE,
+        "services": get_pool_metrics(),
+        "caches": {
+            name: {"hits": cache.hits, "misses": cache.misses, "entries": len(cache)}
+            for name, cache in {"tokens": token_cache, "users": local_user_cache, "responses": response_cache}.items()
+        }
+    }
+
 # Authentication endpoints (no auth required)
 @app.post("/auth/register")
 async def register(request: Request):
     """User registration"""
-    body = await request.body()
-    response = await forward_request(
-        service="user",
-        path="/auth/register",
-        method="POST",
-        headers=dict(request.headers),
-        body=body
-    )
-    return JSONResponse(content=response.json(), status_code=response.status_code)
+    return await proxy_request("user", "/auth/register", request)
 
 @app.post("/auth/login")
 async def login(request: Request):
     """User login"""
-    body = await request.body()
-    response = await forward_request(
-        service="user",
-        path="/auth/login",
-        method="POST",
-        headers=dict(request.headers),
-        body=body
-    )
-    return JSONResponse(content=response.json(), status_code=response.status_code)
+    return await proxy_request("user", "/auth/login", request)
 
 # Protected endpoints - User service
 @app.api_route("/users/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def user_service_proxy(request: Request, path: str, current_user: dict = Depends(get_current_user)):
     """Forward requests to user service"""
-    body = await request.body() if request.method in ["POST", "PUT", "PATCH"] else None
-    
-    # Add user context to headers
-    headers = dict(request.headers)
-    headers["X-User-ID"] = current_user["id"]
-    headers["X-User-Role"] = current_user["role"]
-    
-    response = await forward_request(
-        service="user",
-        path=f"/users/{path}",
-        method=request.method,
-        headers=headers,
-        body=body,
-        params=dict(request.query_params)
-    )
-    return JSONResponse(content=response.json(), status_code=response.status_code)
+    return await proxy_request("user", f"/users/{path}", request, current_user)
 
 # Protected endpoints - Project service
 @app.api_route("/projects/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def project_service_proxy(request: Request, path: str, current_user: dict = Depends(get_current_user)):
     """Forward requests to project service"""
-    body = await request.body() if request.method in ["POST", "PUT", "PATCH"] else None
-    
-    headers = dict(request.headers)
-    headers["X-User-ID"] = current_user["id"]
-    headers["X-User-Role"] = current_user["role"]
-    
-    response = await forward_request(
-        service="project",
-        path=f"/projects/{path}",
-        method=request.method,
-        headers=headers,
-        body=body,
-        params=dict(request.query_params)
-    )
-    return JSONResponse(content=response.json(), status_code=response.status_code)
+    return await proxy_request("project", f"/projects/{path}", request, current_user)
 
 # Protected endpoints - AI service
 @app.api_route("/ai/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def ai_service_proxy(request: Request, path: str, current_user: dict = Depends(get_current_user)):
     """Forward requests to AI service"""
-    body = await request.body() if request.method in ["POST", "PUT", "PATCH"] else None
-    
-    headers = dict(request.headers)
-    headers["X-User-ID"] = current_user["id"]
-    headers["X-User-Role"] = current_user["role"]
-    
-    response = await forward_request(
-        service="ai",
-        path=f"/ai/{path}",
-        method=request.method,
-        headers=headers,
-        body=body,
-        params=dict(request.query_params)
-    )
-    return JSONResponse(content=response.json(), status_code=response.status_code)
+    return await proxy_request("ai", f"/ai/{path}", request, current_user)
 
 # Protected endpoints - Payment service
 @app.api_route("/payments/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def payment_service_proxy(request: Request, path: str, current_user: dict = Depends(get_current_user)):
     """Forward requests to payment service"""
-    body = await request.body() if request.method in ["POST", "PUT", "PATCH"] else None
-    
-    headers = dict(request.headers)
-    headers["X-User-ID"] = current_user["id"]
-    headers["X-User-Role"] = current_user["role"]
-    
-    response = await forward_request(
-        service="payment",
-        path=f"/payments/{path}",
-        method=request.method,
-        headers=headers,
-        body=body,
-        params=dict(request.query_params)
-    )
-    return JSONResponse(content=response.json(), status_code=response.status_code)
+    return await proxy_request("payment", f"/payments/{path}", request, current_user)
 
 # Protected endpoints - Marketplace service
 @app.api_route("/marketplace/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
 async def marketplace_service_proxy(request: Request, path: str, current_user: dict = Depends(get_current_user)):
     """Forward requests to marketplace service"""
-    body = await request.body() if request.method in ["POST", "PUT", "PATCH"] else None
-    
-    headers = dict(request.headers)
-    headers["X-User-ID"] = current_user["id"]
-    headers["X-User-Role"] = current_user["role"]
-    
-    response = await forward_request(
-        service="marketplace",
-        path=f"/marketplace/{path}",
-        method=request.method,
-        headers=headers,
-        body=body,
-        params=dict(request.query_params)
-    )
-    return JSONResponse(content=response.json(), status_code=response.status_code)
+    return await proxy_request("marketplace", f"/marketplace/{path}", request, current_user)
 
 if __name__ == "__main__":
     import uvicorn
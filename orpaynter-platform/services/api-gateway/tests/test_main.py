@@ -0,0 +1,461 @@
+"""
+Test suite for the OrPaynter API gateway
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+# Point the gateway at a Redis that refuses connections; rate limiting fails open
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1")
+
+# Add the parent directory to sys.path to import the gateway
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from src import main
+from jose import jwt
+
+USER = {"id": "u1", "role": "homeowner"}
+
+class UpstreamBody(httpx.AsyncByteStream):
+    """Response body delivered as a stream, the way a real upstream sends it"""
+
+    def __init__(self, body):
+        self.body = body
+
+    async def __aiter__(self):
+        yield self.body
+
+def upstream_response(status_code=200, json_body=None, content=b"", headers=None):
+    """Upstream response whose body the gateway reads from the network stream"""
+    headers = dict(headers or {})
+    if json_body is not None:
+        content = json.dumps(json_body).encode()
+        headers.setdefault("Content-Type", "application/json")
+    return httpx.Response(status_code, headers=headers, stream=UpstreamBody(content))
+
+def use_upstream(service, handler):
+    """Route a service's pooled client to an in-process handler"""
+    main.get_http_client(service)
+    main.http_clients[service] = httpx.AsyncClient(
+        base_url=main.SERVICES[service], transport=httpx.MockTransport(handler)
+    )
+
+def token_for(user_id, **claims):
+    """Signed access token for a user"""
+    return jwt.encode({"sub": user_id, **claims}, main.SECRET_KEY, algorithm=main.ALGORITHM)
+
+def gateway_client(token=None):
+    """HTTP client for the gateway app, authenticated as USER unless given a token"""
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main.app),
+        base_url="http://gateway",
+        headers={"Authorization": f"Bearer {token or token_for(USER['id'])}"}
+    )
+
+@pytest.fixture(autouse=True)
+def gateway_state():
+    """Fresh caches and upstream clients for every test"""
+    main.local_user_cache.set(f"user:{USER['id']}", USER, 3600)
+    yield
+    main.token_cache._entries.clear()
+    main.local_user_cache._entries.clear()
+    main.response_cache._entries.clear()
+    main.cached_keys_by_prefix.clear()
+    main.cached_paths.clear()
+    main.http_clients.clear()
+    main.breakers.clear()
+    main.bulkheads.clear()
+
+class TestResponseCache:
+    """GET response caching in front of the upstream services"""
+
+    def test_cached_bodies_are_identity_encoded(self):
+        seen = []
+
+        def handler(request):
+            seen.append(request.headers.get("accept-encoding"))
+            return upstream_response(json_body={"plans": ["basic", "pro"]})
+
+        async def run():
+            use_upstream("payment", handler)
+            async with gateway_client() as client:
+                first = await client.get("/payments/pricing", headers={"Accept-Encoding": "gzip"})
+                second = await client.get("/payments/pricing", headers={"Accept-Encoding": "br"})
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert seen == ["identity"]
+        assert first.headers["x-cache"] == "MISS" and second.headers["x-cache"] == "HIT"
+        assert "content-encoding" not in second.headers
+        assert second.json() == first.json() == {"plans": ["basic", "pro"]}
+
+    def test_encoded_upstream_bodies_are_not_cached(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return upstream_response(content=b"\x1f\x8b", headers={"Content-Encoding": "gzip"})
+
+        async def run():
+            use_upstream("payment", handler)
+            async with gateway_client() as client:
+                for _ in range(2):
+                    await client.get("/payments/pricing")
+
+        asyncio.run(run())
+        assert len(calls) == 2
+
+    def test_vary_headers_select_the_variant(self):
+        calls = []
+
+        def handler(request):
+            language = request.headers.get("accept-language", "")
+            calls.append(language)
+            return upstream_response(
+                json_body={"language": language}, headers={"Vary": "Accept-Encoding, Accept-Language"}
+            )
+
+        async def run():
+            use_upstream("payment", handler)
+            async with gateway_client() as client:
+                return [
+                    (await client.get("/payments/pricing", headers={"Accept-Language": language})).json()["language"]
+                    for language in ("en", "en", "fr", "fr")
+                ]
+
+        assert asyncio.run(run()) == ["en", "en", "fr", "fr"]
+        assert calls == ["en", "fr"]
+
+    def test_writes_invalidate_the_resource_and_its_subresources(self):
+        calls = []
+
+        def handler(request):
+            calls.append((request.method, request.url.path))
+            return upstream_response(json_body={"path": request.url.path})
+
+        paths = ["/projects/p1", "/projects/p1/status", "/projects/p2"]
+
+        async def run():
+            use_upstream("project", handler)
+            async with gateway_client() as client:
+                for path in paths:
+                    await client.get(path)
+                await client.put("/projects/p1", json={"name": "Roof"})
+                return [(await client.get(path)).headers["x-cache"] for path in paths]
+
+        assert asyncio.run(run()) == ["MISS", "MISS", "HIT"]
+        assert calls.count(("GET", "/projects/p1")) == 2
+        assert calls.count(("GET", "/projects/p2")) == 1
+        assert set(main.cached_paths.values()) == set(paths)
+
+class TestUpstreamPool:
+    """One long-lived connection pool per upstream service"""
+
+    def test_one_client_per_service(self):
+        project = main.get_http_client("project")
+        assert main.get_http_client("project") is project
+        ai = main.get_http_client("ai")
+        assert ai is not project
+        assert str(project.base_url).rstrip("/") == main.SERVICES["project"]
+        assert project.timeout.connect == main.UPSTREAM_CONNECT_TIMEOUT
+        assert project.timeout.read == main.UPSTREAM_READ_TIMEOUT
+        assert ai.timeout.read == main.SERVICE_READ_TIMEOUTS["ai"]
+
+    def test_requests_reuse_the_pooled_client(self):
+        async def run():
+            use_upstream("project", lambda request: upstream_response(json_body={"ok": True}))
+            pooled = main.http_clients["project"]
+            async with gateway_client() as client:
+                statuses = [(await client.post("/projects/p1", json={})).status_code for _ in range(5)]
+                health = (await client.get("/health/upstreams")).json()
+            return pooled, statuses, health
+
+        pooled, statuses, health = asyncio.run(run())
+        assert statuses == [200] * 5
+        assert main.http_clients["project"] is pooled and not pooled.is_closed
+        stats = health["services"]["project"]
+        assert stats["requests"] == 5
+        # Streamed responses give their slot back once the body is sent
+        assert stats["in_flight"] == 0 and stats["max_in_flight"] == 1
+
+    def test_shutdown_closes_every_pool(self):
+        async def run():
+            clients = [main.get_http_client(service) for service in ("user", "project")]
+            await main.close_http_clients()
+            return clients
+
+        assert all(client.is_closed for client in asyncio.run(run()))
+        assert main.http_clients == {}
+
+class TestStreamingProxy:
+    """Requests and responses pass through the gateway as a proxy should"""
+
+    def test_hop_by_hop_headers_are_not_forwarded(self):
+        seen = {}
+
+        def handler(request):
+            seen.update(request.headers)
+            return upstream_response(
+                json_body={"ok": True},
+                headers={"Keep-Alive": "timeout=5", "Upgrade": "h2c", "Trailer": "Expires", "X-Upstream": "projects"}
+            )
+
+        async def run():
+            use_upstream("project", handler)
+            async with gateway_client() as client:
+                return await client.post(
+                    "/projects/p1", json={},
+                    headers={"Keep-Alive": "timeout=5", "TE": "trailers", "Proxy-Authorization": "Basic eDp5", "X-Trace": "t1"}
+                )
+
+        response = asyncio.run(run())
+        assert response.status_code == 200
+        assert not {"keep-alive", "te", "proxy-authorization"} & set(seen)
+        assert seen["x-trace"] == "t1"
+        assert not {"keep-alive", "upgrade", "trailer"} & set(response.headers)
+        assert response.headers["x-upstream"] == "projects"
+
+    def test_client_user_headers_are_replaced(self):
+        seen = []
+
+        def handler(request):
+            seen.append((request.headers.get_list("x-user-id"), request.headers.get_list("x-user-role")))
+            return upstream_response(json_body={"ok": True})
+
+        async def run():
+            use_upstream("project", handler)
+            async with gateway_client() as client:
+                await client.post("/projects/p1", json={}, headers={"X-User-ID": "admin", "X-User-Role": "admin"})
+
+        asyncio.run(run())
+        assert seen == [([USER["id"]], [USER["role"]])]
+
+    @pytest.mark.parametrize("method, path", [("POST", "/projects/p1"), ("GET", "/payments/pricing")])
+    @pytest.mark.parametrize("error, status_code, detail", [
+        (httpx.ConnectError, 502, "service unavailable"),
+        (httpx.ReadTimeout, 504, "service timed out")
+    ])
+    def test_upstream_errors_map_to_gateway_errors(self, method, path, error, status_code, detail):
+        service = "project" if path.startswith("/projects") else "payment"
+
+        def handler(request):
+            raise error("upstream failed", request=request)
+
+        async def run():
+            use_upstream(service, handler)
+            async with gateway_client() as client:
+                return await client.request(method, path, json={} if method == "POST" else None)
+
+        response = asyncio.run(run())
+        assert response.status_code == status_code
+        assert response.json() == {"detail": f"{service} {detail}"}
+        assert main.pool_stats[service]["errors"] == 1 and main.pool_stats[service]["in_flight"] == 0
+
+class TestBulkhead:
+    """Load shedding in front of a saturated upstream"""
+
+    def test_saturated_queue_sheds_without_waiting(self):
+        async def run():
+            bulkhead = main.Bulkhead(max_concurrent=2, max_queue_time=0.05)
+            assert await bulkhead.acquire() and await bulkhead.acquire()
+            waits = []
+            for _ in range(12):
+                started = time.monotonic()
+                assert not await bulkhead.acquire()
+                waits.append(time.monotonic() - started)
+            queue_time = bulkhead.queue_time
+            bulkhead.release()
+            recovered = await bulkhead.acquire()
+            return bulkhead, waits, queue_time, recovered
+
+        bulkhead, waits, queue_time, recovered = asyncio.run(run())
+        # Requests wait out the queue limit until the average wait crosses the
+        # shedding threshold, then fail at once
+        assert all(wait >= 0.04 for wait in waits[:3])
+        assert all(wait < 0.01 for wait in waits[-4:])
+        assert bulkhead.shed == 12
+        assert bulkhead.shed_queue_time <= queue_time < bulkhead.max_queue_time
+        # A free slot admits requests again whatever the average says
+        assert recovered
+
+    def test_gateway_answers_shed_requests_with_503(self):
+        release = asyncio.Event()
+
+        async def handler(request):
+            await release.wait()
+            return upstream_response(json_body={"ok": True})
+
+        async def run():
+            use_upstream("ai", handler)
+            main.bulkheads["ai"] = main.Bulkhead(max_concurrent=1, max_queue_time=0.05)
+            async with gateway_client() as client:
+                slow = asyncio.create_task(client.post("/ai/analyze", json={}))
+                while not main.bulkheads["ai"].active:
+                    await asyncio.sleep(0.001)
+                responses = []
+                for _ in range(10):
+                    started = time.monotonic()
+                    response = await client.post("/ai/analyze", json={})
+                    responses.append((response, time.monotonic() - started))
+                release.set()
+                await slow
+            return responses
+
+        responses = asyncio.run(run())
+        assert all(response.status_code == 503 for response, _ in responses)
+        assert all("retry-after" in response.headers for response, _ in responses)
+        assert responses[0][1] >= 0.04
+        assert responses[-1][1] < responses[0][1] / 2
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """Gateway on an in-memory Redis"""
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = fakeredis.FakeAsyncRedis()
+    monkeypatch.setattr(main, "redis_client", redis)
+    monkeypatch.setattr(main, "rate_limit_script", redis.register_script(main.RATE_LIMIT_SCRIPT))
+    monkeypatch.setattr(main, "local_rate_limiter", main.LocalRateLimiter())
+    return redis
+
+@pytest.fixture
+def rate_limited(fake_redis, monkeypatch):
+    """Gateway allowing USER three requests a minute"""
+    monkeypatch.setattr(main, "USER_RATE_LIMIT", (3, 60))
+    use_upstream("payment", lambda request: upstream_response(json_body={"plans": []}))
+    return fake_redis
+
+class TestRateLimit:
+    """GCRA rate limiting shared through Redis"""
+
+    def test_requests_past_the_limit_are_rejected(self, rate_limited):
+        async def run():
+            async with gateway_client() as client:
+                return [await client.get("/payments/pricing") for _ in range(4)]
+
+        responses = asyncio.run(run())
+        assert [response.status_code for response in responses] == [200, 200, 200, 429]
+        # One request is let through every 20 seconds once the burst is spent
+        assert responses[-1].headers["retry-after"] in ("19", "20")
+        assert responses[-1].json() == {"detail": "Rate limit exceeded"}
+
+    def test_redis_rejection_blocks_the_key_locally(self, rate_limited, monkeypatch):
+        script = main.rate_limit_script
+        redis_calls = []
+
+        async def counted(keys, args):
+            redis_calls.append(keys[0])
+            return await script(keys=keys, args=args)
+
+        async def run():
+            # Another gateway instance has used up the user's limit
+            for _ in range(3):
+                await script(keys=[f"rate_limit:user:{USER['id']}"], args=[20000, 40000])
+            monkeypatch.setattr(main, "rate_limit_script", counted)
+            async with gateway_client() as client:
+                return [await client.get("/payments/pricing") for _ in range(3)]
+
+        responses = asyncio.run(run())
+        assert [response.status_code for response in responses] == [429] * 3
+        assert all(response.headers["retry-after"] in ("19", "20") for response in responses)
+        # Only the first rejection needed Redis
+        assert redis_calls == [f"rate_limit:user:{USER['id']}"]
+
+    def test_redis_errors_fail_open(self, rate_limited, monkeypatch):
+        async def unreachable(keys, args):
+            raise ConnectionError("Redis is down")
+
+        monkeypatch.setattr(main, "rate_limit_script", unreachable)
+
+        async def run():
+            async with gateway_client() as client:
+                return [await client.get("/payments/pricing") for _ in range(3)]
+
+        assert [response.status_code for response in asyncio.run(run())] == [200] * 3
+
+def expires_in(cache, key):
+    """Seconds until a TTLCache entry expires"""
+    return cache._entries[key][0] - time.time()
+
+class TestAuthCaches:
+    """Verified tokens and users are cached, never past their lifetime"""
+
+    def test_expired_tokens_are_not_served_from_the_cache(self):
+        expires = int(time.time()) + 1
+        token = token_for(USER["id"], exp=expires)
+        use_upstream("payment", lambda request: upstream_response(json_body={"plans": []}))
+
+        async def request():
+            async with gateway_client(token) as client:
+                return await client.get("/payments/pricing")
+
+        assert asyncio.run(request()).status_code == 200
+        assert expires_in(main.token_cache, token) <= 1
+        # JWT expiry has one-second resolution
+        time.sleep(max(0.0, expires + 1 - time.time()) + 0.05)
+        assert not main.token_cache.get(token)[0]
+        with pytest.raises(main.JWTError):
+            main.verify_token(token)
+        response = asyncio.run(request())
+        assert response.status_code == 401 and response.json() == {"detail": "Invalid token"}
+
+    def test_missing_users_are_cached(self, fake_redis):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return upstream_response(404, json_body={"detail": "Not found"})
+
+        async def run():
+            use_upstream("user", handler)
+            async with gateway_client(token_for("ghost")) as client:
+                responses = [await client.get("/payments/pricing") for _ in range(2)]
+            return responses, await fake_redis.get("user:ghost"), await fake_redis.ttl("user:ghost")
+
+        responses, stored, ttl = asyncio.run(run())
+        assert [response.json()["detail"] for response in responses] == ["User not found"] * 2
+        assert calls == ["/users/ghost"]
+        assert stored == b"null" and ttl == main.USER_NOT_FOUND_TTL
+        assert main.USER_NOT_FOUND_TTL - 1 < expires_in(main.local_user_cache, "user:ghost") <= main.USER_NOT_FOUND_TTL
+
+    def test_users_are_promoted_from_redis_to_the_local_cache(self, fake_redis):
+        user = {"id": "u2", "role": "contractor"}
+
+        def handler(request):
+            raise AssertionError("user service called for a cached user")
+
+        async def run():
+            use_upstream("user", handler)
+            use_upstream("payment", lambda request: upstream_response(json_body={"plans": []}))
+            await fake_redis.set("user:u2", json.dumps(user))
+            async with gateway_client(token_for("u2")) as client:
+                first = await client.get("/payments/pricing")
+                # Served from the local tier once promoted
+                await fake_redis.delete("user:u2")
+                second = await client.get("/payments/pricing")
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert first.status_code == second.status_code == 200
+        assert main.local_user_cache.get("user:u2") == (True, user)
+        assert expires_in(main.local_user_cache, "user:u2") <= main.LOCAL_USER_CACHE_TTL
+
+    def test_service_answers_fill_both_tiers(self, fake_redis):
+        user = {"id": "u3", "role": "homeowner"}
+
+        async def run():
+            use_upstream("user", lambda request: upstream_response(json_body=user))
+            use_upstream("payment", lambda request: upstream_response(json_body={"plans": []}))
+            async with gateway_client(token_for("u3")) as client:
+                response = await client.get("/payments/pricing")
+            return response, await fake_redis.get("user:u3"), await fake_redis.ttl("user:u3")
+
+        response, stored, ttl = asyncio.run(run())
+        assert response.status_code == 200
+        assert json.loads(stored) == user and ttl == main.USER_CACHE_TTL
+        assert expires_in(main.local_user_cache, "user:u3") <= main.LOCAL_USER_CACHE_TTL
@@ -0,0 +1,21 @@
+"""
+OrPaynter AI Platform Pricing
+Pricing engine, per-service adapters and estimate cache shared by the cost models
+"""
+
+from .cost_engine import QUOTE_FIELDS, PricingEngine, Quote, pricing_engine
+from .adapters import price_agent_project, price_damage_repair, price_roof_estimate
+from .estimate_cache import EstimateCache, freeze_rates, memoize_estimate
+
+__all__ = [
+    "QUOTE_FIELDS",
+    "PricingEngine",
+    "Quote",
+    "pricing_engine",
+    "price_agent_project",
+    "price_damage_repair",
+    "price_roof_estimate",
+    "EstimateCache",
+    "freeze_rates",
+    "memoize_estimate",
+]
@@ -0,0 +1,93 @@
+"""
+OrPaynter AI Platform Pricing Adapters
+Async entry points mapping each cost model's rate terms onto the pricing engine
+
+Pricing is plain arithmetic that never blocks, so the adapters run the engine
+inline instead of offloading it to a thread.
+"""
+
+from typing import Dict
+
+from .cost_engine import Quote, pricing_engine
+
+
+async def price_agent_project(
+    material_range: Dict[str, float],
+    labor_range: Dict[str, float],
+    area_squares: float,
+    material_multiplier: float = 1.0,
+    labor_multiplier: float = 1.0,
+    factors_multiplier: float = 1.0,
+    fixed_extras: float = 0.0,
+    permit_rate: float = 0.0
+) -> Quote:
+    """
+    Price a project for the cost estimator agent.
+
+    Material and labor rates are min/max ranges per roofing square, scaled by
+    the regional multipliers; the job's pitch, access and complexity factors
+    only apply to labor, and permits are a share of the average base cost.
+    """
+    return pricing_engine.price(
+        material_min=material_range["min"],
+        material_max=material_range["max"],
+        labor_min=labor_range["min"],
+        labor_max=labor_range["max"],
+        area=area_squares,
+        material_multiplier=material_multiplier,
+        labor_multiplier=labor_multiplier,
+        labor_adjustment=factors_multiplier,
+        fixed_extras=fixed_extras,
+        percent_extras=permit_rate
+    )
+
+
+async def price_roof_estimate(
+    base_cost: Dict[str, float],
+    square_footage: float,
+    location_multiplier: float = 1.0,
+    damage_multiplier: float = 1.0,
+    fixed_extras: float = 0.0
+) -> Quote:
+    """
+    Price a roof for the AI service's cost model.
+
+    Material and labor are single rates per square foot; the location and the
+    compounded damage multipliers scale both alike.
+    """
+    return pricing_engine.price(
+        material_min=base_cost["material"],
+        material_max=base_cost["material"],
+        labor_min=base_cost["labor"],
+        labor_max=base_cost["labor"],
+        area=square_footage,
+        material_multiplier=location_multiplier,
+        labor_multiplier=location_multiplier,
+        material_adjustment=damage_multiplier,
+        labor_adjustment=damage_multiplier,
+        fixed_extras=fixed_extras
+    )
+
+
+async def price_damage_repair(
+    cost_per_sqft: float,
+    labor_rate_per_sqft: float,
+    damage_area: float,
+    material_markup: float = 1.0,
+    permit_cost: float = 0.0
+) -> Quote:
+    """
+    Price a damage repair for the complete AI service implementation.
+
+    Only the damaged area is priced: marked-up material per square foot plus
+    labor hours converted to a per-square-foot rate, and a flat permit fee.
+    """
+    return pricing_engine.price(
+        material_min=cost_per_sqft,
+        material_max=cost_per_sqft,
+        labor_min=labor_rate_per_sqft,
+        labor_max=labor_rate_per_sqft,
+        area=damage_area,
+        material_multiplier=material_markup,
+        fixed_extras=permit_cost
+    )
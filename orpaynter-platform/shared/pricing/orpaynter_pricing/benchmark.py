@@ -0,0 +1,243 @@
+"""
+OrPaynter AI Platform Pricing Benchmark
+Compares per-estimate latency and throughput of the cost models' pre-engine arithmetic with the pricing adapters they now await
+
+Both callers are covered: the cost estimator agent (price_agent_project) and the
+AI service's CostEstimationModel (price_roof_estimate). The legacy paths are
+transcriptions of each model's pre-engine pricing code, and the adapters are
+called with the arguments each model passes them; the models themselves are
+not imported, since the agent needs its LLM provider package and the AI
+service its ML stack. Only pricing is timed, not rate lookups, the estimate
+cache, I/O or HTTP handling.
+
+Run:
+    python -m orpaynter_pricing.benchmark [--estimates 100000]
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from .adapters import price_agent_project, price_roof_estimate
+from .cost_engine import pricing_engine
+
+# Cost estimator agent rates per roofing square
+MATERIAL_RATES = {
+    "asphalt_shingle": {"min": 150, "max": 350},
+    "metal": {"min": 700, "max": 1000},
+    "tile": {"min": 1000, "max": 1500}
+}
+LABOR_RATES = {
+    "asphalt_shingle": {"min": 150, "max": 300},
+    "metal": {"min": 250, "max": 500},
+    "tile": {"min": 400, "max": 800}
+}
+# Disposal, underlayment and flashing per square
+AGENT_PER_SQUARE_EXTRAS = 50 + 70 + 30
+
+# AI service rates per square foot, damage multipliers and flat fees
+SERVICE_BASE_COSTS = {
+    "asphalt_shingles": {"material": 120, "labor": 180},
+    "metal_roofing": {"material": 350, "labor": 250},
+    "tile_roofing": {"material": 300, "labor": 350}
+}
+SERVICE_DAMAGE_MULTIPLIERS = {"missing_shingles": 1.2, "hail_damage": 1.3, "wind_damage": 1.4, "water_damage": 2.0}
+SERVICE_FIXED_COSTS = {"permits": 500, "cleanup": 1000, "inspection": 300}
+
+
+async def legacy_agent_estimate(project: Dict) -> float:
+    """
+    CostEstimator's pre-engine arithmetic: the _calculate_material_cost,
+    _calculate_labor_cost and _calculate_additional_costs steps, each an async
+    call building a dict
+    """
+    async def material(project):
+        rates = MATERIAL_RATES[project["material_type"]]
+        lo, hi = rates["min"], rates["max"]
+        multiplier = project["material_multiplier"]
+        return {
+            "cost_per_square": {"min": lo * multiplier, "max": hi * multiplier, "avg": (lo + hi) / 2 * multiplier},
+            "total_cost": {
+                "min": lo * project["area"] * multiplier,
+                "max": hi * project["area"] * multiplier,
+                "avg": (lo * project["area"] * multiplier + hi * project["area"] * multiplier) / 2
+            }
+        }
+
+    async def labor(project):
+        rates = LABOR_RATES[project["material_type"]]
+        lo, hi = rates["min"], rates["max"]
+        multiplier = project["labor_multiplier"] * project["factors_multiplier"]
+        return {
+            "cost_per_square": {"min": lo * multiplier, "max": hi * multiplier, "avg": (lo + hi) / 2 * multiplier},
+            "total_cost": {
+                "min": lo * project["area"] * multiplier,
+                "max": hi * project["area"] * multiplier,
+                "avg": (lo * project["area"] * multiplier + hi * project["area"] * multiplier) / 2
+            }
+        }
+
+    async def additional(base_cost, project):
+        itemized = {"permits": base_cost * 0.03, "disposal": project["area"] * 50,
+                    "underlayment": project["area"] * 70, "flashing": project["area"] * 30}
+        return {"itemized": itemized, "total": sum(itemized.values())}
+
+    material_cost = await material(project)
+    labor_cost = await labor(project)
+    base = material_cost["total_cost"]["avg"] + labor_cost["total_cost"]["avg"]
+    additional_cost = await additional(base, project)
+    return base + additional_cost["total"]
+
+
+async def adapter_agent_estimate(project: Dict) -> float:
+    """The same estimate through the agent's adapter"""
+    quote = await price_agent_project(
+        MATERIAL_RATES[project["material_type"]],
+        LABOR_RATES[project["material_type"]],
+        project["area"],
+        material_multiplier=project["material_multiplier"],
+        labor_multiplier=project["labor_multiplier"],
+        factors_multiplier=project["factors_multiplier"],
+        fixed_extras=AGENT_PER_SQUARE_EXTRAS * project["area"],
+        permit_rate=0.03
+    )
+    return quote.total_avg
+
+
+def legacy_service_estimate(roof: Dict) -> float:
+    """CostEstimationModel.estimate_cost's pre-engine arithmetic, including its breakdown dicts"""
+    base_cost = SERVICE_BASE_COSTS[roof["roof_type"]]
+    material_cost = base_cost["material"] * roof["square_footage"] * roof["location_multiplier"]
+    labor_cost = base_cost["labor"] * roof["square_footage"] * roof["location_multiplier"]
+    if roof["damages"]:
+        damage_multiplier = 1.0
+        for damage in roof["damages"]:
+            damage_multiplier *= SERVICE_DAMAGE_MULTIPLIERS.get(damage["type"], 1.0)
+        material_cost *= damage_multiplier
+        labor_cost *= damage_multiplier
+    total_cost = material_cost + labor_cost + sum(SERVICE_FIXED_COSTS.values())
+    cost_breakdown = {"materials": material_cost, "labor": labor_cost, **SERVICE_FIXED_COSTS}
+    result = {
+        "total_cost": total_cost,
+        "cost_breakdown": cost_breakdown,
+        "material_costs": {"roofing_materials": material_cost},
+        "labor_costs": {"installation": labor_cost}
+    }
+    return result["total_cost"]
+
+
+async def adapter_service_estimate(roof: Dict) -> float:
+    """The same estimate through the AI service's adapter"""
+    damage_multiplier = 1.0
+    for damage in roof["damages"]:
+        damage_multiplier *= SERVICE_DAMAGE_MULTIPLIERS.get(damage["type"], 1.0)
+    quote = await price_roof_estimate(
+        SERVICE_BASE_COSTS[roof["roof_type"]],
+        roof["square_footage"],
+        location_multiplier=roof["location_multiplier"],
+        damage_multiplier=damage_multiplier,
+        fixed_extras=sum(SERVICE_FIXED_COSTS.values())
+    )
+    return quote.total_avg
+
+
+def make_projects(count: int, seed: int = 7) -> List[Dict]:
+    """Generate random agent-style projects"""
+    rng = random.Random(seed)
+    return [
+        {
+            "material_type": rng.choice(list(MATERIAL_RATES)),
+            "area": rng.uniform(5, 60),
+            "material_multiplier": rng.uniform(0.9, 1.5),
+            "labor_multiplier": rng.uniform(0.9, 1.5),
+            "factors_multiplier": rng.choice([1.0, 1.15, 1.3, 1.56])
+        }
+        for _ in range(count)
+    ]
+
+
+def make_roofs(count: int, seed: int = 11) -> List[Dict]:
+    """Generate random AI-service-style roofs with detected damages"""
+    rng = random.Random(seed)
+    return [
+        {
+            "roof_type": rng.choice(list(SERVICE_BASE_COSTS)),
+            "square_footage": rng.uniform(800, 4000),
+            "location_multiplier": rng.uniform(0.9, 1.4),
+            "damages": [{"type": rng.choice(list(SERVICE_DAMAGE_MULTIPLIERS))} for _ in range(rng.randint(0, 3))]
+        }
+        for _ in range(count)
+    ]
+
+
+def time_calls(loop: asyncio.AbstractEventLoop, func: Callable, items: List[Dict]) -> float:
+    """Seconds elapsed pricing every item, awaiting coroutine functions on the loop"""
+    if asyncio.iscoroutinefunction(func):
+        async def run():
+            for item in items:
+                await func(item)
+        start = time.perf_counter()
+        loop.run_until_complete(run())
+        return time.perf_counter() - start
+    start = time.perf_counter()
+    for item in items:
+        func(item)
+    return time.perf_counter() - start
+
+
+def check_agreement(loop: asyncio.AbstractEventLoop, legacy: Callable, adapter: Callable, items: List[Dict]):
+    """Results must agree before timings mean anything"""
+    for item in items[:1000]:
+        expected = legacy(item)
+        if asyncio.iscoroutine(expected):
+            expected = loop.run_until_complete(expected)
+        actual = loop.run_until_complete(adapter(item))
+        assert abs(expected - actual) < 1e-6 * max(1.0, abs(expected)), (item, expected, actual)
+
+
+def report(name: str, elapsed: float, count: int):
+    print(f"{name:<44} {elapsed / count * 1e6:>10.2f} us/estimate {count / elapsed:>14,.0f} estimates/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument("--estimates", type=int, default=100000)
+    args = parser.parse_args()
+    count = args.estimates
+
+    projects = make_projects(count)
+    roofs = make_roofs(count)
+    loop = asyncio.new_event_loop()
+    check_agreement(loop, legacy_agent_estimate, adapter_agent_estimate, projects)
+    check_agreement(loop, legacy_service_estimate, adapter_service_estimate, roofs)
+
+    print("Cost estimator agent")
+    report("  legacy (async, dict per step)", time_calls(loop, legacy_agent_estimate, projects), count)
+    report("  price_agent_project adapter", time_calls(loop, adapter_agent_estimate, projects), count)
+
+    material = np.array([[MATERIAL_RATES[p["material_type"]][k] for k in ("min", "max")] for p in projects])
+    labor = np.array([[LABOR_RATES[p["material_type"]][k] for k in ("min", "max")] for p in projects])
+    columns = {key: np.array([p[key] for p in projects]) for key in projects[0] if key != "material_type"}
+    start = time.perf_counter()
+    pricing_engine.price_batch(
+        material[:, 0], material[:, 1], labor[:, 0], labor[:, 1], columns["area"],
+        material_multiplier=columns["material_multiplier"],
+        labor_multiplier=columns["labor_multiplier"],
+        labor_adjustment=columns["factors_multiplier"],
+        per_area_extras=AGENT_PER_SQUARE_EXTRAS,
+        percent_extras=0.03
+    )
+    report("  engine price_batch()", time.perf_counter() - start, count)
+
+    print("AI service CostEstimationModel")
+    report("  legacy (sync, inline)", time_calls(loop, legacy_service_estimate, roofs), count)
+    report("  price_roof_estimate adapter", time_calls(loop, adapter_service_estimate, roofs), count)
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
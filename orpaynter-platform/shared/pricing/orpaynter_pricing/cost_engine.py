@@ -0,0 +1,135 @@
+"""
+OrPaynter AI Platform Pricing Engine
+Synchronous pricing core shared by the cost estimator agent and the AI services
+"""
+
+from typing import Any, Dict, NamedTuple
+
+import numpy as np
+
+QUOTE_FIELDS = (
+    "material_min", "material_max", "material_avg",
+    "labor_min", "labor_max", "labor_avg",
+    "additional", "total_min", "total_max", "total_avg"
+)
+
+
+class Quote(NamedTuple):
+    """Priced line item; every amount is in currency units"""
+    material_min: float
+    material_max: float
+    material_avg: float
+    labor_min: float
+    labor_max: float
+    labor_avg: float
+    additional: float
+    total_min: float
+    total_max: float
+    total_avg: float
+
+
+class PricingEngine:
+    """
+    Pricing core shared by every cost model in the platform.
+
+    A quote is priced as
+
+        material = material_rate * area * material_multiplier * material_adjustment
+        labor    = labor_rate * area * labor_multiplier * labor_adjustment
+        additional = fixed_extras + per_area_extras * area
+                     + percent_extras * (material_avg + labor_avg)
+        total    = material + labor + additional
+
+    for the min and max rate of each range, with avg the midpoint. Each service
+    keeps its own rate tables and maps them onto these terms in a thin adapter,
+    so the arithmetic itself lives only here.
+    """
+
+    def price(
+        self,
+        material_min: float,
+        material_max: float,
+        labor_min: float,
+        labor_max: float,
+        area: float,
+        material_multiplier: float = 1.0,
+        labor_multiplier: float = 1.0,
+        material_adjustment: float = 1.0,
+        labor_adjustment: float = 1.0,
+        fixed_extras: float = 0.0,
+        per_area_extras: float = 0.0,
+        percent_extras: float = 0.0
+    ) -> Quote:
+        """Price a single line item using plain float arithmetic"""
+        material_scale = area * material_multiplier * material_adjustment
+        labor_scale = area * labor_multiplier * labor_adjustment
+
+        material_lo = material_min * material_scale
+        material_hi = material_max * material_scale
+        labor_lo = labor_min * labor_scale
+        labor_hi = labor_max * labor_scale
+        material_mid = (material_lo + material_hi) / 2
+        labor_mid = (labor_lo + labor_hi) / 2
+
+        additional = fixed_extras + per_area_extras * area + percent_extras * (material_mid + labor_mid)
+
+        return Quote(
+            material_lo, material_hi, material_mid,
+            labor_lo, labor_hi, labor_mid,
+            additional,
+            material_lo + labor_lo + additional,
+            material_hi + labor_hi + additional,
+            material_mid + labor_mid + additional
+        )
+
+    def price_batch(
+        self,
+        material_min: Any,
+        material_max: Any,
+        labor_min: Any,
+        labor_max: Any,
+        area: Any,
+        material_multiplier: Any = 1.0,
+        labor_multiplier: Any = 1.0,
+        material_adjustment: Any = 1.0,
+        labor_adjustment: Any = 1.0,
+        fixed_extras: Any = 0.0,
+        per_area_extras: Any = 0.0,
+        percent_extras: Any = 0.0
+    ) -> Dict[str, np.ndarray]:
+        """
+        Price many line items in one vectorized pass.
+
+        Every argument may be a scalar or an array; arrays are broadcast
+        against each other, so a grid of options can be priced by shaping the
+        inputs along different axes. Returns one array per ``QUOTE_FIELDS``
+        entry with the broadcast shape.
+        """
+        area = np.asarray(area, dtype=float)
+        material_scale = area * material_multiplier * material_adjustment
+        labor_scale = area * labor_multiplier * labor_adjustment
+
+        material_lo = np.multiply(material_min, material_scale, dtype=float)
+        material_hi = np.multiply(material_max, material_scale, dtype=float)
+        labor_lo = np.multiply(labor_min, labor_scale, dtype=float)
+        labor_hi = np.multiply(labor_max, labor_scale, dtype=float)
+        material_mid = (material_lo + material_hi) / 2
+        labor_mid = (labor_lo + labor_hi) / 2
+
+        additional = fixed_extras + np.multiply(per_area_extras, area) \
+            + np.multiply(percent_extras, material_mid + labor_mid)
+
+        values = (
+            material_lo, material_hi, material_mid,
+            labor_lo, labor_hi, labor_mid,
+            additional,
+            material_lo + labor_lo + additional,
+            material_hi + labor_hi + additional,
+            material_mid + labor_mid + additional
+        )
+        shape = np.broadcast_shapes(*(np.shape(v) for v in values))
+        return {name: np.broadcast_to(value, shape) for name, value in zip(QUOTE_FIELDS, values)}
+
+
+# Engines hold no state, so every adapter can share one instance
+pricing_engine = PricingEngine()
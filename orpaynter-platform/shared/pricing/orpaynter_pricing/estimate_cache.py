@@ -0,0 +1,158 @@
+"""
+OrPaynter AI Platform Estimate Cache
+Memoization for cost estimates, shared by the cost estimator agent and the AI service
+"""
+
+import asyncio
+import copy
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _normalize(value: Any) -> Any:
+    """Reduce a value to a canonical JSON-compatible form"""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        # 25, 25.0 and 25.0000000001 describe the same roof
+        return round(float(value), 6)
+    if isinstance(value, str):
+        return value.strip()
+    return str(value)
+
+
+
+def freeze_rates(value: Any) -> Any:
+    """
+    Make a rate table read-only all the way down.
+
+    Cached estimates are only invalidated when a table is replaced, so an
+    in-place edit would keep serving estimates priced with the old rates.
+    Frozen tables turn such an edit into a TypeError instead.
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze_rates(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze_rates(item) for item in value)
+    return value
+
+
+class EstimateCache:
+    """Bounded LRU cache of cost estimates keyed by normalized inputs and rate-table version"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, *parts: Any) -> str:
+        """Build a cache key from the canonical hash of the inputs and the current version"""
+        canonical = json.dumps(_normalize(parts), sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        return f"{self.version}:{digest}"
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value) for a key, refreshing its LRU position on a hit"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, copy.deepcopy(self._entries[key])
+            self.misses += 1
+            return False, None
+
+    def store(self, key: str, value: Any, version: Optional[int] = None):
+        """Store a value unless the rate tables changed while it was being computed"""
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._entries[key] = copy.deepcopy(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every entry and bump the rate-table version"""
+        with self._lock:
+            self.version += 1
+            self.invalidations += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache hit-rate statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "rate_table_version": self.version,
+            "invalidations": self.invalidations
+        }
+
+
+def memoize_estimate(
+    key: Optional[Callable[..., Any]] = None,
+    cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None
+):
+    """
+    Memoize an estimate method through the instance's ``estimate_cache``.
+
+    Works for both sync and async methods. ``key`` maps the method arguments to
+    the inputs that actually affect the estimate (defaults to all arguments);
+    ``cacheable`` decides whether a result may be stored (defaults to results
+    without an ``error`` entry).
+    """
+    if cacheable is None:
+        cacheable = lambda result: isinstance(result, dict) and "error" not in result
+
+    def decorator(method):
+        def build_key(cache: EstimateCache, args, kwargs) -> str:
+            parts = key(*args, **kwargs) if key else (args, kwargs)
+            return cache.make_key(method.__name__, parts)
+
+        if asyncio.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                cache = self.estimate_cache
+                cache_key = build_key(cache, args, kwargs)
+                hit, value = cache.lookup(cache_key)
+                if hit:
+                    return value
+                version = cache.version
+                result = await method(self, *args, **kwargs)
+                if cacheable(result):
+                    cache.store(cache_key, result, version)
+                return result
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            cache = self.estimate_cache
+            cache_key = build_key(cache, args, kwargs)
+            hit, value = cache.lookup(cache_key)
+            if hit:
+                return value
+            version = cache.version
+            result = method(self, *args, **kwargs)
+            if cacheable(result):
+                cache.store(cache_key, result, version)
+            return result
+        return wrapper
+
+    return decorator